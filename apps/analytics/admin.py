@@ -0,0 +1,18 @@
+"""
+Django admin configuration for analytics rollups.
+"""
+
+from django.contrib import admin
+from .models import RollupCursor, VoiceCommandDailyStat
+
+
+@admin.register(VoiceCommandDailyStat)
+class VoiceCommandDailyStatAdmin(admin.ModelAdmin):
+    list_display = ('user', 'day', 'action', 'commands', 'successes')
+    list_filter = ('action', 'day')
+    search_fields = ('user__username',)
+
+
+@admin.register(RollupCursor)
+class RollupCursorAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_id', 'updated_at')
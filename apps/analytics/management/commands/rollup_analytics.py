@@ -0,0 +1,33 @@
+"""
+Fold new voice commands into the analytics rollups, or rebuild them.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.rollups import rebuild_voice_command_rollups, roll_up_voice_commands
+
+
+class Command(BaseCommand):
+    help = 'Update the per-user daily voice command rollups from the raw log.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute rollups from the raw log instead of only adding new rows.')
+        parser.add_argument('--since', default=None,
+                            help='With --rebuild, first day to recompute (YYYY-MM-DD; '
+                                 'default: start of LOG_RETENTION_DAYS).')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date like 2024-01-31')
+        if options['rebuild']:
+            rows = rebuild_voice_command_rollups(since)
+            self.stdout.write(f'Rebuilt {rows} rollup rows')
+        processed = roll_up_voice_commands()
+        self.stdout.write(f'Rolled up {processed} new voice commands')
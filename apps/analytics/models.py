@@ -0,0 +1,35 @@
+"""
+Pre-aggregated analytics tables.
+"""
+
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class VoiceCommandDailyStat(models.Model):
+    """Voice commands one user issued on one day for one action."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='voice_command_stats')
+    day = models.DateField()
+    action = models.CharField(max_length=50)
+    commands = models.PositiveIntegerField(default=0)
+    successes = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.user_id} {self.day} {self.action}: {self.successes}/{self.commands}"
+    
+    class Meta:
+        verbose_name = "Voice Command Daily Stat"
+        verbose_name_plural = "Voice Command Daily Stats"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day', 'action'], name='analytics_vcstat_user_day_action_uniq'),
+        ]
+
+
+class RollupCursor(models.Model):
+    """Highest source row id already folded into a rollup table."""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
@@ -0,0 +1,158 @@
+"""
+Incremental per-user, per-day voice command rollups.
+
+``roll_up_voice_commands`` folds ``VoiceCommand`` rows with ids above the
+cursor into ``VoiceCommandDailyStat`` counters and advances the cursor in the
+same transaction, so each run reads only rows logged since the last one.
+``voice_command_summary`` answers from the rollup table alone: at most one row
+per day and action, however large the raw log grows. Rollups outlive the raw
+rows that ``logs.prune`` deletes.
+
+The cursor assumes ids become visible in order. Where several processes
+insert concurrently (PostgreSQL), a batch that commits after a rollup has
+passed its ids is skipped; ``rollup_analytics --rebuild --since`` recounts
+the affected days.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.core.locking import lock_row
+from apps.core.models import VoiceCommand
+from .models import RollupCursor, VoiceCommandDailyStat
+
+VOICE_COMMANDS = 'voice_commands'
+
+
+def _lock_cursor(name):
+    """The cursor row, locked until the surrounding transaction ends."""
+    RollupCursor.objects.get_or_create(name=name)
+    # Concurrent rollups queue up here instead of double counting.
+    lock_row(RollupCursor.objects.filter(name=name))
+    return RollupCursor.objects.get(name=name)
+
+
+def _aggregate(commands):
+    return (
+        commands.annotate(day=TruncDate('created_at'))
+        .values_list('user_id', 'day', 'parsed_action')
+        .annotate(total=Count('pk'), succeeded=Count('pk', filter=Q(success=True)))
+        .order_by()
+    )
+
+
+def _apply(counts):
+    """Add ``(user_id, day, action, commands, successes)`` rows to the rollup table."""
+    counts = list(counts)
+    if not counts:
+        return
+    existing = {
+        (stat.user_id, stat.day, stat.action): stat
+        for stat in VoiceCommandDailyStat.objects.filter(
+            user_id__in={row[0] for row in counts}, day__in={row[1] for row in counts}
+        )
+    }
+    created, updated = [], []
+    for user_id, day, action, total, succeeded in counts:
+        stat = existing.get((user_id, day, action))
+        if stat is None:
+            created.append(VoiceCommandDailyStat(
+                user_id=user_id, day=day, action=action, commands=total, successes=succeeded
+            ))
+        else:
+            stat.commands += total
+            stat.successes += succeeded
+            updated.append(stat)
+    VoiceCommandDailyStat.objects.bulk_create(created)
+    VoiceCommandDailyStat.objects.bulk_update(updated, ['commands', 'successes'], batch_size=500)
+
+
+def roll_up_voice_commands(batch_size=None):
+    """Fold newly logged voice commands into the daily rollups; returns rows processed."""
+    batch_size = batch_size or settings.ANALYTICS_ROLLUP_BATCH_SIZE
+    processed = 0
+    while True:
+        with transaction.atomic():
+            cursor = _lock_cursor(VOICE_COMMANDS)
+            pks = list(
+                VoiceCommand.objects.filter(pk__gt=cursor.last_id)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                return processed
+            _apply(_aggregate(VoiceCommand.objects.filter(pk__gt=cursor.last_id, pk__lte=pks[-1])))
+            RollupCursor.objects.filter(pk=cursor.pk).update(last_id=pks[-1], updated_at=timezone.now())
+        processed += len(pks)
+
+
+def rebuild_voice_command_rollups(since=None):
+    """
+    Recompute rollups for days from ``since`` onwards from the raw log.
+
+    ``since`` defaults to the first day still fully covered by
+    ``LOG_RETENTION_DAYS``; earlier days are kept as they are, since their raw
+    rows may already be pruned. Returns the number of rollup rows written.
+    """
+    if since is None and settings.LOG_RETENTION_DAYS > 0:
+        since = timezone.localdate() - timedelta(days=settings.LOG_RETENTION_DAYS - 1)
+    with transaction.atomic():
+        cursor = _lock_cursor(VOICE_COMMANDS)
+        stats = VoiceCommandDailyStat.objects.all()
+        commands = VoiceCommand.objects.filter(pk__lte=cursor.last_id)
+        if since is not None:
+            stats = stats.filter(day__gte=since)
+            commands = commands.filter(created_at__date__gte=since)
+        stats.delete()
+        counts = list(_aggregate(commands))
+        VoiceCommandDailyStat.objects.bulk_create(
+            [VoiceCommandDailyStat(user_id=user_id, day=day, action=action, commands=total, successes=succeeded)
+             for user_id, day, action, total, succeeded in counts],
+            batch_size=500,
+        )
+    return len(counts)
+
+
+def _rate(successes, commands):
+    return round(successes / commands, 4) if commands else None
+
+
+def voice_command_summary(user, days=30):
+    """Totals, per-action breakdown and daily counts for the last ``days`` days."""
+    today = timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    rows = (
+        VoiceCommandDailyStat.objects.filter(user=user, day__gte=since, day__lte=today)
+        .values_list('day', 'action', 'commands', 'successes')
+    )
+
+    actions = {}
+    daily = {since + timedelta(days=offset): [0, 0] for offset in range(days)}
+    for day, action, commands, successes in rows:
+        counts = actions.setdefault(action, [0, 0])
+        counts[0] += commands
+        counts[1] += successes
+        daily[day][0] += commands
+        daily[day][1] += successes
+
+    total = sum(counts[0] for counts in actions.values())
+    succeeded = sum(counts[1] for counts in actions.values())
+    return {
+        'since': since.isoformat(),
+        'until': today.isoformat(),
+        'commands': total,
+        'successes': succeeded,
+        'success_rate': _rate(succeeded, total),
+        'actions': {
+            action: {'commands': commands, 'successes': successes, 'success_rate': _rate(successes, commands)}
+            for action, (commands, successes) in sorted(actions.items(), key=lambda item: -item[1][0])
+        },
+        'daily': [
+            {'date': day.isoformat(), 'commands': commands, 'successes': successes}
+            for day, (commands, successes) in daily.items()
+        ],
+    }
@@ -0,0 +1,17 @@
+"""
+Keep analytics rollups in step with the voice command log.
+"""
+
+from django.conf import settings
+from django.dispatch import receiver
+
+from apps.core.models import VoiceCommand
+from apps.core.signals import log_rows_written
+from apps.jobs.queue import enqueue
+
+
+@receiver(log_rows_written, sender=VoiceCommand, dispatch_uid='analytics.voice_commands_written')
+def voice_commands_written(sender, count, **kwargs):
+    if settings.ANALYTICS_AUTO_ROLLUP:
+        # unique=True coalesces every flush until the job runs into one rollup.
+        enqueue('analytics.rollup_voice_commands', unique=True)
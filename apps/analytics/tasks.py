@@ -0,0 +1,13 @@
+"""
+Background tasks for analytics.
+"""
+
+from apps.jobs.queue import task
+from .rollups import rebuild_voice_command_rollups, roll_up_voice_commands
+
+
+@task('analytics.rollup_voice_commands')
+def rollup_voice_commands(job, rebuild=False):
+    """Fold newly logged voice commands into the per-day rollup table."""
+    rebuilt = rebuild_voice_command_rollups() if rebuild else 0
+    return {'processed': roll_up_voice_commands(), 'rebuilt_rows': rebuilt}
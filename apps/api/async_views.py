@@ -0,0 +1,132 @@
+"""
+Async API views for the actions that mostly wait on Spotify or the LLM.
+
+These are plain Django async views (DRF 3.14 views are sync only). Served by
+an ASGI server, a request waiting on upstream I/O does not hold a worker
+thread, and independent upstream calls within a request run concurrently.
+Under WSGI they still work; Django runs each one in its own event loop.
+"""
+
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from rest_framework.authentication import CSRFCheck
+
+from apps.auth_app.authentication import KEYWORD, bearer_token
+from apps.auth_app.tokens import InvalidToken, user_for_access_token
+from apps.core.models import Playlist, UserProfile
+from apps.core.spotify.client import SpotifyNotConnected, get_spotify_client
+from apps.core.spotify.sync import SpotifySyncEngine
+from apps.recommendations.engine import METRICS, UnknownMood
+from apps.voice.executor import VoiceCommandExecutor
+from .views import suggestion_params, suggestion_results
+
+
+def _authenticated_user(request):
+    """
+    The user of a bearer token or else of the session, in the order of DRF's
+    authentication classes; None if neither. Like ``SessionAuthentication``,
+    raises ``PermissionDenied`` when a session request fails the CSRF check.
+    """
+    try:
+        token = bearer_token(request)
+        if token is not None:
+            return user_for_access_token(token)
+    except InvalidToken:
+        return None
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    check = CSRFCheck(lambda request: None)
+    check.process_request(request)
+    reason = check.process_view(request, None, (), {})
+    if reason:
+        raise PermissionDenied(f'CSRF Failed: {reason}')
+    return user
+
+
+def async_api_view(methods):
+    """
+    Restrict an async view to ``methods`` and a user authenticated by bearer
+    token or session.
+
+    The view is called as ``view(request, user, *args, **kwargs)``; errors use
+    the same ``detail`` bodies as DRF.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            # Both the token user cache and request.user may query the database.
+            try:
+                user = await sync_to_async(_authenticated_user)(request)
+            except PermissionDenied as exc:
+                return JsonResponse({'detail': str(exc)}, status=403)
+            if user is None:
+                return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401,
+                                    headers={'WWW-Authenticate': f'{KEYWORD} realm="api"'})
+            return await view(request, user, *args, **kwargs)
+        # CSRF is checked above for session users only; token clients send no
+        # cookies. (Django 4.2's csrf_exempt() cannot wrap async views.)
+        wrapper.csrf_exempt = True
+        wrapper.allowed_methods = tuple(methods)
+        return wrapper
+    return decorator
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@async_api_view(['POST'])
+async def sync_from_spotify(request, user):
+    """Sync the user's Spotify playlists inline, fetching playlists concurrently."""
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Request body must be a JSON object'}, status=400)
+    try:
+        profile, created = await sync_to_async(UserProfile.objects.get_or_create)(user=user)
+        client = await sync_to_async(get_spotify_client)(profile)
+    except SpotifyNotConnected as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    force = str(data.get('force', '')).lower() in ('1', 'true', 'yes')
+    result = await SpotifySyncEngine(user, client).arun(force=force)
+    return JsonResponse(result.as_dict())
+
+
+@async_api_view(['GET'])
+async def playlist_suggestions(request, user, pk):
+    """Async counterpart of ``GET /api/playlists/{id}/get_suggestions/``."""
+    exists = await sync_to_async(Playlist.objects.filter(user=user, pk=pk).exists)()
+    if not exists:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    mood, metric, limit = suggestion_params(request.GET)
+    if metric not in METRICS:
+        return JsonResponse({'error': f'metric must be one of: {", ".join(METRICS)}'}, status=400)
+    try:
+        results = await sync_to_async(suggestion_results)(user.pk, pk, mood, metric, limit)
+    except UnknownMood as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'mood': mood, 'metric': metric, 'results': results})
+
+
+@async_api_view(['POST'])
+async def execute_voice_command(request, user):
+    """Async counterpart of ``POST /api/voice-commands/execute/``."""
+    data = _json_body(request)
+    text = (data or {}).get('command_text')
+    if not isinstance(text, str) or not text.strip():
+        return JsonResponse({'error': 'Missing required field: command_text'}, status=400)
+
+    execution = await VoiceCommandExecutor(user).aexecute(text)
+    return JsonResponse(execution.as_dict(), status=execution.status)
@@ -0,0 +1,452 @@
+"""
+Query-count and latency budgets for every API route.
+
+Seeds a throwaway database at production-like sizes (by default 100 users,
+the benchmark user owning 100 playlists of 1,000 songs, 1M voice commands),
+then requests each endpoint in ``ENDPOINTS`` ``--repeat`` times as that user
+through the test client. Query counts come from the ``Server-Timing`` header
+written by ``PerformanceMiddleware`` (which also covers the async views);
+latency is the client-side wall time.
+
+Every method of every route named in ``apps/api/urls.py`` and
+``apps/auth_app/urls.py`` must have at least one entry, so a new endpoint
+without a budget fails the run. The command exits non-zero when an endpoint
+returns an unexpected status or a response without a ``Server-Timing`` query
+count, runs more queries than ``max_queries`` or has a p95 above ``p95_ms``
+(scaled by ``--latency-scale``), or, with ``--baseline``, regresses against
+an earlier ``--output`` report.
+"""
+
+import json
+import re
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLResolver, reverse
+from django.utils import timezone
+
+from apps.analytics.rollups import roll_up_voice_commands
+from apps.auth_app.tokens import issue_tokens
+from apps.core.benchmarks.database import benchmark_database
+from apps.core.benchmarks.factories import (
+    create_conversations, create_playlists, create_users, create_voice_commands
+)
+from apps.core.benchmarks.fake_spotify import FakeSpotify
+from apps.core.logbuffer import get_log_writer
+from apps.core.models import AIConversation, Playlist, Song, UserProfile, VoiceCommand
+from apps.core.spotify.client import get_spotify_client
+from apps.core.spotify.pool import get_client_pool
+from apps.core.spotify.sync import SpotifySyncEngine
+from apps.jobs.models import Job
+from apps.recommendations.ann import build_index
+
+USER_PREFIX = 'apibench'
+PASSWORD = 'benchmark-password'
+URLCONFS = ('apps.api.urls', 'apps.auth_app.urls')
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+# p95 growth over the baseline below this is treated as noise.
+MIN_REGRESSION_MS = 5
+
+
+@dataclass
+class Endpoint:
+    """
+    One request to time. ``kwargs(ctx, i)`` gives the URL kwargs and
+    ``data(ctx, i)`` the JSON body of the ``i``-th request.
+    """
+    url_name: str
+    method: str
+    max_queries: int
+    p95_ms: float
+    status: int = 200
+    kwargs: object = None
+    data: object = None
+    query: str = ''
+    # None: the benchmark user's session; 'anonymous'; 'fresh' for a new
+    # session per request (for logout); 'disposable' for the session of a new
+    # throwaway user per request; or 'token' for a bearer access token.
+    session: str = None
+
+    @property
+    def name(self):
+        suffix = ' (token)' if self.session == 'token' else ''
+        return f'{self.method.upper()} {self.url_name}{"?" + self.query if self.query else ""}{suffix}'
+
+
+def _playlist(ctx, i):
+    return {'pk': ctx.playlist_id}
+
+
+def _new_track(prefix):
+    return lambda ctx, i: {'spotify_track_id': f'{prefix}{i}', 'name': f'Benchmark Song {i}', 'artist': 'Bench'}
+
+
+def _batch(ctx, i):
+    ids = [f'batch{i}x{j}' for j in range(10)]
+    return {'operations': [
+        *({'op': 'add', 'spotify_track_id': track_id, 'name': track_id, 'artist': 'Bench'} for track_id in ids),
+        {'op': 'move', 'spotify_track_id': ids[0], 'position': 0},
+        *({'op': 'remove', 'spotify_track_id': track_id} for track_id in ids),
+    ]}
+
+
+EXECUTE = {'command_text': 'add Hey Jude by The Beatles to fake playlist 0'}
+
+# Budgets are for the default sizes on a developer laptop; scale the
+# latencies for slower CI machines with --latency-scale.
+ENDPOINTS = [
+    Endpoint('api-root', 'get', 2, 50),
+    Endpoint('profile-list', 'get', 5, 50),
+    Endpoint('profile-list', 'post', 3, 50, status=400, data=lambda ctx, i: {'ai_suggestions_enabled': True}),
+    Endpoint('profile-detail', 'get', 4, 50, kwargs=lambda ctx, i: {'pk': ctx.profile_id}),
+    Endpoint('profile-detail', 'put', 5, 50, kwargs=lambda ctx, i: {'pk': ctx.profile_id},
+             data=lambda ctx, i: {'ai_suggestions_enabled': True, 'voice_commands_enabled': True}),
+    Endpoint('profile-detail', 'patch', 5, 50, kwargs=lambda ctx, i: {'pk': ctx.profile_id},
+             data=lambda ctx, i: {'ai_suggestions_enabled': i % 2 == 0}),
+    Endpoint('profile-detail', 'delete', 5, 50, status=204, session='disposable',
+             kwargs=lambda ctx, i: {'pk': ctx.disposable_profile_ids[i]}),
+    Endpoint('profile-me', 'get', 2, 50),
+    Endpoint('profile-update-preferences', 'patch', 5, 50,
+             data=lambda ctx, i: {'ai_suggestions_enabled': i % 2 == 0}),
+    Endpoint('playlist-list', 'get', 5, 400),
+    Endpoint('playlist-list', 'post', 5, 50, status=201, data=lambda ctx, i: {'name': f'{ctx.run} created {i}'}),
+    Endpoint('playlist-detail', 'get', 5, 300, kwargs=_playlist),
+    Endpoint('playlist-detail', 'put', 5, 600, kwargs=_playlist,
+             data=lambda ctx, i: {'name': f'Replaced {i}', 'description': 'Benchmark playlist'}),
+    Endpoint('playlist-detail', 'patch', 5, 600, kwargs=_playlist, data=lambda ctx, i: {'name': f'Renamed {i}'}),
+    Endpoint('playlist-detail', 'delete', 7, 100, status=204,
+             kwargs=lambda ctx, i: {'pk': ctx.disposable_playlist_ids.pop()}),
+    Endpoint('playlist-songs', 'get', 5, 100, kwargs=_playlist),
+    Endpoint('playlist-songs', 'get', 5, 500, kwargs=_playlist, query='page_size=1000'),
+    Endpoint('playlist-add-song', 'post', 10, 80, status=201, kwargs=_playlist, data=_new_track('bench-add-')),
+    Endpoint('playlist-remove-song', 'post', 6, 80, status=204, kwargs=_playlist, data=_new_track('bench-add-')),
+    Endpoint('playlist-batch', 'post', 9, 150, kwargs=_playlist, data=_batch),
+    Endpoint('playlist-get-suggestions', 'get', 4, 150, kwargs=_playlist),
+    Endpoint('playlist-get-suggestions', 'get', 4, 150, kwargs=_playlist, query='mood=chill&metric=weighted'),
+    Endpoint('playlist-sync-from-spotify', 'post', 4, 50, status=202),
+    Endpoint('playlist-spotify-client-stats', 'get', 2, 50),
+    Endpoint('voice-command-list', 'get', 4, 50),
+    Endpoint('voice-command-list', 'post', 2, 50, status=202,
+             data=lambda ctx, i: {'raw_command': f'play song number {i}', 'parsed_action': 'add_track'}),
+    Endpoint('voice-command-detail', 'get', 3, 50, kwargs=lambda ctx, i: {'pk': ctx.voice_command_id}),
+    Endpoint('voice-command-detail', 'put', 4, 50, kwargs=lambda ctx, i: {'pk': ctx.voice_command_id},
+             data=lambda ctx, i: {'raw_command': f'play song number {i}', 'parsed_action': 'add_track'}),
+    Endpoint('voice-command-detail', 'patch', 4, 50, kwargs=lambda ctx, i: {'pk': ctx.voice_command_id},
+             data=lambda ctx, i: {'success': i % 2 == 0}),
+    Endpoint('voice-command-detail', 'delete', 4, 50, status=204,
+             kwargs=lambda ctx, i: {'pk': ctx.disposable_voice_command_ids.pop()}),
+    Endpoint('voice-command-execute', 'post', 7, 200, data=lambda ctx, i: EXECUTE),
+    Endpoint('voice-command-recent', 'get', 3, 50),
+    Endpoint('voice-command-cache-stats', 'get', 2, 50),
+    Endpoint('voice-command-log-writer-stats', 'get', 2, 50),
+    Endpoint('conversation-list', 'get', 4, 50),
+    Endpoint('conversation-list', 'post', 2, 50, status=202,
+             data=lambda ctx, i: {'user_message': f'something like {i}', 'ai_response': 'Try these.'}),
+    Endpoint('conversation-detail', 'get', 3, 50, kwargs=lambda ctx, i: {'pk': ctx.conversation_id}),
+    Endpoint('conversation-detail', 'put', 4, 50, kwargs=lambda ctx, i: {'pk': ctx.conversation_id},
+             data=lambda ctx, i: {'user_message': f'something like {i}', 'ai_response': 'Try these.'}),
+    Endpoint('conversation-detail', 'patch', 4, 50, kwargs=lambda ctx, i: {'pk': ctx.conversation_id},
+             data=lambda ctx, i: {'ai_response': f'Try these {i}.'}),
+    Endpoint('conversation-detail', 'delete', 4, 50, status=204,
+             kwargs=lambda ctx, i: {'pk': ctx.disposable_conversation_ids.pop()}),
+    Endpoint('job-list', 'get', 4, 50),
+    Endpoint('job-detail', 'get', 3, 50, kwargs=lambda ctx, i: {'pk': ctx.job_id}),
+    Endpoint('track-similar', 'get', 3, 50, kwargs=lambda ctx, i: {'spotify_track_id': ctx.spotify_track_id}),
+    Endpoint('analytics-voice-commands', 'get', 3, 50),
+    Endpoint('analytics-voice-commands', 'get', 3, 80, query='days=365'),
+    Endpoint('search-list', 'get', 4, 500, query='q=song%2012&type=track'),
+    Endpoint('search-list', 'get', 4, 80, query='q=playlst%207'),
+    Endpoint('async-playlist-sync', 'post', 4, 300, data=lambda ctx, i: {}),
+    Endpoint('async-playlist-suggestions', 'get', 4, 150, kwargs=_playlist),
+    Endpoint('async-voice-execute', 'post', 7, 200, data=lambda ctx, i: EXECUTE),
+    # Password hashing dominates register and login.
+    Endpoint('register', 'post', 4, 1500, status=201, session='anonymous',
+             data=lambda ctx, i: {'username': f'{ctx.run}-new{i}', 'email': f'{ctx.run}-new{i}@example.com',
+                                  'password': PASSWORD}),
+    Endpoint('login', 'post', 6, 1500, session='anonymous',
+             data=lambda ctx, i: {'email': ctx.email, 'password': PASSWORD}),
+    Endpoint('current_user', 'get', 2, 50),
+    Endpoint('logout', 'post', 4, 50, session='fresh'),
+    Endpoint('token_obtain', 'post', 1, 1500, session='anonymous',
+             data=lambda ctx, i: {'email': ctx.email, 'password': PASSWORD}),
+    Endpoint('token_refresh', 'post', 1, 50, session='anonymous',
+             data=lambda ctx, i: {'refresh': issue_tokens(ctx.user)['refresh']}),
+    # Bearer tokens skip the session and user queries of the same reads above.
+    Endpoint('current_user', 'get', 0, 50, session='token'),
+    Endpoint('profile-me', 'get', 0, 50, session='token'),
+    Endpoint('playlist-list', 'get', 3, 400, session='token'),
+    Endpoint('voice-command-recent', 'get', 1, 50, session='token'),
+    Endpoint('async-playlist-suggestions', 'get', 2, 150, kwargs=_playlist, session='token'),
+    Endpoint('spotify_callback', 'post', 0, 50, session='anonymous'),
+]
+
+
+def view_methods(view):
+    """HTTP methods ``view`` answers, lowercase, leaving out HEAD and OPTIONS."""
+    actions = getattr(view, 'actions', None)
+    cls = getattr(view, 'cls', None)
+    if actions:
+        # A viewset route: method -> action, as the router bound it.
+        methods = set(actions)
+    elif cls is not None:
+        methods = {method for method in cls.http_method_names if hasattr(cls, method)}
+    else:
+        methods = {method.lower() for method in getattr(view, 'allowed_methods', ())}
+    return methods - {'head', 'options'}
+
+
+def route_methods():
+    """``(route name, method)`` for every method of every route in ``URLCONFS``."""
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns)
+            elif pattern.name:
+                for method in view_methods(pattern.callback):
+                    yield pattern.name, method
+    return {route for urlconf in URLCONFS for route in walk(import_module(urlconf).urlpatterns)}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Context:
+    """Ids of the seeded rows that endpoints refer to."""
+
+    def __init__(self, user, playlist_id, disposable):
+        self.run = f'{USER_PREFIX}{int(time.time())}'
+        self.user = user
+        self.email = user.email
+        self.playlist_id = playlist_id
+        # Rows the delete endpoints remove, one per request.
+        self.disposable_playlist_ids = disposable['playlists']
+        self.disposable_voice_command_ids = disposable['voice_commands']
+        self.disposable_conversation_ids = disposable['conversations']
+        self.disposable_users = disposable['users']
+        self.disposable_profile_ids = [
+            UserProfile.objects.get(user=disposable_user).pk for disposable_user in self.disposable_users
+        ]
+        self.profile_id = UserProfile.objects.get(user=user).pk
+        self.voice_command_id = (
+            VoiceCommand.objects.filter(user=user).exclude(pk__in=self.disposable_voice_command_ids)
+            .values_list('pk', flat=True).first()
+        )
+        self.conversation_id = (
+            AIConversation.objects.filter(user=user).exclude(pk__in=self.disposable_conversation_ids)
+            .values_list('pk', flat=True).first()
+        )
+        self.job_id = Job.objects.filter(user=user).values_list('pk', flat=True).first()
+        self.spotify_track_id = (
+            Song.objects.filter(playlist_id=playlist_id).values_list('track__spotify_track_id', flat=True).first()
+        )
+
+
+class Command(BaseCommand):
+    help = 'Check query-count and latency budgets for every API endpoint on seeded data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--playlists', type=int, default=100, help="Playlists owned by the benchmark user.")
+        parser.add_argument('--songs', type=int, default=1000, help='Songs per playlist.')
+        parser.add_argument('--voice-commands', type=int, default=1_000_000,
+                            help='Voice commands spread across all users.')
+        parser.add_argument('--conversations', type=int, default=100_000,
+                            help='AI conversations spread across all users.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per endpoint first.')
+        parser.add_argument('--only', nargs='+', default=None, metavar='URL_NAME',
+                            help='Only run endpoints with these route names.')
+        parser.add_argument('--latency-scale', type=float, default=1.0,
+                            help='Multiply every p95 budget by this; 0 skips latency checks.')
+        parser.add_argument('--baseline', default=None,
+                            help='An earlier --output report to compare query counts and p95s against.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='p95 growth over the baseline allowed before failing (0.25 = 25%%).')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file.')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Reuse an already seeded benchmark database.')
+        parser.add_argument('--json', action='store_true', help='Print a JSON report.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['playlists'] < 2 or options['songs'] < 1:
+            raise CommandError('--repeat and --songs must be positive and --playlists at least 2')
+        endpoints = ENDPOINTS
+        if options['only']:
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint.url_name in options['only']]
+        covered = {(endpoint.url_name, endpoint.method) for endpoint in ENDPOINTS}
+        uncovered = sorted(f'{method.upper()} {name}' for name, method in route_methods() - covered)
+
+        fake = FakeSpotify(playlists=2, tracks_per_playlist=50, latency=0)
+        with tempfile.TemporaryDirectory() as ann_dir:
+            overrides = override_settings(
+                ALLOWED_HOSTS=['testserver'],
+                PERF_INSTRUMENTATION_ENABLED=True,
+                PERF_SERVER_TIMING=True,
+                PERF_SLOW_REQUEST_MS=10 ** 9,
+                SPOTIFY_API_URL=fake.api_url,
+                SPOTIFY_TOKEN_URL=fake.token_url,
+                ANN_INDEX_DIR=ann_dir,
+            )
+            with benchmark_database(keepdb=options['keepdb'], on_disk=True), fake, overrides:
+                get_client_pool().clear()
+                ctx = self.seed(options)
+                results = {endpoint.name: self.measure(endpoint, ctx, options) for endpoint in endpoints}
+                get_client_pool().clear()
+                get_log_writer().flush()
+
+        report = {
+            'sizes': {key: options[key] for key in ('users', 'playlists', 'songs', 'voice_commands', 'conversations')},
+            'repeat': options['repeat'],
+            'latency_scale': options['latency_scale'],
+            'uncovered_routes': uncovered,
+            'endpoints': results,
+        }
+        if options['baseline']:
+            self.compare(report, options['baseline'], options['tolerance'])
+        failures = [f'{name}: {failure}' for name, row in results.items() for failure in row['failures']]
+        failures += [f'{name}: no endpoint budget' for name in uncovered]
+        report['passed'] = not failures
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            for name, row in results.items():
+                marker = 'ok' if not row['failures'] else 'FAIL'
+                queries = '?' if row['queries'] is None else row['queries']
+                self.stdout.write(
+                    f"{name:<56} {queries:>3}/{row['max_queries']:<3} queries  "
+                    f"p50 {row['p50_ms']:>7.1f} ms  p95 {row['p95_ms']:>7.1f} ms  [{marker}]"
+                )
+        if failures:
+            raise CommandError('Budget failures:\n  ' + '\n  '.join(failures))
+
+    def seed(self, options):
+        """The benchmark user, connected to the fake Spotify, and their library."""
+        if not UserProfile.objects.filter(user__username=f'{USER_PREFIX}0').exists():
+            started = time.perf_counter()
+            users = create_users(options['users'], prefix=USER_PREFIX, password=PASSWORD)
+            user = users[0]
+            create_playlists(user, options['playlists'], songs_per_playlist=options['songs'])
+            create_voice_commands(users, options['voice_commands'])
+            create_conversations(users, options['conversations'])
+            UserProfile.objects.filter(user=user).update(
+                spotify_access_token=f'{USER_PREFIX}-token',
+                spotify_refresh_token='unused',
+                spotify_token_expires_at=timezone.now() + timedelta(days=365),
+            )
+            SpotifySyncEngine(user, get_spotify_client(UserProfile.objects.get(user=user))).run()
+            roll_up_voice_commands()
+            if not options['json']:
+                self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+        user = UserProfile.objects.select_related('user').get(user__username=f'{USER_PREFIX}0').user
+        user.is_staff = True
+        user.save(update_fields=['is_staff'])
+        build_index()
+
+        playlist_id = Playlist.objects.filter(user=user, songs__isnull=False).values_list('pk', flat=True).first()
+        requests = range(options['warmup'] + options['repeat'])
+        disposable = {
+            'playlists': [
+                Playlist.objects.create(user=user, spotify_playlist_id=f'{USER_PREFIX}-disposable-{time.time_ns()}',
+                                        name=f'Disposable {i}').pk
+                for i in requests
+            ],
+            'voice_commands': [
+                VoiceCommand.objects.create(user=user, raw_command=f'disposable {i}').pk for i in requests
+            ],
+            'conversations': [
+                AIConversation.objects.create(user=user, user_message=f'disposable {i}', ai_response='Gone.').pk
+                for i in requests
+            ],
+            'users': create_users(len(requests), prefix=f'disposable{time.time_ns()}-', password=PASSWORD),
+        }
+        if not Job.objects.filter(user=user).exists():
+            Job.objects.create(user=user, task='spotify.sync_library')
+        return Context(user, playlist_id, disposable)
+
+    def client(self, endpoint, ctx, i=0):
+        if endpoint.session == 'token':
+            return Client(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(ctx.user)['access']}")
+        client = Client()
+        if endpoint.session == 'disposable':
+            client.force_login(ctx.disposable_users[i])
+        elif endpoint.session != 'anonymous':
+            client.force_login(ctx.user)
+        return client
+
+    def measure(self, endpoint, ctx, options):
+        client = self.client(endpoint, ctx)
+        timings, queries, statuses = [], [], set()
+        for i in range(options['warmup'] + options['repeat']):
+            if endpoint.session in ('fresh', 'disposable'):
+                client = self.client(endpoint, ctx, i)
+            path = reverse(endpoint.url_name, kwargs=endpoint.kwargs(ctx, i) if endpoint.kwargs else None)
+            if endpoint.query:
+                path = f'{path}?{endpoint.query}'
+            kwargs = {}
+            if endpoint.data is not None:
+                kwargs = {'data': json.dumps(endpoint.data(ctx, i)), 'content_type': 'application/json'}
+            started = time.perf_counter()
+            response = getattr(client, endpoint.method)(path, **kwargs)
+            elapsed = (time.perf_counter() - started) * 1000
+            if i < options['warmup']:
+                continue
+            timings.append(elapsed)
+            statuses.add(response.status_code)
+            match = QUERY_COUNT.search(response.get('Server-Timing', ''))
+            if match:
+                queries.append(int(match.group(1)))
+
+        p95 = percentile(timings, 95)
+        budget = endpoint.p95_ms * options['latency_scale']
+        failures = []
+        if statuses != {endpoint.status}:
+            failures.append(f'status {sorted(statuses)}, expected {endpoint.status}')
+        if len(queries) < len(timings):
+            # An uncounted response must not pass the query budget.
+            failures.append(f'{len(timings) - len(queries)} responses without a Server-Timing query count')
+        if queries and max(queries) > endpoint.max_queries:
+            failures.append(f'{max(queries)} queries, budget {endpoint.max_queries}')
+        if budget and p95 > budget:
+            failures.append(f'p95 {p95:.1f} ms, budget {budget:.0f} ms')
+        return {
+            'method': endpoint.method.upper(),
+            'url_name': endpoint.url_name,
+            'status': sorted(statuses),
+            'queries': max(queries, default=None),
+            'max_queries': endpoint.max_queries,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(p95, 2),
+            'p95_budget_ms': round(budget, 1),
+            'failures': failures,
+        }
+
+    def compare(self, report, path, tolerance):
+        """Add failures for query counts above, or p95s well above, the baseline report."""
+        try:
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)['endpoints']
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Cannot read baseline {path}: {exc}')
+        for name, row in report['endpoints'].items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            row['baseline'] = {'queries': before['queries'], 'p95_ms': before['p95_ms']}
+            if None not in (row['queries'], before['queries']) and row['queries'] > before['queries']:
+                row['failures'].append(f"{row['queries']} queries, baseline {before['queries']}")
+            limit = max(before['p95_ms'] * (1 + tolerance), before['p95_ms'] + MIN_REGRESSION_MS)
+            if report['latency_scale'] and row['p95_ms'] > limit:
+                row['failures'].append(f"p95 {row['p95_ms']:.1f} ms, baseline {before['p95_ms']:.1f} ms")
@@ -0,0 +1,203 @@
+"""
+Load-test the async (ASGI) views against their sync (WSGI) counterparts.
+
+Both paths are driven in-process against a fake Spotify API with a fixed
+per-request latency by ``--concurrency`` simulated clients, each sending its
+share of ``--requests`` back to back as its own user: one thread per client
+for WSGI, as a threaded WSGI server would run them, and one task per client on
+a single event loop for ASGI.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.core.benchmarks.database import benchmark_database
+from apps.core.benchmarks.factories import create_users
+from apps.core.benchmarks.fake_spotify import FakeSpotify
+from apps.core.logbuffer import get_log_writer
+from apps.core.models import Playlist, Track, UserProfile
+from apps.core.spotify.client import get_spotify_client
+from apps.core.spotify.pool import get_client_pool
+from apps.core.spotify.sync import SpotifySyncEngine
+
+USER_PREFIX = 'asyncbench'
+
+# endpoint -> (method, WSGI path, ASGI path, body); paths take the playlist id.
+ENDPOINTS = {
+    'sync': ('post', '/api/playlists/sync_from_spotify/', '/api/async/playlists/sync/', {'force': True}),
+    'suggestions': (
+        'get', '/api/playlists/{playlist}/get_suggestions/', '/api/async/playlists/{playlist}/suggestions/', None
+    ),
+    'execute': (
+        'post', '/api/voice-commands/execute/', '/api/async/voice/execute/',
+        {'command_text': 'add Hey Jude by The Beatles to fake playlist 0'},
+    ),
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def failed(response):
+    # The WSGI sync endpoint answers 202 even when its inline job failed.
+    if response.status_code >= 400:
+        return True
+    return response.status_code == 202 and response.json().get('status') != 'succeeded'
+
+
+def summarize(timings, errors, elapsed):
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(timings) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(timings), 1) if timings else 0.0,
+        'p95_ms': round(percentile(timings, 95), 1) if timings else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent-request throughput of the async views with the WSGI views.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='sync')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--latency-ms', type=float, default=50.0,
+                            help='Simulated Spotify round-trip time per upstream request.')
+        parser.add_argument('--playlists', type=int, default=10,
+                            help='Playlists in each fake Spotify library.')
+        parser.add_argument('--tracks', type=int, default=100, help='Tracks per fake playlist.')
+        parser.add_argument('--json', action='store_true', help='Print a JSON report.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive')
+
+        fake = FakeSpotify(options['playlists'], options['tracks'], options['latency_ms'] / 1000)
+        overrides = override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            SPOTIFY_API_URL=fake.api_url,
+            SPOTIFY_TOKEN_URL=fake.token_url,
+            # Run the WSGI sync job inline, as the async view does.
+            JOB_QUEUE_BACKEND='apps.jobs.backends.ImmediateBackend',
+            ANN_AUTO_UPDATE=False,
+            SPOTIFY_CLIENT_ID='',
+            SPOTIFY_CLIENT_SECRET='',
+        )
+        with benchmark_database(on_disk=True), fake, overrides:
+            get_client_pool().clear()
+            users = self.seed(options['concurrency'])
+            report = {'endpoint': options['endpoint'], 'concurrency': options['concurrency'],
+                      'latency_ms': options['latency_ms']}
+            for mode, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+                before = fake.requests
+                report[mode] = run(users, options)
+                report[mode]['upstream_requests'] = fake.requests - before
+            get_client_pool().clear()
+            # Write queued log rows while their users still exist.
+            get_log_writer().flush()
+
+        report['speedup'] = round(
+            report['asgi']['throughput_rps'] / report['wsgi']['throughput_rps'], 2
+        ) if report['wsgi']['throughput_rps'] else None
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"{options['requests']} x {report['endpoint']} at concurrency {options['concurrency']}, "
+            f"{options['latency_ms']:.0f} ms upstream latency"
+        )
+        for mode in ('wsgi', 'asgi'):
+            row = report[mode]
+            self.stdout.write(
+                f"{mode.upper()}: {row['throughput_rps']:>7.1f} req/s, mean {row['mean_ms']:.1f} ms, "
+                f"p95 {row['p95_ms']:.1f} ms, {row['errors']} errors, {row['upstream_requests']} upstream calls"
+            )
+        self.stdout.write(f"ASGI/WSGI throughput: {report['speedup']}x")
+
+    def seed(self, count):
+        """Users with connected (fake) Spotify accounts and an initial sync."""
+        users = create_users(count, prefix=USER_PREFIX)
+        expires_at = timezone.now() + timedelta(days=1)
+        for user in users:
+            UserProfile.objects.filter(user=user).update(
+                spotify_access_token=f'{USER_PREFIX}-token-{user.pk}',
+                spotify_refresh_token='unused',
+                spotify_token_expires_at=expires_at,
+            )
+            client = get_spotify_client(UserProfile.objects.get(user=user))
+            SpotifySyncEngine(user, client).run()
+        # Give every track features so suggestions have something to rank.
+        Track.objects.update(energy=0.5, danceability=0.5, valence=0.5, tempo=120.0)
+        playlists = dict(Playlist.objects.order_by('user_id', 'id').values_list('user_id', 'id'))
+        return [(user, playlists[user.pk]) for user in users]
+
+    def _request_args(self, path, playlist_id, body):
+        path = path.format(playlist=playlist_id)
+        if body is None:
+            return path, {}
+        return path, {'data': json.dumps(body), 'content_type': 'application/json'}
+
+    def _share(self, options, client_index):
+        """Requests issued one after another by simulated client ``client_index``."""
+        return range(client_index, options['requests'], options['concurrency'])
+
+    def run_wsgi(self, users, options):
+        method, path, _, body = ENDPOINTS[options['endpoint']]
+
+        def client_loop(client_index):
+            user, playlist_id = users[client_index]
+            client = Client()
+            client.force_login(user)
+            url, kwargs = self._request_args(path, playlist_id, body)
+            results = []
+            for _ in self._share(options, client_index):
+                started = time.perf_counter()
+                response = getattr(client, method)(url, **kwargs)
+                results.append(((time.perf_counter() - started) * 1000, failed(response)))
+            return results
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = [row for rows in pool.map(client_loop, range(options['concurrency'])) for row in rows]
+        elapsed = time.perf_counter() - started
+        return summarize([ms for ms, error in results], sum(error for ms, error in results), elapsed)
+
+    def run_asgi(self, users, options):
+        method, _, path, body = ENDPOINTS[options['endpoint']]
+        clients = []
+        for user, playlist_id in users:
+            login = Client()
+            login.force_login(user)
+            client = AsyncClient()
+            client.cookies = login.cookies
+            clients.append((client, self._request_args(path, playlist_id, body)))
+
+        async def client_loop(client_index):
+            client, (url, kwargs) = clients[client_index]
+            results = []
+            for _ in self._share(options, client_index):
+                started = time.perf_counter()
+                response = await getattr(client, method)(url, **kwargs)
+                results.append(((time.perf_counter() - started) * 1000, failed(response)))
+            return results
+
+        async def main():
+            return await asyncio.gather(*(client_loop(index) for index in range(options['concurrency'])))
+
+        started = time.perf_counter()
+        results = [row for rows in asyncio.run(main()) for row in rows]
+        elapsed = time.perf_counter() - started
+        return summarize([ms for ms, error in results], sum(error for ms, error in results), elapsed)
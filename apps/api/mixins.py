@@ -0,0 +1,104 @@
+"""
+Reusable viewset mixins.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from apps.core.db_router import use_read_replica
+from apps.core.logbuffer import write_log
+
+
+class ReadReplicaMixin:
+    """
+    Serve the actions listed in ``replica_actions`` from the read replica.
+
+    Replicas can lag the primary slightly, so only list actions whose callers
+    tolerate briefly stale data.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_context = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_context is not None:
+                self._replica_context.__exit__(None, None, None)
+
+    def initial(self, request, *args, **kwargs):
+        # Authenticate against the primary: a session or user created moments
+        # ago may not have reached the replica yet.
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and request.method in SAFE_METHODS:
+            self._replica_context = use_read_replica()
+            self._replica_context.__enter__()
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for read actions.
+
+    Views implement ``get_cache_validators()`` returning ``(state, last_modified)``,
+    where ``state`` is any cheap-to-compute value that changes whenever the
+    response would, and call ``not_modified_response(request)`` at the start of
+    each conditional action.
+    """
+
+    def get_cache_validators(self):
+        raise NotImplementedError
+
+    def not_modified_response(self, request):
+        """Return a 304 response if the client's copy is current, else ``None``."""
+        state, last_modified = self.get_cache_validators()
+        digest = hashlib.md5(
+            repr((request.get_full_path(), request.META.get('HTTP_ACCEPT'), state)).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        self._etag = quote_etag(digest)
+        self._last_modified = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(
+            request, etag=self._etag, last_modified=self._last_modified
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, '_etag', None)
+        if etag and response.status_code in (200, 304):
+            response['ETag'] = etag
+            if self._last_modified is not None:
+                response['Last-Modified'] = http_date(self._last_modified)
+            # Responses are per user; keep shared caches from serving them.
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class BufferedCreateMixin:
+    """
+    ``create`` for append-only log models that queues the row instead of inserting it.
+
+    The row goes to the batched log writer, so the response is ``202 Accepted``
+    and its ``id`` is null. Views that set extra fields call
+    ``queue_row(serializer, **fields)`` from ``perform_create``.
+    """
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        # With LOG_BUFFER_ENABLED off the row was saved inline.
+        code = status.HTTP_201_CREATED if serializer.instance.pk else status.HTTP_202_ACCEPTED
+        return Response(serializer.data, status=code)
+
+    def perform_create(self, serializer):
+        self.queue_row(serializer, user=self.request.user)
+
+    def queue_row(self, serializer, **fields):
+        model = serializer.Meta.model
+        serializer.instance = model(**{**serializer.validated_data, **fields})
+        write_log(serializer.instance)
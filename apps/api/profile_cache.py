@@ -0,0 +1,37 @@
+"""
+Per-user cache of the serialized ``{user, profile}`` payload.
+
+Served by ``/api/profile/me/``, ``/api/auth/me/`` and login. Entries are
+dropped by the signal handlers in ``apps.api.signals`` whenever the user or
+profile row changes.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.models import UserProfile
+from .serializers import UserProfileSerializer, UserSerializer
+
+KEY_PREFIX = 'profile-payload:v1'
+
+
+def profile_cache_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def get_profile_payload(user):
+    """Return ``{'user': ..., 'profile': ...}`` for ``user``, cached per user."""
+    key = profile_cache_key(user.pk)
+    payload = cache.get(key)
+    if payload is None:
+        profile, created = UserProfile.objects.get_or_create(user=user)
+        payload = {
+            'user': dict(UserSerializer(user).data),
+            'profile': dict(UserProfileSerializer(profile).data),
+        }
+        cache.set(key, payload, settings.PROFILE_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate_profile_payload(user_id):
+    cache.delete(profile_cache_key(user_id))
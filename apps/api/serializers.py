@@ -3,18 +3,31 @@ Serializers for API endpoints.
 """
 
 from rest_framework import serializers
+from apps.core.instrumentation import timed_serialization
 from apps.core.models import UserProfile, Playlist, Song, VoiceCommand, AIConversation
+from apps.jobs.models import Job
 from django.contrib.auth.models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """Counts ``to_representation`` under the request's ``serialize`` timing.
+
+    Lists are timed item by item through their child serializer.
+    """
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name')
         read_only_fields = ('id',)
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -24,16 +37,49 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at', 'spotify_user_id')
 
 
-class SongSerializer(serializers.ModelSerializer):
+class SongSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Playlist membership flattened with its catalog track, as before the Track split."""
+    spotify_track_id = serializers.ReadOnlyField(source='track.spotify_track_id')
+    name = serializers.ReadOnlyField(source='track.name')
+    artist = serializers.ReadOnlyField(source='track.artist')
+    album = serializers.ReadOnlyField(source='track.album')
+    image_url = serializers.ReadOnlyField(source='track.image_url')
+    duration_ms = serializers.ReadOnlyField(source='track.duration_ms')
+    popularity = serializers.ReadOnlyField(source='track.popularity')
+    energy = serializers.ReadOnlyField(source='track.energy')
+    danceability = serializers.ReadOnlyField(source='track.danceability')
+    valence = serializers.ReadOnlyField(source='track.valence')
+    tempo = serializers.ReadOnlyField(source='track.tempo')
+    
     class Meta:
         model = Song
         fields = ('id', 'spotify_track_id', 'name', 'artist', 'album', 'image_url',
                   'duration_ms', 'popularity', 'energy', 'danceability', 'valence',
-                  'tempo', 'added_at')
-        read_only_fields = ('id', 'added_at')
+                  'tempo', 'position', 'added_at')
+        read_only_fields = ('id', 'position', 'added_at')
+
+
+class SongOperationSerializer(serializers.Serializer):
+    """One add, remove or move operation in a batch request."""
+    op = serializers.ChoiceField(choices=('add', 'remove', 'move'))
+    spotify_track_id = serializers.CharField(max_length=255)
+    name = serializers.CharField(max_length=255, required=False)
+    artist = serializers.CharField(max_length=255, required=False)
+    album = serializers.CharField(max_length=255, required=False, allow_null=True, allow_blank=True)
+    image_url = serializers.URLField(required=False, allow_null=True, allow_blank=True)
+    duration_ms = serializers.IntegerField(required=False, min_value=0)
+    popularity = serializers.IntegerField(required=False, min_value=0, max_value=100)
+    position = serializers.IntegerField(required=False, min_value=0)
+    
+    def validate(self, attrs):
+        if attrs['op'] == 'add' and not all([attrs.get('name'), attrs.get('artist')]):
+            raise serializers.ValidationError('add requires name and artist')
+        if attrs['op'] == 'move' and 'position' not in attrs:
+            raise serializers.ValidationError('move requires position')
+        return attrs
 
 
-class PlaylistSerializer(serializers.ModelSerializer):
+class PlaylistSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     songs = SongSerializer(many=True, read_only=True)
     song_count = serializers.SerializerMethodField()
     
@@ -45,28 +91,46 @@ class PlaylistSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'spotify_playlist_id', 'created_at', 'updated_at', 'synced_at')
     
     def get_song_count(self, obj):
-        return obj.songs.count()
+        # Prefer the count annotated by PlaylistViewSet.get_queryset; the nested
+        # songs are loaded anyway, so fall back to them instead of a COUNT query.
+        song_count = getattr(obj, 'song_count', None)
+        if song_count is not None:
+            return song_count
+        return len(obj.songs.all())
 
 
-class PlaylistDetailSerializer(serializers.ModelSerializer):
+class PlaylistDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Detailed playlist serializer without nested songs."""
+    song_count = serializers.IntegerField(read_only=True, default=0)
+    
     class Meta:
         model = Playlist
         fields = ('id', 'spotify_playlist_id', 'name', 'description', 'image_url',
-                  'is_public', 'total_tracks', 'created_at', 'updated_at', 'synced_at')
+                  'is_public', 'total_tracks', 'song_count', 'created_at', 'updated_at',
+                  'synced_at')
         read_only_fields = ('id', 'spotify_playlist_id', 'created_at', 'updated_at', 'synced_at')
 
 
-class VoiceCommandSerializer(serializers.ModelSerializer):
+class VoiceCommandSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = VoiceCommand
-        fields = ('id', 'raw_command', 'parsed_action', 'success', 'error_message', 'created_at')
-        read_only_fields = ('id', 'created_at')
+        fields = ('id', 'raw_command', 'parsed_action', 'success', 'error_message',
+                  'parse_source', 'parse_latency_ms', 'stage_timings', 'created_at')
+        read_only_fields = ('id', 'parse_source', 'parse_latency_ms', 'stage_timings', 'created_at')
+        extra_kwargs = {'parsed_action': {'required': False}}
 
 
-class AIConversationSerializer(serializers.ModelSerializer):
+class AIConversationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = AIConversation
         fields = ('id', 'user_message', 'ai_response', 'created_at')
         read_only_fields = ('id', 'created_at')
 
+
+class JobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ('id', 'task', 'status', 'progress', 'progress_message', 'attempts',
+                  'max_attempts', 'result', 'error_message', 'created_at', 'started_at',
+                  'finished_at')
+        read_only_fields = fields
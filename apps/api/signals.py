@@ -0,0 +1,36 @@
+"""
+Signal handlers keeping API caches consistent with the database.
+"""
+
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.models import UserProfile
+from .profile_cache import invalidate_profile_payload
+
+
+@receiver(post_save, sender=User, dispatch_uid='api.user_saved')
+@receiver(post_delete, sender=User, dispatch_uid='api.user_deleted')
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which is not part of the payload.
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    _invalidate(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile, dispatch_uid='api.profile_saved')
+@receiver(post_delete, sender=UserProfile, dispatch_uid='api.profile_deleted')
+def profile_changed(sender, instance, **kwargs):
+    _invalidate(instance.user_id)
+
+
+def _invalidate(user_id):
+    invalidate_profile_payload(user_id)
+    # Until the writer commits, a concurrent read can still see the old row
+    # and cache it again, so drop the entry once more when the new row is
+    # visible. Outside a transaction this runs immediately.
+    transaction.on_commit(partial(invalidate_profile_payload, user_id))
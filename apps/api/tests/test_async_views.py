@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+
+from apps.auth_app.tokens import issue_tokens
+from apps.core.benchmarks.fake_spotify import FakeSpotify
+from apps.core.models import Playlist, UserProfile
+from apps.core.spotify.pool import get_client_pool
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('async', 'async@example.com', 'password')
+        self.playlist = Playlist.objects.create(user=self.user, spotify_playlist_id='async-test', name='Async')
+        self.bearer = {'Authorization': f"Bearer {issue_tokens(self.user)['access']}"}
+        self.session_client = AsyncClient(enforce_csrf_checks=True)
+        self.session_client.force_login(self.user)
+
+    def suggestions_url(self, pk):
+        return f'/api/async/playlists/{pk}/suggestions/'
+
+    async def test_bearer_token(self):
+        response = await self.async_client.get(self.suggestions_url(0), headers=self.bearer)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_session(self):
+        response = await self.session_client.get(self.suggestions_url(0))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_session_post_without_csrf_token_is_rejected(self):
+        response = await self.session_client.post('/api/async/voice/execute/', {'command_text': 'play'},
+                                                  content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF Failed', response.json()['detail'])
+
+    async def test_bearer_post_needs_no_csrf_token(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        response = await client.post('/api/async/voice/execute/', {}, content_type='application/json',
+                                     headers=self.bearer)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_unauthenticated(self):
+        for headers in ({}, {'Authorization': 'Bearer not-a-token'}):
+            with self.subTest(headers=headers):
+                response = await self.async_client.get(self.suggestions_url(self.playlist.pk), headers=headers)
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+    async def test_method_not_allowed(self):
+        response = await self.async_client.get('/api/async/playlists/sync/', headers=self.bearer)
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.json(), {'detail': 'Method "GET" not allowed.'})
+
+    async def test_suggestions_for_another_users_playlist(self):
+        other = await User.objects.acreate(username='other', email='other@example.com')
+        playlist = await Playlist.objects.acreate(user=other, spotify_playlist_id='not-yours', name='Theirs')
+
+        response = await self.async_client.get(self.suggestions_url(playlist.pk), headers=self.bearer)
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_suggestions_reject_unknown_metric(self):
+        response = await self.async_client.get(f'{self.suggestions_url(self.playlist.pk)}?metric=manhattan',
+                                               headers=self.bearer)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('metric must be one of', response.json()['error'])
+
+
+class AsyncSyncFromSpotifyTests(TestCase):
+    def setUp(self):
+        self.fake = FakeSpotify(playlists=2, tracks_per_playlist=5, latency=0)
+        self.fake.__enter__()
+        self.addCleanup(self.fake.__exit__, None, None, None)
+        settings = override_settings(SPOTIFY_API_URL=self.fake.api_url, SPOTIFY_TOKEN_URL=self.fake.token_url)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Pooled clients keep the API URL they were created with.
+        get_client_pool().clear()
+        self.addCleanup(get_client_pool().clear)
+        self.user = User.objects.create_user('syncer', 'syncer@example.com', 'password')
+        self.bearer = {'Authorization': f"Bearer {issue_tokens(self.user)['access']}"}
+
+    async def test_syncs_playlists(self):
+        await UserProfile.objects.acreate(
+            user=self.user, spotify_access_token='user-token', spotify_refresh_token='refresh-token',
+            spotify_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+        with self.assertLogs('apps.core.spotify.sync', 'INFO'):
+            response = await self.async_client.post('/api/async/playlists/sync/', {},
+                                                    content_type='application/json', headers=self.bearer)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['playlists_created'], response.json()['songs_added']), (2, 10))
+        self.assertEqual(await Playlist.objects.filter(user=self.user).acount(), 2)
+
+    async def test_not_connected(self):
+        response = await self.async_client.post('/api/async/playlists/sync/', {},
+                                                content_type='application/json', headers=self.bearer)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(await UserProfile.objects.filter(user=self.user).acount(), 1)
+
+    async def test_rejects_non_object_body(self):
+        response = await self.async_client.post('/api/async/playlists/sync/', '[]',
+                                                content_type='application/json', headers=self.bearer)
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,17 @@
+from django.test import SimpleTestCase, override_settings
+
+from apps.api.management.commands.benchmark_api import ENDPOINTS, Command, Endpoint, route_methods
+
+
+class BenchmarkApiTests(SimpleTestCase):
+    def test_every_route_method_has_a_budget(self):
+        covered = {(endpoint.url_name, endpoint.method) for endpoint in ENDPOINTS}
+        self.assertEqual(route_methods() - covered, set())
+        self.assertIn(('playlist-detail', 'put'), route_methods())
+
+    @override_settings(PERF_INSTRUMENTATION_ENABLED=True, PERF_SERVER_TIMING=False)
+    def test_missing_server_timing_fails(self):
+        endpoint = Endpoint('spotify_callback', 'post', 0, 0, session='anonymous')
+        row = Command().measure(endpoint, None, {'warmup': 0, 'repeat': 2, 'latency_scale': 1.0})
+        self.assertIsNone(row['queries'])
+        self.assertEqual(row['failures'], ['2 responses without a Server-Timing query count'])
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from apps.core.catalog import upsert_tracks
+from apps.core.models import Playlist, Song, Track
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('etag', 'etag@example.com', 'password')
+        self.playlist = Playlist.objects.create(user=self.user, spotify_playlist_id='etag-test', name='Cached')
+        pks = upsert_tracks({f'track{i}': {'name': f'Track {i}', 'artist': 'Artist'} for i in range(3)})
+        Song.objects.bulk_create(Song(playlist=self.playlist, track_id=pk, position=i) for i, pk in enumerate(pks.values()))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.paths = [
+            '/api/playlists/',
+            f'/api/playlists/{self.playlist.pk}/',
+            f'/api/playlists/{self.playlist.pk}/songs/',
+        ]
+
+    def test_responses_carry_validators(self):
+        for path in self.paths:
+            with self.subTest(path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('"'))
+                self.assertIn('Last-Modified', response)
+                self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_if_none_match_returns_304(self):
+        for path in self.paths:
+            with self.subTest(path):
+                etag = self.client.get(path)['ETag']
+                response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(response.content, b'')
+
+    def test_if_modified_since_returns_304(self):
+        for path in self.paths:
+            with self.subTest(path):
+                last_modified = self.client.get(path)['Last-Modified']
+                self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+                earlier = http_date((timezone.now() - timedelta(days=1)).timestamp())
+                self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=earlier).status_code, 200)
+
+    def test_validators_change_after_song_edits(self):
+        path = f'/api/playlists/{self.playlist.pk}/songs/'
+        etags = [self.client.get(path)['ETag']]
+
+        self.client.post(f'/api/playlists/{self.playlist.pk}/add_song/',
+                         {'spotify_track_id': 'new', 'name': 'New', 'artist': 'Artist'}, format='json')
+        etags.append(self.client.get(path)['ETag'])
+        self.client.post(f'/api/playlists/{self.playlist.pk}/batch/', {'operations': [
+            {'op': 'move', 'spotify_track_id': 'new', 'position': 0},
+        ]}, format='json')
+        etags.append(self.client.get(path)['ETag'])
+        Track.objects.filter(spotify_track_id='track1').update(
+            name='Renamed', updated_at=timezone.now() + timedelta(seconds=5)
+        )
+        etags.append(self.client.get(path)['ETag'])
+
+        self.assertEqual(len(set(etags)), 4)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etags[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], etags[-1])
+
+    def test_etag_from_another_user_does_not_match(self):
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user('other', 'other@example.com', 'password'))
+        etag = self.client.get(self.paths[0])['ETag']
+
+        self.assertEqual(other.get(self.paths[0], HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,26 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.models import UserProfile
+
+
+class CreateRouteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('creator', 'creator@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_local_playlists_get_distinct_ids(self):
+        ids = {self.client.post('/api/playlists/', {'name': name}, format='json').data['spotify_playlist_id']
+               for name in ('One', 'Two')}
+        self.assertEqual(len(ids), 2)
+        self.assertTrue(all(playlist_id.startswith('local-') for playlist_id in ids))
+
+    def test_profile_is_created_once(self):
+        response = self.client.post('/api/profile/', {'ai_suggestions_enabled': False}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(UserProfile.objects.get(user=self.user).ai_suggestions_enabled)
+
+        response = self.client.post('/api/profile/', {}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core.catalog import upsert_tracks
+from apps.core.models import Playlist, Song
+
+
+class PlaylistListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lister', 'lister@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.track_pks = list(upsert_tracks(
+            {f'track{i}': {'name': f'Track {i}', 'artist': 'Artist'} for i in range(5)}
+        ).values())
+
+    def make_playlist(self, name, songs):
+        playlist = Playlist.objects.create(user=self.user, spotify_playlist_id=f'list-{name}', name=name)
+        Song.objects.bulk_create(
+            Song(playlist=playlist, track_id=pk, position=i) for i, pk in enumerate(self.track_pks[:songs])
+        )
+        return playlist
+
+    def list_playlists(self):
+        response = self.client.get('/api/playlists/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_song_count_is_annotated_without_nested_songs(self):
+        self.make_playlist('empty', 0)
+        self.make_playlist('pair', 2)
+        self.make_playlist('full', 5)
+
+        results = self.list_playlists()
+
+        self.assertEqual({playlist['name']: playlist['song_count'] for playlist in results},
+                         {'empty': 0, 'pair': 2, 'full': 5})
+        self.assertTrue(all('songs' not in playlist for playlist in results))
+
+    def test_query_count_does_not_grow_with_playlists(self):
+        self.make_playlist('first', 5)
+        with CaptureQueriesContext(connection) as few:
+            self.list_playlists()
+
+        for i in range(5):
+            self.make_playlist(f'more{i}', 3)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(len(self.list_playlists()), 6)
+
+        # Validators, page count and the annotated page itself.
+        self.assertEqual(len(few), 3)
+        self.assertEqual(len(many), len(few))
@@ -0,0 +1,90 @@
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.catalog import upsert_tracks
+from apps.core.models import Playlist, Song
+
+number_positions = import_module('apps.core.migrations.0014_song_position_order').number_positions
+
+
+class PlaylistSongOrderTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lister', 'lister@example.com', 'password')
+        self.playlist = Playlist.objects.create(user=self.user, spotify_playlist_id='order-test', name='Order')
+        self.track_ids = [f'track{i}' for i in range(5)]
+        pks = upsert_tracks({track_id: {'name': track_id, 'artist': 'Artist'} for track_id in self.track_ids})
+        Song.objects.bulk_create(
+            Song(playlist=self.playlist, track_id=pks[track_id], position=i) for i, track_id in enumerate(self.track_ids)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def song_ids(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [song['spotify_track_id'] for song in response.json()['results']]
+
+    def test_move_changes_songs_and_detail_order(self):
+        response = self.client.post(f'/api/playlists/{self.playlist.pk}/batch/', {'operations': [
+            {'op': 'move', 'spotify_track_id': 'track4', 'position': 0},
+            {'op': 'move', 'spotify_track_id': 'track0', 'position': 2},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        expected = ['track4', 'track1', 'track0', 'track2', 'track3']
+        self.assertEqual(self.song_ids(f'/api/playlists/{self.playlist.pk}/songs/'), expected)
+        detail = self.client.get(f'/api/playlists/{self.playlist.pk}/').json()
+        self.assertEqual([song['spotify_track_id'] for song in detail['songs']], expected)
+
+    def test_cursor_pages_follow_position_order(self):
+        Song.objects.filter(playlist=self.playlist, track__spotify_track_id='track0').update(position=10)
+
+        first = self.client.get(f'/api/playlists/{self.playlist.pk}/songs/?page_size=2').json()
+        seen = [song['spotify_track_id'] for song in first['results']]
+        next_url = first['next']
+        while next_url:
+            page = self.client.get(next_url).json()
+            seen += [song['spotify_track_id'] for song in page['results']]
+            next_url = page['next']
+
+        self.assertEqual(seen, ['track1', 'track2', 'track3', 'track4', 'track0'])
+
+    def test_add_song_appends_to_the_end(self):
+        response = self.client.post(f'/api/playlists/{self.playlist.pk}/add_song/',
+                                    {'spotify_track_id': 'new', 'name': 'New', 'artist': 'Artist'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.song_ids(f'/api/playlists/{self.playlist.pk}/songs/')[-1], 'new')
+
+    def test_add_song_returns_existing_membership(self):
+        response = self.client.post(f'/api/playlists/{self.playlist.pk}/add_song/',
+                                    {'spotify_track_id': 'track2', 'name': 'Other', 'artist': 'Artist'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['spotify_track_id'], response.json()['position']), ('track2', 2))
+        self.assertEqual(Song.objects.filter(playlist=self.playlist).count(), 5)
+
+    def test_remove_then_add_in_one_batch_moves_song_to_the_end(self):
+        for extra in ([], [{'op': 'move', 'spotify_track_id': 'track4', 'position': 0}]):
+            with self.subTest(moves=bool(extra)):
+                response = self.client.post(f'/api/playlists/{self.playlist.pk}/batch/', {'operations': [
+                    {'op': 'remove', 'spotify_track_id': 'track1'},
+                    {'op': 'add', 'spotify_track_id': 'track1', 'name': 'track1', 'artist': 'Artist'},
+                ] + extra}, format='json')
+
+                self.assertEqual(response.status_code, 200)
+                songs = self.song_ids(f'/api/playlists/{self.playlist.pk}/songs/')
+                self.assertEqual(songs[-1], 'track1')
+                self.assertEqual(len(songs), 5)
+
+    def test_migration_numbers_unpositioned_songs_in_added_order(self):
+        Song.objects.filter(playlist=self.playlist).update(position=0)
+
+        number_positions(apps, SimpleNamespace(connection=connection))
+
+        positions = Song.objects.filter(playlist=self.playlist).order_by('added_at', 'id').values_list('position', flat=True)
+        self.assertEqual(list(positions), [0, 1, 2, 3, 4])
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.api.profile_cache import get_profile_payload, profile_cache_key
+from apps.core.models import UserProfile
+
+
+class ProfileCacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cached', 'cached@example.com', 'password')
+        self.profile = UserProfile.objects.create(user=self.user)
+
+    def test_profile_save_drops_payload(self):
+        get_profile_payload(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.ai_suggestions_enabled = not self.profile.ai_suggestions_enabled
+            self.profile.save()
+
+        self.assertIsNone(cache.get(profile_cache_key(self.user.pk)))
+
+    def test_payload_recached_before_commit_is_dropped_on_commit(self):
+        stale = get_profile_payload(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Renamed'
+            self.user.save()
+            # A concurrent request that still sees the uncommitted old row.
+            cache.set(profile_cache_key(self.user.pk), stale)
+
+        self.assertEqual(get_profile_payload(self.user)['user']['first_name'], 'Renamed')
+
+    def test_last_login_update_keeps_payload(self):
+        get_profile_payload(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['last_login'])
+
+        self.assertIsNotNone(cache.get(profile_cache_key(self.user.pk)))
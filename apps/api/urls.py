@@ -4,9 +4,10 @@ URL configuration for API endpoints.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     UserProfileViewSet, PlaylistViewSet, VoiceCommandViewSet,
-    AIConversationViewSet
+    AIConversationViewSet, JobViewSet, TrackViewSet, AnalyticsViewSet, SearchViewSet
 )
 
 router = DefaultRouter()
@@ -14,8 +15,16 @@ router.register(r'profile', UserProfileViewSet, basename='profile')
 router.register(r'playlists', PlaylistViewSet, basename='playlist')
 router.register(r'voice-commands', VoiceCommandViewSet, basename='voice-command')
 router.register(r'conversations', AIConversationViewSet, basename='conversation')
+router.register(r'jobs', JobViewSet, basename='job')
+router.register(r'tracks', TrackViewSet, basename='track')
+router.register(r'analytics', AnalyticsViewSet, basename='analytics')
+router.register(r'search', SearchViewSet, basename='search')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/playlists/sync/', async_views.sync_from_spotify, name='async-playlist-sync'),
+    path('async/playlists/<int:pk>/suggestions/', async_views.playlist_suggestions,
+         name='async-playlist-suggestions'),
+    path('async/voice/execute/', async_views.execute_voice_command, name='async-voice-execute'),
 ]
 
@@ -2,19 +2,79 @@
 API views for Spotify Voice Manager.
 """
 
+import uuid
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.utils.encoders import JSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Prefetch, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 
-from apps.core.models import UserProfile, Playlist, Song, VoiceCommand, AIConversation
+from apps.analytics.rollups import voice_command_summary
+from apps.core.catalog import TRACK_FIELDS
+from apps.core.logbuffer import get_log_writer
+from apps.core.models import UserProfile, Playlist, Track, Song, VoiceCommand, AIConversation
+from apps.core.playlist_ops import apply_song_operations
+from apps.core.signals import playlist_songs_changed
+from apps.core.spotify.pool import get_client_pool
+from apps.recommendations.ann import IndexNotBuilt, get_index
+from apps.search.engine import KINDS as SEARCH_KINDS, search_library
+from apps.recommendations.engine import (
+    METRICS, UnknownMood, get_feature_matrix, suggest
+)
+from apps.jobs.models import Job
+from apps.jobs.queue import enqueue
+from apps.voice.cache import get_response_cache
+from apps.voice.executor import VoiceCommandExecutor
+from apps.voice.parser import CommandParser
+from .mixins import BufferedCreateMixin, ConditionalGetMixin, ReadReplicaMixin
+from .profile_cache import get_profile_payload
+from .pagination import KeysetPagination
 from .serializers import (
     UserProfileSerializer, PlaylistSerializer, PlaylistDetailSerializer,
-    SongSerializer, VoiceCommandSerializer, AIConversationSerializer
+    SongSerializer, SongOperationSerializer, VoiceCommandSerializer,
+    AIConversationSerializer, JobSerializer
 )
 
 
+def job_accepted(request, job):
+    """202 response pointing the client at a background job."""
+    return Response(
+        {
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': request.build_absolute_uri(reverse('job-detail', args=[job.pk])),
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+def suggestion_params(query_params):
+    """``(mood, metric, limit)`` from a suggestions request's query string."""
+    mood = query_params.get('mood') or None
+    metric = query_params.get('metric', 'cosine')
+    try:
+        limit = max(1, min(int(query_params.get('limit', 10)), 100))
+    except ValueError:
+        limit = 10
+    return mood, metric, limit
+
+
+def suggestion_results(user_id, playlist_id, mood, metric, limit):
+    """Serialized suggestions for a playlist, best first; raises ``UnknownMood``."""
+    ranked = suggest(get_feature_matrix(user_id), playlist_id, mood=mood, limit=limit, metric=metric)
+    songs = Song.objects.select_related('track').in_bulk([song_id for song_id, score in ranked])
+    return [
+        {**SongSerializer(songs[song_id]).data, 'score': round(score, 4)}
+        for song_id, score in ranked if song_id in songs
+    ]
+
+
 class UserProfileViewSet(viewsets.ModelViewSet):
     """ViewSet for user profile management."""
     serializer_class = UserProfileSerializer
@@ -23,12 +83,22 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return UserProfile.objects.filter(user=self.request.user)
     
+    def create(self, request, *args, **kwargs):
+        # One profile per user, usually made at registration or by /profile/me/.
+        if UserProfile.objects.filter(user=request.user).exists():
+            return Response(
+                {'error': 'Profile already exists; update it instead'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return super().create(request, *args, **kwargs)
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+    
     @action(detail=False, methods=['get'])
     def me(self, request):
         """Get current user's profile."""
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
-        serializer = self.get_serializer(profile)
-        return Response(serializer.data)
+        return Response(get_profile_payload(request.user)['profile'])
     
     @action(detail=False, methods=['patch'])
     def update_preferences(self, request):
@@ -45,24 +115,111 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class PlaylistViewSet(viewsets.ModelViewSet):
+class PlaylistViewSet(ConditionalGetMixin, ReadReplicaMixin, viewsets.ModelViewSet):
     """ViewSet for playlist management."""
     serializer_class = PlaylistSerializer
     permission_classes = [IsAuthenticated]
+    replica_actions = ('list', 'retrieve', 'songs', 'get_suggestions')
+    MAX_BATCH_OPERATIONS = 500
     
     def get_queryset(self):
-        return Playlist.objects.filter(user=self.request.user).prefetch_related('songs')
+        queryset = Playlist.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            queryset = queryset.annotate(song_count=Count('songs'))
+        elif self.action in ('retrieve', 'update', 'partial_update'):
+            queryset = queryset.prefetch_related(
+                Prefetch('songs', queryset=Song.objects.select_related('track').order_by(*KeysetPagination.ordering))
+            )
+        return queryset.order_by('-created_at')
+    
+    def get_serializer_class(self):
+        # List responses stay slim; songs are served by the paginated `songs` action.
+        if self.action == 'list':
+            return PlaylistDetailSerializer
+        return PlaylistSerializer
+    
+    def get_cache_validators(self):
+        """Fingerprint the playlists (and their songs) behind this response in one query."""
+        queryset = Playlist.objects.filter(user=self.request.user)
+        if self.action != 'list':
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            queryset = queryset.filter(pk=lookup if str(lookup).isdigit() else None)
+        state = queryset.aggregate(
+            playlist_count=Count('id', distinct=True),
+            last_updated_at=Max('updated_at'),
+            last_synced_at=Max('synced_at'),
+            song_count=Count('songs'),
+            last_song_added_at=Max('songs__added_at'),
+            # Shared catalog edits (metadata refresh, audio features) change song payloads too.
+            last_track_updated_at=Max('songs__track__updated_at'),
+        )
+        last_modified = max(
+            (value for key, value in state.items() if key.endswith('_at') and value),
+            default=None,
+        )
+        return state, last_modified
+    
+    def list(self, request, *args, **kwargs):
+        return self.not_modified_response(request) or super().list(request, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.not_modified_response(request) or super().retrieve(request, *args, **kwargs)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # spotify_playlist_id is unique, so playlists made here (not synced
+        # from Spotify) get a placeholder that no Spotify id can collide with.
+        serializer.save(user=self.request.user, spotify_playlist_id=f'local-{uuid.uuid4().hex}')
+    
+    def update(self, request, *args, **kwargs):
+        # UpdateModelMixin.update drops the songs prefetched by get_queryset,
+        # and the response would then load every song's track separately.
+        # Updates only touch playlist fields, so the prefetched songs stay valid.
+        partial = kwargs.pop('partial', False)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def songs(self, request, pk=None):
-        """Get all songs in a playlist."""
+        """
+        Get songs in a playlist, in playlist order (position, id).
+        
+        Paginated with an opaque ``cursor``; pass ``?stream=ndjson`` (or
+        ``Accept: application/x-ndjson``) to stream every song as
+        newline-delimited JSON instead.
+        """
+        not_modified = self.not_modified_response(request)
+        if not_modified:
+            return not_modified
+        
         playlist = self.get_object()
-        songs = playlist.songs.all()
-        serializer = SongSerializer(songs, many=True)
-        return Response(serializer.data)
+        songs = playlist.songs.select_related('track').order_by(*KeysetPagination.ordering)
+        
+        if self._wants_ndjson(request):
+            # The body is produced after the view returns, so pin the database
+            # chosen for this request before the routing context is exited.
+            return StreamingHttpResponse(
+                self._iter_ndjson(songs.using(songs.db)), content_type='application/x-ndjson'
+            )
+        
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(songs, request, view=self)
+        serializer = SongSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    def _wants_ndjson(self, request):
+        if request.query_params.get('stream') == 'ndjson':
+            return True
+        return 'application/x-ndjson' in request.META.get('HTTP_ACCEPT', '')
+    
+    def _iter_ndjson(self, songs):
+        # iterator() uses a server-side cursor where the backend supports one,
+        # so memory stays flat regardless of playlist size.
+        serializer = SongSerializer()
+        encoder = JSONEncoder()
+        for song in songs.iterator(chunk_size=2000):
+            yield encoder.encode(serializer.to_representation(song)) + '\n'
     
     @action(detail=True, methods=['post'])
     def add_song(self, request, pk=None):
@@ -79,14 +236,30 @@ class PlaylistViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        song, created = Song.objects.get_or_create(
-            playlist=playlist,
+        track, _ = Track.objects.get_or_create(
             spotify_track_id=spotify_track_id,
             defaults={
                 'name': name,
                 'artist': artist,
             }
         )
+        # One query finds both an existing membership and the end of the playlist.
+        state = playlist.songs.aggregate(existing=Max('id', filter=Q(track=track)), last=Max('position'))
+        song, created = None, False
+        if state['existing'] is None:
+            try:
+                with transaction.atomic():
+                    song = Song.objects.create(
+                        playlist=playlist, track=track, position=0 if state['last'] is None else state['last'] + 1
+                    )
+                created = True
+            except IntegrityError:
+                # Added by a concurrent request since the aggregate ran.
+                pass
+        if song is None:
+            song = Song.objects.select_related('track').get(playlist=playlist, track=track)
+        if created:
+            playlist_songs_changed.send(sender=Playlist, playlist=playlist)
         
         serializer = SongSerializer(song)
         return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -103,45 +276,253 @@ class PlaylistViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        song = get_object_or_404(Song, playlist=playlist, spotify_track_id=spotify_track_id)
+        song = get_object_or_404(Song, playlist=playlist, track__spotify_track_id=spotify_track_id)
         song.delete()
+        playlist_songs_changed.send(sender=Playlist, playlist=playlist)
         
         return Response({'message': 'Song removed successfully'}, status=status.HTTP_204_NO_CONTENT)
     
+    @action(detail=True, methods=['post'])
+    def batch(self, request, pk=None):
+        """
+        Apply many add/remove/move operations in one transaction.
+        
+        Body: ``{"operations": [{"op": "add", "spotify_track_id": ..., "name": ...,
+        "artist": ...}, {"op": "remove", ...}, {"op": "move", ..., "position": 0}]}``.
+        Invalid items are reported individually and skipped.
+        """
+        playlist = self.get_object()
+        operations = request.data.get('operations')
+        
+        if not isinstance(operations, list) or not operations:
+            return Response(
+                {'error': 'operations must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(operations) > self.MAX_BATCH_OPERATIONS:
+            return Response(
+                {'error': f'At most {self.MAX_BATCH_OPERATIONS} operations per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        valid, errors = [], {}
+        for index, item in enumerate(operations):
+            serializer = SongOperationSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors[index] = serializer.errors
+        
+        applied = apply_song_operations(playlist, [data for index, data in valid])
+        results = [None] * len(operations)
+        for (index, data), result in zip(valid, applied):
+            result['index'] = index
+            results[index] = result
+        for index, error in errors.items():
+            item = operations[index] if isinstance(operations[index], dict) else {}
+            results[index] = {
+                'index': index,
+                'op': item.get('op'),
+                'spotify_track_id': item.get('spotify_track_id'),
+                'status': 'invalid',
+                'errors': error,
+            }
+        
+        return Response({'total_tracks': playlist.total_tracks, 'results': results})
+    
+    @action(detail=True, methods=['get'])
+    def get_suggestions(self, request, pk=None):
+        """
+        Suggest tracks from the user's library for this playlist.
+        
+        Ranks by audio-feature similarity to the playlist's centroid, or to a
+        ``?mood=`` target. ``?metric=`` is ``cosine`` (default) or ``weighted``.
+        """
+        playlist = self.get_object()
+        mood, metric, limit = suggestion_params(request.query_params)
+        if metric not in METRICS:
+            return Response(
+                {'error': f'metric must be one of: {", ".join(METRICS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            results = suggestion_results(request.user.pk, playlist.pk, mood, metric, limit)
+        except UnknownMood as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'mood': mood, 'metric': metric, 'results': results})
+    
     @action(detail=False, methods=['post'])
     def sync_from_spotify(self, request):
         """Sync playlists from Spotify account."""
-        # This will be implemented when we integrate with Spotify API
-        return Response({'message': 'Sync functionality coming soon'})
+        profile, created = UserProfile.objects.get_or_create(user=request.user)
+        if not profile.spotify_access_token:
+            return Response(
+                {'error': 'Spotify account is not connected'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        force = str(request.data.get('force', '')).lower() in ('1', 'true', 'yes')
+        job = enqueue('spotify.sync_library', user=request.user, unique=True, force=force)
+        return job_accepted(request, job)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def spotify_client_stats(self, request):
+        """Client reuse and token refresh counters for this process's Spotify client pool."""
+        return Response(get_client_pool().stats())
 
 
-class VoiceCommandViewSet(viewsets.ModelViewSet):
+class VoiceCommandViewSet(BufferedCreateMixin, ReadReplicaMixin, viewsets.ModelViewSet):
     """ViewSet for voice command logging."""
     serializer_class = VoiceCommandSerializer
     permission_classes = [IsAuthenticated]
+    replica_actions = ('list', 'retrieve', 'recent')
     
     def get_queryset(self):
-        return VoiceCommand.objects.filter(user=self.request.user)
+        return VoiceCommand.objects.filter(user=self.request.user).order_by('-created_at')
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # Commands logged without a client-side parse are parsed here.
+        if serializer.validated_data.get('parsed_action'):
+            self.queue_row(serializer, user=self.request.user)
+            return
+        parsed = CommandParser.from_settings().parse(serializer.validated_data['raw_command'])
+        self.queue_row(
+            serializer,
+            user=self.request.user,
+            parsed_action=parsed.action,
+            parse_source=parsed.source,
+            parse_latency_ms=parsed.latency_ms,
+        )
+    
+    @action(detail=False, methods=['post'])
+    def execute(self, request):
+        """
+        Parse a voice command, apply it and log it in one request.
+        
+        Body: ``{"command_text": "add Hey Jude to my road trip playlist"}``.
+        The response reports ``success``, the result or error, and per-stage
+        ``timings`` in milliseconds; the ``VoiceCommand`` row is written after
+        the response, off the request path.
+        """
+        text = request.data.get('command_text')
+        if not isinstance(text, str) or not text.strip():
+            return Response(
+                {'error': 'Missing required field: command_text'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        execution = VoiceCommandExecutor(request.user).execute(text)
+        return Response(execution.as_dict(), status=execution.status)
     
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Get recent voice commands."""
-        commands = self.get_queryset().order_by('-created_at')[:10]
+        commands = self.get_queryset()[:10]
         serializer = self.get_serializer(commands, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Hit-rate statistics for this process's LLM response cache."""
+        return Response(get_response_cache().stats())
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def log_writer_stats(self, request):
+        """Queue, batch and spool counters for this process's log writer."""
+        return Response(get_log_writer().stats())
 
 
-class AIConversationViewSet(viewsets.ModelViewSet):
+class AIConversationViewSet(BufferedCreateMixin, ReadReplicaMixin, viewsets.ModelViewSet):
     """ViewSet for AI conversations."""
     serializer_class = AIConversationSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return AIConversation.objects.filter(user=self.request.user)
+        return AIConversation.objects.filter(user=self.request.user).order_by('-created_at')
+
+
+class AnalyticsViewSet(ReadReplicaMixin, viewsets.ViewSet):
+    """Pre-aggregated usage analytics for the current user."""
+    permission_classes = [IsAuthenticated]
+    replica_actions = ('voice_commands',)
     
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    @action(detail=False, methods=['get'], url_path='voice-commands')
+    def voice_commands(self, request):
+        """Voice command counts and success rates per action and day (``?days=30``, max 365)."""
+        try:
+            days = max(1, min(int(request.query_params.get('days', 30)), 365))
+        except ValueError:
+            days = 30
+        return Response(voice_command_summary(request.user, days))
+
+
+class SearchViewSet(ReadReplicaMixin, viewsets.ViewSet):
+    """Fuzzy search over the current user's songs and playlists."""
+    permission_classes = [IsAuthenticated]
+    replica_actions = ('list',)
+    
+    def list(self, request):
+        """
+        ``?q=bohemian rapsody`` with optional ``type`` (track, playlist or all),
+        ``artist`` and ``limit`` (max 50).
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Missing required parameter: q'}, status=status.HTTP_400_BAD_REQUEST)
+        kind = request.query_params.get('type', 'all')
+        if kind not in ('all', *SEARCH_KINDS):
+            return Response(
+                {'error': f'type must be one of: all, {", ".join(SEARCH_KINDS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            limit = 10
+        hits = search_library(
+            request.user.pk, query, kinds=SEARCH_KINDS if kind == 'all' else (kind,),
+            limit=limit, artist=request.query_params.get('artist'),
+        )
+        return Response({'query': query, 'results': [hit.as_dict() for hit in hits]})
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for background job status and progress."""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user).order_by('-created_at')
+
 
+class TrackViewSet(ReadReplicaMixin, viewsets.ViewSet):
+    """Lookups in the shared track catalog."""
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'spotify_track_id'
+    lookup_value_regex = '[^/]+'
+    replica_actions = ('similar',)
+    
+    @action(detail=True, methods=['get'])
+    def similar(self, request, spotify_track_id=None):
+        """"More like this": nearest tracks by audio features and popularity."""
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+        except ValueError:
+            limit = 10
+        try:
+            neighbours = get_index().similar(spotify_track_id, k=limit)
+        except IndexNotBuilt as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if neighbours is None:
+            return Response({'error': 'Track is not in the index'}, status=status.HTTP_404_NOT_FOUND)
+        
+        tracks = {
+            row['spotify_track_id']: row
+            for row in Track.objects.filter(
+                spotify_track_id__in=[track_id for track_id, distance in neighbours]
+            ).values('spotify_track_id', *TRACK_FIELDS)
+        }
+        results = [
+            {**tracks[track_id], 'distance': round(distance, 4)}
+            for track_id, distance in neighbours if track_id in tracks
+        ]
+        return Response({'spotify_track_id': spotify_track_id, 'results': results})
@@ -5,3 +5,5 @@ class AuthAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.auth_app'
 
+    def ready(self):
+        from . import signals  # noqa: F401
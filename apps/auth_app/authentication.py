@@ -0,0 +1,47 @@
+"""
+DRF authentication with the bearer tokens from ``apps.auth_app.tokens``.
+"""
+
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .tokens import InvalidToken, user_for_access_token
+
+KEYWORD = 'Bearer'
+
+
+def bearer_token(request):
+    """
+    The token in an ``Authorization: Bearer <token>`` header, or None without
+    one. Raises ``InvalidToken`` for a malformed bearer header.
+    """
+    parts = get_authorization_header(request).split()
+    if not parts or parts[0].lower() != KEYWORD.lower().encode():
+        return None
+    if len(parts) != 2:
+        raise InvalidToken('Invalid token header.')
+    try:
+        return parts[1].decode()
+    except UnicodeError:
+        raise InvalidToken('Invalid token header.')
+
+
+class TokenAuthentication(BaseAuthentication):
+    """
+    ``Authorization: Bearer <access token>``. Requests without the header are
+    left to the next class (``SessionAuthentication``), and, carrying no
+    session, need no CSRF token.
+    """
+
+    def authenticate(self, request):
+        try:
+            token = bearer_token(request)
+            if token is None:
+                return None
+            return user_for_access_token(token), token
+        except InvalidToken as exc:
+            raise AuthenticationFailed(str(exc))
+
+    def authenticate_header(self, request):
+        # Makes unauthenticated requests 401s, the client's cue to refresh.
+        return f'{KEYWORD} realm="api"'
@@ -0,0 +1,38 @@
+"""
+Authentication by email address.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Value
+from django.db.models.functions import Lower
+
+
+def with_email(queryset, email):
+    """Users whose email matches ``email`` ignoring case, using ``auth_user_email_lower_idx``."""
+    return queryset.alias(email_lower=Lower('email')).filter(email_lower=Lower(Value(email)))
+
+
+class EmailBackend(ModelBackend):
+    """
+    ``authenticate(request, email=..., password=...)`` in one lookup on the
+    indexed, lowercased email column, so the address's case doesn't matter.
+
+    Username logins fall through to ``ModelBackend``. Addresses shared by
+    several accounts (possible for users created in the admin) never match,
+    rather than picking one of them.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        UserModel = get_user_model()
+        users = list(with_email(UserModel._default_manager.all(), email)[:2])
+        if len(users) != 1:
+            # Hash anyway, so response times don't reveal which addresses exist.
+            UserModel().set_password(password)
+            return None
+        user = users[0]
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
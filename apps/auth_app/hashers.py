@@ -0,0 +1,20 @@
+"""
+Password hashers tuned from settings.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with ``PASSWORD_PBKDF2_ITERATIONS`` rounds.
+
+    Keeps Django's ``pbkdf2_sha256`` algorithm name, so existing hashes still
+    verify; a hash with a different round count is re-encoded with the
+    configured one the next time its user logs in.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
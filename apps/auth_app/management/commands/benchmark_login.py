@@ -0,0 +1,127 @@
+"""
+Logins per second per CPU core for different password hasher settings.
+
+For each ``--configs`` entry (``algorithm`` or ``pbkdf2_sha256:<rounds>``)
+every benchmark user starts with a hash from Django's default 600,000-round
+PBKDF2 and logs in twice through ``POST /api/auth/login/``, one request after
+another in this process. The first round includes the transparent rehash to
+the configured hasher; the second is the steady state. Rates divide logins by
+the CPU seconds this process used, so they are per core whatever else the
+machine is doing.
+"""
+
+import json
+import re
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from apps.core.benchmarks.database import benchmark_database
+from apps.core.benchmarks.factories import create_users
+
+USER_PREFIX = 'loginbench'
+PASSWORD = 'benchmark-password'
+LEGACY_ITERATIONS = 600_000
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+def parse_config(value):
+    algorithm, _, rounds = value.partition(':')
+    if algorithm not in settings.PASSWORD_HASHER_CLASSES:
+        raise CommandError(f'Unknown hasher {algorithm!r}; choose from {", ".join(settings.PASSWORD_HASHER_CLASSES)}')
+    if rounds and (algorithm != 'pbkdf2_sha256' or not rounds.isdigit()):
+        raise CommandError(f'{value!r}: only pbkdf2_sha256 takes a round count')
+    return algorithm, int(rounds) if rounds else settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+def hasher_available(algorithm):
+    # argon2 and bcrypt need optional packages.
+    module = {'argon2': 'argon2', 'bcrypt_sha256': 'bcrypt'}.get(algorithm)
+    if module is None:
+        return True
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+class Command(BaseCommand):
+    help = 'Measure login throughput per CPU core for password hasher settings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50, help='Users logged in per round.')
+        parser.add_argument('--configs', nargs='+',
+                            default=['pbkdf2_sha256:600000', 'pbkdf2_sha256:260000', 'pbkdf2_sha256:100000', 'scrypt'],
+                            help='Hashers to compare: an algorithm, or pbkdf2_sha256:<rounds>.')
+        parser.add_argument('--json', action='store_true', help='Print a JSON report.')
+
+    def handle(self, *args, **options):
+        if options['logins'] < 1:
+            raise CommandError('--logins must be positive')
+        configs = [parse_config(value) for value in options['configs']]
+        legacy = PBKDF2PasswordHasher()
+        legacy_hash = legacy.encode(PASSWORD, legacy.salt(), iterations=LEGACY_ITERATIONS)
+        report = []
+        overrides = override_settings(ALLOWED_HOSTS=['testserver'], PERF_INSTRUMENTATION_ENABLED=True,
+                                      PERF_SERVER_TIMING=True, PERF_SLOW_REQUEST_MS=10 ** 9)
+        with benchmark_database(), overrides:
+            users = create_users(options['logins'], prefix=USER_PREFIX, password=PASSWORD)
+            for algorithm, rounds in configs:
+                name = f'{algorithm}:{rounds}' if algorithm == 'pbkdf2_sha256' else algorithm
+                if not hasher_available(algorithm):
+                    report.append({'hasher': name, 'skipped': 'hasher library not installed'})
+                    continue
+                hashers = [settings.PASSWORD_HASHER_CLASSES[algorithm]] + [
+                    path for key, path in settings.PASSWORD_HASHER_CLASSES.items() if key != algorithm
+                ]
+                with override_settings(PASSWORD_HASHERS=hashers, PASSWORD_PBKDF2_ITERATIONS=rounds):
+                    User.objects.filter(pk__in=[user.pk for user in users]).update(password=legacy_hash)
+                    first = self.run_round(users)
+                    first['rehashed'] = User.objects.filter(
+                        pk__in=[user.pk for user in users]
+                    ).exclude(password=legacy_hash).count()
+                    report.append({'hasher': name, 'first_login': first, 'steady': self.run_round(users)})
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"{options['logins']} logins per round, starting from pbkdf2_sha256:{LEGACY_ITERATIONS} hashes")
+        for row in report:
+            if 'skipped' in row:
+                self.stdout.write(f"{row['hasher']:<22} skipped: {row['skipped']}")
+                continue
+            first, steady = row['first_login'], row['steady']
+            self.stdout.write(
+                f"{row['hasher']:<22} {steady['logins_per_core_second']:>7.1f} logins/s per core, "
+                f"p50 {steady['p50_ms']:.1f} ms, {steady['queries']} queries; first login with rehash "
+                f"{first['logins_per_core_second']:.1f}/s, {first['queries']} queries, "
+                f"{first['rehashed']} rehashed"
+            )
+
+    def run_round(self, users):
+        """Log every user in once from a fresh client."""
+        timings, queries = [], []
+        cpu_started = time.process_time()
+        for user in users:
+            client = Client()
+            started = time.perf_counter()
+            response = client.post('/api/auth/login/', {'email': user.email, 'password': PASSWORD},
+                                   content_type='application/json')
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'Login failed for {user.username}: {response.status_code} {response.content!r}')
+            match = QUERY_COUNT.search(response.get('Server-Timing', ''))
+            queries.append(int(match.group(1)) if match else -1)
+        cpu_seconds = time.process_time() - cpu_started
+        return {
+            'logins_per_core_second': round(len(users) / cpu_seconds, 1) if cpu_seconds else None,
+            'p50_ms': round(statistics.median(timings), 1),
+            'queries': max(queries),
+        }
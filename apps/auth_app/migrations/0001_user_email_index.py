@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index ``auth_user.email`` for ``EmailBackend``; the auth app's model can't declare it."""
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_email_idx ON auth_user (email)',
+            reverse_sql='DROP INDEX IF EXISTS auth_user_email_idx',
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index ``lower(auth_user.email)`` instead, for ``EmailBackend``'s case-insensitive lookup."""
+
+    dependencies = [
+        ('auth_app', '0001_user_email_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [
+                'CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (lower(email))',
+                'DROP INDEX IF EXISTS auth_user_email_idx',
+            ],
+            reverse_sql=[
+                'CREATE INDEX IF NOT EXISTS auth_user_email_idx ON auth_user (email)',
+                'DROP INDEX IF EXISTS auth_user_email_lower_idx',
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+"""
+Signal handlers keeping the token user cache consistent with the database.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .user_cache import get_user_cache
+
+
+@receiver(post_save, sender=User, dispatch_uid='auth_app.user_saved')
+@receiver(post_delete, sender=User, dispatch_uid='auth_app.user_deleted')
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login; a stale value there is harmless.
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    get_user_cache().invalidate(instance.pk)
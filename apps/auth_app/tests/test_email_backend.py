@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.auth_app.backends import with_email
+from apps.core.models import UserProfile
+
+FAST_HASHING = override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+
+
+@FAST_HASHING
+class EmailBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('listener', 'Listener@Example.com', 'password')
+
+    def test_matches_email_ignoring_case(self):
+        for email in ('Listener@Example.com', 'listener@example.com', 'LISTENER@EXAMPLE.COM'):
+            with self.subTest(email=email):
+                self.assertEqual(authenticate(email=email, password='password'), self.user)
+
+    def test_lookup_uses_index(self):
+        self.assertIn('auth_user_email_lower_idx', with_email(User.objects.all(), 'a@example.com')[:2].explain())
+
+    def test_wrong_password(self):
+        self.assertIsNone(authenticate(email='listener@example.com', password='wrong'))
+
+    def test_unknown_email_still_hashes(self):
+        with mock.patch.object(User, 'set_password', autospec=True) as set_password:
+            self.assertIsNone(authenticate(email='nobody@example.com', password='password'))
+
+        set_password.assert_called_once_with(mock.ANY, 'password')
+
+    def test_shared_email_never_matches(self):
+        User.objects.create_user('twin', 'listener@example.com', 'password')
+
+        with mock.patch.object(User, 'set_password', autospec=True) as set_password:
+            self.assertIsNone(authenticate(email='listener@example.com', password='password'))
+
+        set_password.assert_called_once()
+
+    def test_inactive_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(authenticate(email='listener@example.com', password='password'))
+
+    def test_rehashes_when_iterations_change(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(authenticate(email='listener@example.com', password='password'), self.user)
+
+        password = User.objects.get(pk=self.user.pk).password
+        self.assertTrue(password.startswith('pbkdf2_sha256$2000$'), password)
+        self.assertEqual(authenticate(email='listener@example.com', password='password'), self.user)
+
+
+@FAST_HASHING
+class LoginViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('listener', 'listener@example.com', 'password')
+        self.client = APIClient()
+
+    def login(self, email, password='password'):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': password}, format='json')
+
+    def test_login_by_email(self):
+        response = self.login('Listener@example.COM')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['id'], self.user.pk)
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 200)
+
+    def test_invalid_credentials(self):
+        for email, password in [('listener@example.com', 'wrong'), ('nobody@example.com', 'password')]:
+            with self.subTest(email=email):
+                self.assertEqual(self.login(email, password).status_code, 401)
+
+    def test_inactive_user(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.login('listener@example.com').status_code, 401)
+
+
+@FAST_HASHING
+class RegisterViewTests(TestCase):
+    def setUp(self):
+        User.objects.create_user('taken', 'taken@example.com', 'password')
+        self.client = APIClient()
+
+    def register(self, username='newcomer', email='newcomer@example.com'):
+        return self.client.post('/api/auth/register/', {'username': username, 'email': email, 'password': 'password'},
+                                format='json')
+
+    def test_creates_user_and_profile(self):
+        response = self.register()
+
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(username='newcomer')
+        self.assertTrue(user.check_password('password'))
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+
+    def test_duplicate_username(self):
+        response = self.register(username='taken')
+
+        self.assertEqual((response.status_code, response.json()), (400, {'error': 'Username already exists'}))
+
+    def test_duplicate_email_in_any_case(self):
+        for email in ('taken@example.com', 'Taken@Example.com'):
+            with self.subTest(email=email):
+                response = self.register(email=email)
+                self.assertEqual((response.status_code, response.json()), (400, {'error': 'Email already exists'}))
+        self.assertFalse(User.objects.filter(username='newcomer').exists())
+
+    def test_username_registered_concurrently(self):
+        set_password = User.set_password
+
+        def register_elsewhere(user, raw_password):
+            # Another request inserts the same username between the check and the insert.
+            User.objects.create(username=user.username, email='racer@example.com')
+            set_password(user, raw_password)
+
+        with mock.patch.object(User, 'set_password', autospec=True, side_effect=register_elsewhere):
+            response = self.register()
+
+        self.assertEqual((response.status_code, response.json()), (400, {'error': 'Username already exists'}))
+        self.assertEqual(User.objects.filter(username='newcomer').count(), 1)
+        self.assertFalse(UserProfile.objects.filter(user__username='newcomer').exists())
@@ -0,0 +1,165 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.auth_app import tokens
+from apps.auth_app.user_cache import get_user_cache
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, TOKEN_ACCESS_LIFETIME_SECONDS=300,
+                   TOKEN_REFRESH_LIFETIME_SECONDS=3600)
+class TokenTestCase(TestCase):
+    def setUp(self):
+        get_user_cache().clear()
+        self.addCleanup(get_user_cache().clear)
+        self.user = User.objects.create_user('holder', 'holder@example.com', 'password')
+        self.client = APIClient()
+
+    def obtain(self, email='holder@example.com', password='password'):
+        return self.client.post('/api/auth/token/', {'email': email, 'password': password}, format='json')
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': token}, format='json')
+
+    def me(self, access):
+        return self.client.get('/api/auth/me/', headers={'Authorization': f'Bearer {access}'})
+
+    def later(self, seconds):
+        """Patches the signing clock ``seconds`` into the future."""
+        return mock.patch('django.core.signing.time.time', return_value=time.time() + seconds)
+
+
+class TokenEndpointTests(TokenTestCase):
+    def test_obtain_pair(self):
+        response = self.obtain()
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['token_type'], body['expires_in']), ('Bearer', 300))
+        self.assertEqual(self.me(body['access']).json()['user']['id'], self.user.pk)
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+
+    def test_obtain_rejects_bad_credentials(self):
+        self.assertEqual(self.obtain(password='wrong').status_code, 401)
+        self.assertEqual(self.client.post('/api/auth/token/', {}, format='json').status_code, 400)
+
+    def test_refresh_issues_new_pair(self):
+        pair = self.obtain().json()
+
+        response = self.refresh(pair['refresh'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.me(response.json()['access']).status_code, 200)
+        self.assertEqual(self.refresh(response.json()['refresh']).status_code, 200)
+
+    def test_token_types_are_not_interchangeable(self):
+        pair = self.obtain().json()
+
+        response = self.refresh(pair['access'])
+        self.assertEqual((response.status_code, response.json()), (401, {'error': 'Invalid token.'}))
+        self.assertEqual(self.me(pair['refresh']).status_code, 401)
+
+    def test_expired_tokens(self):
+        pair = self.obtain().json()
+
+        with self.later(301):
+            self.assertEqual(self.me(pair['access']).status_code, 401)
+            self.assertEqual(self.refresh(pair['refresh']).status_code, 200)
+        with self.later(3601):
+            response = self.refresh(pair['refresh'])
+        self.assertEqual((response.status_code, response.json()), (401, {'error': 'Token has expired.'}))
+
+    def test_tampered_tokens(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        pair, others = self.obtain().json(), tokens.issue_tokens(other)
+
+        for kind in ('access', 'refresh'):
+            with self.subTest(kind=kind):
+                payload, timestamp, signature = pair[kind].rsplit(':', 2)
+                # Another user's payload under this token's signature.
+                forged = f"{others[kind].rsplit(':', 2)[0]}:{timestamp}:{signature}"
+                bad_signature = f"{payload}:{timestamp}:{signature[::-1]}"
+                for token in (forged, bad_signature):
+                    with self.assertRaisesMessage(tokens.InvalidToken, 'Invalid token.'):
+                        tokens._load(token, kind, 3600)
+        self.assertEqual(self.me(pair['access'][:-2]).status_code, 401)
+        self.assertEqual(self.refresh(pair['refresh'][:-2]).status_code, 401)
+
+    def test_password_change_revokes_refresh_tokens(self):
+        pair = self.obtain().json()
+
+        self.user.set_password('new-password')
+        self.user.save()
+
+        response = self.refresh(pair['refresh'])
+        self.assertEqual((response.status_code, response.json()), (401, {'error': 'Token has been revoked.'}))
+        self.assertEqual(self.refresh(self.obtain(password='new-password').json()['refresh']).status_code, 200)
+
+    def test_deactivation_revokes_tokens(self):
+        pair = self.obtain().json()
+        self.assertEqual(self.me(pair['access']).status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.me(pair['access']).status_code, 401)
+        self.assertEqual(self.refresh(pair['refresh']).status_code, 401)
+
+
+class BearerAuthenticationTests(TokenTestCase):
+    def test_unauthenticated_requests_get_www_authenticate(self):
+        for headers in ({}, {'Authorization': 'Bearer not-a-token'}, {'Authorization': 'Bearer two parts'}):
+            with self.subTest(headers=headers):
+                response = self.client.get('/api/playlists/', headers=headers)
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+    def test_bearer_requests_need_no_csrf_token(self):
+        client = APIClient(enforce_csrf_checks=True)
+        access = tokens.issue_tokens(self.user)['access']
+
+        response = client.post('/api/auth/logout/', headers={'Authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, 200)
+
+
+class UserCacheInvalidationTests(TokenTestCase):
+    def setUp(self):
+        super().setUp()
+        self.access = tokens.issue_tokens(self.user)['access']
+        tokens.user_for_access_token(self.access)
+
+    def test_cached_user_needs_no_query(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(tokens.user_for_access_token(self.access), self.user)
+
+    def test_save_invalidates(self):
+        self.user.first_name = 'Renamed'
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(tokens.user_for_access_token(self.access).first_name, 'Renamed')
+
+    def test_deactivation_invalidates(self):
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+
+        with self.assertRaisesMessage(tokens.InvalidToken, 'User not found or inactive.'):
+            tokens.user_for_access_token(self.access)
+
+    def test_delete_invalidates(self):
+        self.user.delete()
+
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.user_for_access_token(self.access)
+
+    def test_last_login_update_keeps_entry(self):
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+
+        with self.assertNumQueries(0):
+            tokens.user_for_access_token(self.access)
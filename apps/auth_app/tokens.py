@@ -0,0 +1,72 @@
+"""
+Signed, stateless bearer tokens.
+
+Tokens are ``django.core.signing`` payloads signed with ``SECRET_KEY``, so
+checking one needs no database table. An access token only names its user
+and lasts ``TOKEN_ACCESS_LIFETIME_SECONDS``; the user comes from the
+per-process ``UserCache``. A refresh token lasts
+``TOKEN_REFRESH_LIFETIME_SECONDS`` and also carries a fingerprint of the
+user's password hash, and redeeming it reloads the user, so changing the
+password or deactivating the user revokes it.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .user_cache import get_user_cache
+
+SALT = 'apps.auth_app.tokens'
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+
+class InvalidToken(Exception):
+    """A token that is malformed, tampered with, expired or revoked."""
+
+
+def _password_fingerprint(user):
+    return salted_hmac(SALT, user.password).hexdigest()[:20]
+
+
+def issue_tokens(user):
+    """A new access and refresh token pair for ``user``."""
+    return {
+        'access': signing.dumps({'uid': user.pk, 'typ': ACCESS}, salt=SALT),
+        'refresh': signing.dumps({'uid': user.pk, 'typ': REFRESH, 'pwd': _password_fingerprint(user)}, salt=SALT),
+        'token_type': 'Bearer',
+        'expires_in': settings.TOKEN_ACCESS_LIFETIME_SECONDS,
+    }
+
+
+def _load(token, kind, max_age):
+    try:
+        payload = signing.loads(token, salt=SALT, max_age=max_age)
+    except signing.SignatureExpired:
+        raise InvalidToken('Token has expired.')
+    except signing.BadSignature:
+        raise InvalidToken('Invalid token.')
+    if not isinstance(payload, dict) or payload.get('typ') != kind:
+        raise InvalidToken('Invalid token.')
+    return payload
+
+
+def user_for_access_token(token):
+    """The active user ``token`` was issued to, usually without a query."""
+    payload = _load(token, ACCESS, settings.TOKEN_ACCESS_LIFETIME_SECONDS)
+    user = get_user_cache().get(payload['uid'])
+    if user is None or not user.is_active:
+        raise InvalidToken('User not found or inactive.')
+    return user
+
+
+def user_for_refresh_token(token):
+    """The active user ``token`` was issued to, if it has not been revoked."""
+    payload = _load(token, REFRESH, settings.TOKEN_REFRESH_LIFETIME_SECONDS)
+    user = get_user_model()._default_manager.filter(pk=payload['uid']).first()
+    if (user is None or not user.is_active
+            or not constant_time_compare(payload.get('pwd', ''), _password_fingerprint(user))):
+        raise InvalidToken('Token has been revoked.')
+    get_user_cache().put(user)
+    return user
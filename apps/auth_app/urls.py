@@ -4,13 +4,16 @@ URL configuration for authentication endpoints.
 
 from django.urls import path
 from .views import (
-    register, login_view, logout_view, current_user, spotify_callback
+    register, login_view, logout_view, current_user, spotify_callback,
+    token_obtain, token_refresh,
 )
 
 urlpatterns = [
     path('register/', register, name='register'),
     path('login/', login_view, name='login'),
     path('logout/', logout_view, name='logout'),
+    path('token/', token_obtain, name='token_obtain'),
+    path('token/refresh/', token_refresh, name='token_refresh'),
     path('me/', current_user, name='current_user'),
     path('spotify/callback/', spotify_callback, name='spotify_callback'),
 ]
@@ -0,0 +1,88 @@
+"""
+Process-wide cache of user rows for token-authenticated requests.
+
+A bearer token names its user by id, so without this every API call would
+still load the user row. Entries live for ``TOKEN_USER_CACHE_SECONDS`` and
+are dropped in this process by the receivers in ``apps.auth_app.signals``
+when the user is saved or deleted; other processes pick changes up when
+their entry expires. Callers get their own copy of the cached instance, so
+related objects one request loads onto it are not shared with the next.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+
+class UserCache:
+    """Least recently used ``user_id -> user`` map with a per-entry lifetime."""
+
+    def __init__(self, max_users=None, ttl=None, clock=time.monotonic):
+        self.max_users = max_users or settings.TOKEN_USER_CACHE_MAX_USERS
+        self.ttl = settings.TOKEN_USER_CACHE_SECONDS if ttl is None else ttl
+        self.clock = clock
+        # user_id -> (user, expires_at), least recently used first.
+        self._users = OrderedDict()
+        # Bumped by every invalidation, so a row loaded before one is not cached.
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """The user with ``user_id``, or None if there is none."""
+        now = self.clock()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return copy.copy(entry[0])
+            self.misses += 1
+            generation = self._generation
+        user = get_user_model()._default_manager.filter(pk=user_id).first()
+        if user is not None:
+            self.put(user, generation)
+        return copy.copy(user)
+
+    def put(self, user, generation=None):
+        """Cache ``user``, unless it was loaded before the latest invalidation."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._users[user.pk] = (copy.copy(user), self.clock() + self.ttl)
+            self._users.move_to_end(user.pk)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._users.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'users': len(self._users), 'hits': self.hits, 'misses': self.misses}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    """The process-wide ``UserCache``."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = UserCache()
+    return _cache
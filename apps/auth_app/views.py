@@ -3,14 +3,19 @@ Authentication views for Spotify OAuth and user management.
 """
 
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
 from django.views.decorators.csrf import csrf_exempt
 from apps.core.models import UserProfile
-from apps.api.serializers import UserSerializer, UserProfileSerializer
+from apps.api.profile_cache import get_profile_payload
+from apps.api.serializers import UserSerializer
+from .tokens import InvalidToken, issue_tokens, user_for_refresh_token
 
 
 @csrf_exempt
@@ -28,26 +33,36 @@ def register(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    if User.objects.filter(username=username).exists():
+    # Emails differing only in case would share a login, so they count as taken.
+    taken = (
+        User.objects.alias(email_lower=Lower('email'))
+        .filter(Q(username=username) | Q(email_lower=Lower(Value(email))))
+        .values_list('username', flat=True)[:2]
+    )
+    if username in taken:
         return Response(
             {'error': 'Username already exists'},
             status=status.HTTP_400_BAD_REQUEST
         )
-    
-    if User.objects.filter(email=email).exists():
+    if taken:
         return Response(
             {'error': 'Email already exists'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    user = User.objects.create_user(
-        username=username,
-        email=email,
-        password=password
-    )
-    
-    # Create user profile
-    UserProfile.objects.get_or_create(user=user)
+    # Hash before opening the transaction, so it only spans the two inserts.
+    user = User(username=User.normalize_username(username), email=User.objects.normalize_email(email))
+    user.set_password(password)
+    try:
+        with transaction.atomic():
+            user.save()
+            UserProfile.objects.create(user=user)
+    except IntegrityError:
+        # Another request registered the same username since the check.
+        return Response(
+            {'error': 'Username already exists'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
     serializer = UserSerializer(user)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -67,17 +82,37 @@ def login_view(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    # Find user by email
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
+    user = authenticate(request, email=email, password=password)
+
+    if user is None:
         return Response(
             {'error': 'Invalid credentials'},
             status=status.HTTP_401_UNAUTHORIZED
         )
 
-    # Authenticate with username (Django's authenticate uses username)
-    user = authenticate(request, username=user.username, password=password)
+    login(request, user)
+
+    return Response({
+        **get_profile_payload(user),
+        'message': 'Login successful'
+    })
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def token_obtain(request):
+    """Exchange email and password for an access and refresh token, without a session."""
+    email = request.data.get('email')
+    password = request.data.get('password')
+
+    if not all([email, password]):
+        return Response(
+            {'error': 'Missing required fields: email, password'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    user = authenticate(request, email=email, password=password)
 
     if user is None:
         return Response(
@@ -85,16 +120,31 @@ def login_view(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
 
-    login(request, user)
+    return Response(issue_tokens(user))
 
-    profile, created = UserProfile.objects.get_or_create(user=user)
-    profile_serializer = UserProfileSerializer(profile)
 
-    return Response({
-        'user': UserSerializer(user).data,
-        'profile': profile_serializer.data,
-        'message': 'Login successful'
-    })
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def token_refresh(request):
+    """Exchange a refresh token for a new access and refresh token."""
+    refresh = request.data.get('refresh')
+
+    if not refresh or not isinstance(refresh, str):
+        return Response(
+            {'error': 'Missing required field: refresh'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        user = user_for_refresh_token(refresh)
+    except InvalidToken as exc:
+        return Response(
+            {'error': str(exc)},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    return Response(issue_tokens(user))
 
 
 @api_view(['POST'])
@@ -109,12 +159,7 @@ def logout_view(request):
 @permission_classes([IsAuthenticated])
 def current_user(request):
     """Get current authenticated user."""
-    profile, created = UserProfile.objects.get_or_create(user=request.user)
-    
-    return Response({
-        'user': UserSerializer(request.user).data,
-        'profile': UserProfileSerializer(profile).data
-    })
+    return Response(get_profile_payload(request.user))
 
 
 @api_view(['POST'])
@@ -3,7 +3,7 @@ Django admin configuration for core app.
 """
 
 from django.contrib import admin
-from .models import UserProfile, Playlist, Song, VoiceCommand, AIConversation
+from .models import UserProfile, Playlist, Track, Song, VoiceCommand, AIConversation
 
 
 @admin.register(UserProfile)
@@ -22,18 +22,28 @@ class PlaylistAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at', 'synced_at')
 
 
+@admin.register(Track)
+class TrackAdmin(admin.ModelAdmin):
+    list_display = ('name', 'artist', 'album', 'popularity', 'updated_at')
+    list_filter = ('popularity',)
+    search_fields = ('spotify_track_id', 'name', 'artist', 'album')
+    readonly_fields = ('created_at', 'updated_at')
+
+
 @admin.register(Song)
 class SongAdmin(admin.ModelAdmin):
-    list_display = ('name', 'artist', 'playlist', 'popularity', 'added_at')
-    list_filter = ('playlist', 'added_at', 'popularity')
-    search_fields = ('name', 'artist', 'album')
+    list_display = ('track', 'playlist', 'position', 'added_at')
+    list_filter = ('playlist', 'added_at')
+    search_fields = ('track__name', 'track__artist', 'track__album')
+    list_select_related = ('track', 'playlist')
+    raw_id_fields = ('track',)
     readonly_fields = ('added_at',)
 
 
 @admin.register(VoiceCommand)
 class VoiceCommandAdmin(admin.ModelAdmin):
-    list_display = ('user', 'parsed_action', 'success', 'created_at')
-    list_filter = ('parsed_action', 'success', 'created_at')
+    list_display = ('user', 'parsed_action', 'success', 'parse_source', 'created_at')
+    list_filter = ('parsed_action', 'success', 'parse_source', 'created_at')
     search_fields = ('user__username', 'raw_command')
     readonly_fields = ('created_at',)
 
@@ -0,0 +1,36 @@
+"""
+Run blocking I/O from async views.
+
+spotipy and the LLM client are synchronous, so async code hands their calls
+to a dedicated thread pool sized for waiting on the network
+(``ASYNC_IO_THREADS``) rather than asyncio's default executor, which is sized
+for CPU-bound work. Database access keeps going through ``sync_to_async``.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_io_executor():
+    """The process-wide thread pool for blocking network calls."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_IO_THREADS, thread_name_prefix='async-io'
+                )
+    return _executor
+
+
+async def run_io(func, *args, **kwargs):
+    """Await ``func(*args, **kwargs)`` on the I/O thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), partial(func, *args, **kwargs))
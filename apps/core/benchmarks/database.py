@@ -0,0 +1,32 @@
+"""
+Throwaway database for benchmarks, so seeding never touches real data.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def benchmark_database(keepdb=False, verbosity=0, on_disk=False):
+    """
+    Create (or reuse with ``keepdb``) the test database for the duration of the block.
+
+    SQLite test databases live in memory with a shared cache, which locks
+    whole tables between connections; pass ``on_disk=True`` when several
+    threads write concurrently.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    with tempfile.TemporaryDirectory() as directory:
+        if on_disk and connection.vendor == 'sqlite' and not old_test_name:
+            test_settings['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, keepdb=keepdb)
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=verbosity, keepdb=keepdb)
+            test_settings['NAME'] = old_test_name
@@ -0,0 +1,129 @@
+"""
+Bulk data factories for benchmarks.
+
+Rows are generated lazily and inserted with ``bulk_create`` in fixed-size
+batches, so seeding millions of rows stays within a bounded amount of memory.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.core.catalog import upsert_tracks
+from apps.core.models import AIConversation, Playlist, Song, UserProfile, VoiceCommand
+
+BATCH_SIZE = 5000
+ACTIONS = [choice for choice, label in VoiceCommand.ACTION_CHOICES]
+
+
+def bulk_insert(model, rows, batch_size=BATCH_SIZE):
+    """Insert an iterable of unsaved instances in batches; returns the row count."""
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return total
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        total += len(batch)
+
+
+def create_users(count, prefix='bench', password='benchmark-password'):
+    """Create users with profiles sharing one pre-hashed password."""
+    hashed = make_password(password)
+    bulk_insert(User, (
+        User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=hashed)
+        for i in range(count)
+    ))
+    users = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+    bulk_insert(UserProfile, (UserProfile(user=user) for user in users))
+    return users
+
+
+def create_playlists(user, count, songs_per_playlist=0, prefix=None):
+    """Create ``count`` playlists for ``user``, each with ``songs_per_playlist`` songs."""
+    prefix = prefix or f'u{user.pk}'
+    bulk_insert(Playlist, (
+        Playlist(user=user, spotify_playlist_id=f'{prefix}-pl{i}', name=f'Playlist {i}',
+                 total_tracks=songs_per_playlist)
+        for i in range(count)
+    ))
+    playlists = list(Playlist.objects.filter(user=user).order_by('id'))
+    if songs_per_playlist:
+        for playlist in playlists:
+            tracks = {
+                f'trk{random.randrange(10 ** 9):09d}{j}': random_track_fields(j)
+                for j in range(songs_per_playlist)
+            }
+            track_pks = upsert_tracks(tracks)
+            bulk_insert(Song, (
+                Song(playlist=playlist, track_id=track_pks[track_id], position=j)
+                for j, track_id in enumerate(tracks)
+            ))
+    return playlists
+
+
+def random_track_fields(j):
+    """Catalog values with uniformly random audio features."""
+    return {
+        'name': f'Song {j}',
+        'artist': f'Artist {j % 97}',
+        'album': f'Album {j % 31}',
+        'duration_ms': random.randint(90000, 400000),
+        'popularity': random.randint(0, 100),
+        'energy': random.random(),
+        'danceability': random.random(),
+        'valence': random.random(),
+        'tempo': random.uniform(60, 200),
+    }
+
+
+@contextmanager
+def explicit_created_at(model):
+    """Let bulk inserts set ``created_at`` instead of ``auto_now_add`` overwriting it."""
+    field = model._meta.get_field('created_at')
+    auto_now_add, field.auto_now_add = field.auto_now_add, False
+    try:
+        yield
+    finally:
+        field.auto_now_add = auto_now_add
+
+
+def _backdated(now, days):
+    return now - timedelta(seconds=random.uniform(0, days * 86400))
+
+
+def create_voice_commands(users, count, days=365):
+    """Spread ``count`` voice commands across ``users`` over the last ``days``."""
+    now = timezone.now()
+    with explicit_created_at(VoiceCommand):
+        return bulk_insert(VoiceCommand, (
+            VoiceCommand(
+                user=users[i % len(users)],
+                raw_command=f'add song number {i} to my playlist',
+                parsed_action=random.choice(ACTIONS),
+                success=random.random() > 0.1,
+                created_at=_backdated(now, days),
+            )
+            for i in range(count)
+        ))
+
+
+def create_conversations(users, count, days=365):
+    """Spread ``count`` AI conversations across ``users`` over the last ``days``."""
+    now = timezone.now()
+    with explicit_created_at(AIConversation):
+        return bulk_insert(AIConversation, (
+            AIConversation(
+                user=users[i % len(users)],
+                user_message=f'suggest something like track {i}',
+                ai_response='Here are a few ideas.',
+                created_at=_backdated(now, days),
+            )
+            for i in range(count)
+        ))
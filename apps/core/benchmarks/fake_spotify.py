@@ -0,0 +1,191 @@
+"""
+In-process fake of the Spotify Web API for load tests.
+
+Serves the handful of endpoints the app calls (playlists, playlist items,
+search, audio features, token) from generated data, with a fixed per-request ``latency`` to
+stand in for the real network round trip. Point ``SPOTIFY_API_URL`` and
+``SPOTIFY_TOKEN_URL`` at ``api_url`` and ``token_url``.
+"""
+
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.fake.record()
+        owner = self.headers.get('Authorization', '').rpartition(' ')[2]
+        status, payload, *headers = self.server.fake.route(owner, url.path, parse_qs(url.query))
+        self._respond(status, payload, *headers)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.fake.record()
+        self._respond(*self.server.fake.token())
+
+
+class FakeSpotify:
+    """
+    Fake Spotify API giving every access token ``playlists`` playlists of
+    ``tracks_per_playlist`` tracks.
+
+    Playlist ids are derived from the caller's access token, since a playlist
+    can only belong to one local user; track ids are shared across users.
+    ``set_playlist`` replaces one playlist's generated tracks and snapshot,
+    ``rate_limit`` makes the next audio-features requests answer 429 and
+    ``reject_tokens`` makes token requests fail.
+    """
+
+    def __init__(self, playlists=10, tracks_per_playlist=100, latency=0.05):
+        self.latency = latency
+        self.playlist_count = playlists
+        self.tracks_per_playlist = tracks_per_playlist
+        self.requests = 0
+        # playlist number -> (snapshot_id, track ids)
+        self.playlists = {}
+        # Ids asked for by each audio-features request that was served.
+        self.audio_feature_batches = []
+        # Retry-After values for the next audio-features requests to reject.
+        self._rate_limits = []
+        self.token_requests = 0
+        self._reject_tokens = False
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        base = f'http://127.0.0.1:{self._server.server_port}'
+        self.api_url = f'{base}/v1/'
+        self.token_url = f'{base}/api/token'
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def set_playlist(self, number, track_ids, snapshot_id):
+        """Serve ``track_ids`` under ``snapshot_id`` as playlist ``number`` of every user."""
+        self.playlists[number] = (snapshot_id, list(track_ids))
+
+    def rate_limit(self, retry_after, times=1):
+        """Answer the next ``times`` audio-features requests with 429 and ``Retry-After``."""
+        with self._lock:
+            self._rate_limits.extend([retry_after] * times)
+
+    def reject_tokens(self, reject=True):
+        """Answer token requests with 400 ``invalid_grant`` until called with ``False``."""
+        self._reject_tokens = reject
+
+    def token(self):
+        with self._lock:
+            self.token_requests += 1
+        if self._reject_tokens:
+            return 400, {'error': 'invalid_grant', 'error_description': 'Refresh token revoked'}
+        return 200, {'access_token': 'fake-token', 'token_type': 'Bearer', 'expires_in': 3600}
+
+    def record(self):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+    @staticmethod
+    def track(track_id, name=None, artist='Fake Artist'):
+        return {
+            'id': track_id,
+            'name': name or f'Song {track_id}',
+            'type': 'track',
+            'artists': [{'name': artist}],
+            'album': {'name': 'Fake Album', 'images': []},
+            'duration_ms': 180000,
+            'popularity': 50,
+        }
+
+    @staticmethod
+    def audio_features(track_id):
+        """Features derived from the id; ids starting with ``nofeatures`` have none."""
+        if track_id.startswith('nofeatures'):
+            return None
+        seed = zlib.crc32(track_id.encode())
+        return {
+            'id': track_id,
+            'energy': seed % 100 / 100,
+            'danceability': seed // 100 % 100 / 100,
+            'valence': seed // 10_000 % 100 / 100,
+            'tempo': 60.0 + seed % 120,
+        }
+
+    def route(self, owner, path, query):
+        offset = int(query.get('offset', ['0'])[0])
+        limit = int(query.get('limit', ['50'])[0])
+        parts = path.strip('/').split('/')
+
+        if parts == ['v1', 'me', 'playlists']:
+            items = [
+                {'id': f'{zlib.crc32(owner.encode()):08x}pl{i}', 'name': f'Fake playlist {i}',
+                 'snapshot_id': self.playlists.get(i, ('snap',))[0], 'public': True, 'images': []}
+                for i in range(offset, min(offset + limit, self.playlist_count))
+            ]
+            return 200, self._page(items, offset, limit, self.playlist_count)
+
+        if len(parts) == 4 and parts[:2] == ['v1', 'playlists'] and parts[3] == 'tracks':
+            number = parts[2].rpartition('pl')[2]
+            if not number.isdigit():
+                return 404, {'error': {'status': 404, 'message': 'Not found'}}
+            track_ids = self.playlists.get(int(number), (None, None))[1]
+            if track_ids is None:
+                track_ids = [f'faketrk{int(number):04d}{j:05d}' for j in range(self.tracks_per_playlist)]
+            total = len(track_ids)
+            items = [{'track': self.track(track_id)} for track_id in track_ids[offset:offset + limit]]
+            return 200, self._page(items, offset, limit, total)
+
+        if parts == ['v1', 'search']:
+            text = query.get('q', [''])[0]
+            track_id = f'fakesearch{zlib.crc32(text.encode()):010d}'
+            name = text.split(' artist:')[0].removeprefix('track:')
+            return 200, {'tracks': self._page([self.track(track_id, name=name)], 0, limit, 1)}
+
+        if parts == ['v1', 'audio-features']:
+            ids = query.get('ids', [''])[0].split(',')
+            with self._lock:
+                retry_after = self._rate_limits.pop(0) if self._rate_limits else None
+                if retry_after is None:
+                    self.audio_feature_batches.append(ids)
+            if retry_after is not None:
+                error = {'error': {'status': 429, 'message': 'API rate limit exceeded'}}
+                return 429, error, {'Retry-After': str(retry_after)}
+            if len(ids) > 100:
+                return 400, {'error': {'status': 400, 'message': 'Too many ids requested'}}
+            return 200, {'audio_features': [self.audio_features(track_id) for track_id in ids]}
+
+        return 404, {'error': {'status': 404, 'message': 'Not found'}}
+
+    @staticmethod
+    def _page(items, offset, limit, total):
+        return {
+            'items': items,
+            'total': total,
+            'next': 'more' if offset + limit < total else None,
+        }
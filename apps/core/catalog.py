@@ -0,0 +1,71 @@
+"""
+Shared track catalog.
+
+Track metadata and audio features live once in ``Track``; playlists only
+hold ``Song`` membership rows pointing at it. ``upsert_tracks`` resolves
+Spotify track ids to catalog rows in bulk for every write path.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Track
+from .signals import track_metadata_changed
+
+TRACK_FIELDS = (
+    'name', 'artist', 'album', 'image_url', 'duration_ms', 'popularity',
+    'energy', 'danceability', 'valence', 'tempo',
+)
+LOOKUP_CHUNK_SIZE = 500
+
+
+def _existing_tracks(track_ids, fields):
+    tracks = {}
+    track_ids = list(track_ids)
+    for start in range(0, len(track_ids), LOOKUP_CHUNK_SIZE):
+        chunk = track_ids[start:start + LOOKUP_CHUNK_SIZE]
+        for track in Track.objects.filter(spotify_track_id__in=chunk).only('id', 'spotify_track_id', *fields):
+            tracks[track.spotify_track_id] = track
+    return tracks
+
+
+def upsert_tracks(values, refresh=False):
+    """
+    Make sure a ``Track`` exists for every key of ``values``.
+
+    ``values`` maps Spotify track ids to (possibly partial) column values used
+    for tracks that do not exist yet. With ``refresh=True`` existing tracks
+    whose given values differ are updated as well; that is one row per track
+    however many playlists contain it. Returns ``{spotify_track_id: track_pk}``.
+    """
+    fields = sorted({name for row in values.values() for name in row}) if refresh else []
+    tracks = _existing_tracks(values, fields)
+
+    missing = {track_id for track_id in values if track_id not in tracks}
+    if missing:
+        # ignore_conflicts covers a concurrent writer creating the same track.
+        Track.objects.bulk_create(
+            [Track(spotify_track_id=track_id, **values[track_id]) for track_id in missing],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        tracks.update(_existing_tracks(missing, []))
+
+    if refresh:
+        stale = [
+            track for track_id, track in tracks.items()
+            if track_id not in missing
+            and any(getattr(track, name) != value for name, value in values[track_id].items())
+        ]
+        now = timezone.now()
+        for track in stale:
+            for name, value in values[track.spotify_track_id].items():
+                setattr(track, name, value)
+            # bulk_update skips auto_now, so stamp it explicitly.
+            track.updated_at = now
+        if stale:
+            Track.objects.bulk_update(stale, fields + ['updated_at'], batch_size=500)
+            track_ids = [track.pk for track in stale]
+            transaction.on_commit(lambda: track_metadata_changed.send(sender=Track, track_ids=track_ids))
+
+    return {track_id: track.pk for track_id, track in tracks.items()}
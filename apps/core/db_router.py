@@ -0,0 +1,54 @@
+"""
+Database router sending opted-in reads to a read replica.
+
+Reads go to the ``replica`` alias only inside ``use_read_replica()`` (set by
+``apps.api.mixins.ReadReplicaMixin`` for read-only viewset actions) and only
+when that alias is configured. Everything else, including every write, uses
+``default``.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+
+_read_replica = ContextVar('read_replica', default=False)
+
+
+def replica_enabled():
+    if REPLICA_DB_ALIAS not in settings.DATABASES:
+        return False
+    # Under test the alias mirrors the primary's test database; reading it
+    # through a second connection would only miss the test's uncommitted rows.
+    return connections[REPLICA_DB_ALIAS].settings_dict['NAME'] != connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+
+
+@contextmanager
+def use_read_replica(enabled=True):
+    """Route reads made inside the block to the replica."""
+    token = _read_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_replica.reset(token)
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _read_replica.get() and replica_enabled():
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data, so cross-alias relations are fine.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives schema changes through replication.
+        return db == DEFAULT_DB_ALIAS
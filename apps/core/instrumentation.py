@@ -0,0 +1,185 @@
+"""
+Per-request wall time, SQL, serialization and response rendering costs.
+
+``PerformanceMiddleware`` starts a ``RequestTimings`` for each request in a
+context variable. ``time_query``, installed on every database connection as
+it opens, adds each SQL statement run while that variable is set, including
+statements run through ``sync_to_async`` in async views, since asgiref copies
+the context across. Serializers built on ``apps.api.serializers.
+TimedSerializerMixin`` add the time spent turning instances into primitives
+(``serialize``) through ``timed_serialization``; queries their fields run
+count under both ``db`` and ``serialize``. Rendering those primitives to
+bytes (``render``) is timed between ``process_template_response`` and the
+response's post-render callback, so it covers DRF's renderers.
+
+Each request then gets a ``Server-Timing`` header (``PERF_SERVER_TIMING``),
+is recorded in the ``apps.core.metrics`` histograms, and is logged as a
+warning when it takes ``PERF_SLOW_REQUEST_MS`` or longer.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serializing = False
+        self.serialize_seconds = 0.0
+        self.render_started = None
+        self.render_seconds = 0.0
+
+    def rendered(self, response):
+        if self.render_started is not None:
+            self.render_seconds += time.perf_counter() - self.render_started
+            self.render_started = None
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each statement to the current request's timings."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.query_seconds += time.perf_counter() - started
+
+
+@contextmanager
+def timed_serialization():
+    """Add the time spent in the block to the current request's ``serialize`` phase.
+
+    Blocks nested inside another one (a nested serializer) are not counted twice.
+    """
+    timings = _current.get()
+    if timings is None or timings.serializing:
+        yield
+        return
+    timings.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.serialize_seconds += time.perf_counter() - started
+        timings.serializing = False
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``time_query`` to new connections."""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def view_label(request):
+    """Low-cardinality name of the view that handled ``request``."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+def _user_id(request):
+    # Only a user already loaded by the view: loading it here could query the
+    # database from an async context.
+    user = getattr(request, '_cached_user', None)
+    if user is None and not isinstance(getattr(request, 'user', None), SimpleLazyObject):
+        user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+class PerformanceMiddleware:
+    """Times each request; see the module docstring."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, timings)
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, timings)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before the response (DRF's included) is rendered.
+        timings = _current.get()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+            response.add_post_render_callback(timings.rendered)
+        return response
+
+    def record(self, request, response, timings):
+        elapsed = time.perf_counter() - timings.started
+        view = view_label(request)
+        if view == 'metrics':
+            return
+        method = request.method
+        metrics.REQUESTS.inc(view, method, str(response.status_code))
+        metrics.REQUEST_SECONDS.observe(elapsed, view, method)
+        metrics.DB_QUERIES.observe(timings.queries, view, method)
+        metrics.DB_SECONDS.observe(timings.query_seconds, view, method)
+        metrics.SERIALIZE_SECONDS.observe(timings.serialize_seconds, view, method)
+        metrics.RENDER_SECONDS.observe(timings.render_seconds, view, method)
+
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings.query_seconds * 1000:.1f};desc="{timings.queries} queries"',
+                f'serialize;dur={timings.serialize_seconds * 1000:.1f}',
+                f'render;dur={timings.render_seconds * 1000:.1f}',
+                f'total;dur={elapsed * 1000:.1f}',
+            ])
+        if elapsed * 1000 >= settings.PERF_SLOW_REQUEST_MS:
+            fields = {
+                'view': view,
+                'method': method,
+                'path': request.path,
+                'status': response.status_code,
+                'user_id': _user_id(request),
+                'duration_ms': round(elapsed * 1000, 1),
+                'db_queries': timings.queries,
+                'db_ms': round(timings.query_seconds * 1000, 1),
+                'serialize_ms': round(timings.serialize_seconds * 1000, 1),
+                'render_ms': round(timings.render_seconds * 1000, 1),
+            }
+            logger.warning('Slow request %s', json.dumps(fields), extra={'perf': fields})
@@ -0,0 +1,20 @@
+"""
+Row locks for read-modify-write transactions.
+"""
+
+from django.db.models import F
+
+
+def lock_row(queryset):
+    """
+    Lock the rows ``queryset`` matches until the surrounding transaction ends.
+
+    Call it first thing inside ``transaction.atomic()``, before reading what
+    is about to be rewritten. It is a no-op write rather than
+    ``select_for_update()``, which SQLite ignores: the write takes the row lock
+    on PostgreSQL and the database write lock on SQLite, so concurrent
+    transactions queue up here instead of failing to upgrade a read lock or
+    working from the same stale read.
+    """
+    pk = queryset.model._meta.pk.attname
+    queryset.update(**{pk: F(pk)})
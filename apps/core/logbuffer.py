@@ -0,0 +1,270 @@
+"""
+Buffered, batched inserts for append-only log rows.
+
+``VoiceCommand`` and ``AIConversation`` rows are never read back by the
+request that creates them, so views hand them to ``LogWriter.add`` and
+respond without waiting for an INSERT. A background thread writes them with
+one ``bulk_create`` per model once ``LOG_BUFFER_MAX_ROWS`` rows are waiting
+or ``LOG_BUFFER_FLUSH_SECONDS`` have passed.
+
+Rows that cannot be inserted -- the database is unavailable, or the process
+is exiting and the final flush fails -- are appended to a JSON-lines spool
+file in ``LOG_SPOOL_DIR``; the next successful flush in any process replays
+them. A process killed with SIGKILL loses at most one flush interval of rows.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core import serializers
+from django.core.serializers.base import DeserializationError
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+
+from .signals import log_rows_written
+
+logger = logging.getLogger(__name__)
+
+SPOOL_SUFFIX = '.jsonl'
+
+
+class LogWriter:
+    """Queues unsaved model instances and inserts them in batches."""
+
+    def __init__(self, max_rows=200, flush_seconds=2.0, spool_dir=None, batch_size=500):
+        self.max_rows = max_rows
+        self.flush_seconds = flush_seconds
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self.batch_size = batch_size
+        self._rows = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._queued = 0
+        self._written = 0
+        self._dropped = 0
+        self._flushes = 0
+        self._flush_seconds_total = 0.0
+        self._spooled = 0
+        self._replayed = 0
+
+    def add(self, row):
+        """Queue ``row`` for insertion; returns immediately."""
+        with self._lock:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                self._rows.append(row)
+                self._queued += 1
+                pending = len(self._rows)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+                    self._thread.start()
+        if closed:
+            # Late writes during shutdown go straight to the database.
+            self._insert([row])
+        elif pending >= self.max_rows:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Log writer flush failed')
+            finally:
+                # The thread outlives requests, so release the connection like a request would.
+                close_old_connections()
+
+    def flush(self):
+        """Insert every queued row now; returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            written = self._insert(rows) if rows else 0
+            if self.spool_dir is not None and (written or not rows):
+                written += self.replay()
+            return written
+
+    def _insert(self, rows):
+        started = time.perf_counter()
+        by_model = defaultdict(list)
+        for row in rows:
+            by_model[type(row)].append(row)
+
+        written = 0
+        for model, batch in by_model.items():
+            try:
+                written += self._bulk_create(model, batch)
+            except DatabaseError:
+                logger.exception('Could not write %s %s rows; spooling them', len(batch), model.__name__)
+                self.spool(batch)
+
+        with self._lock:
+            self._written += written
+            self._flushes += 1
+            self._flush_seconds_total += time.perf_counter() - started
+        return written
+
+    def _bulk_create(self, model, rows):
+        written = self._bulk_create_rows(model, rows)
+        if written:
+            # Receivers must not turn written rows into a failed flush.
+            for receiver, result in log_rows_written.send_robust(sender=model, count=written):
+                if isinstance(result, Exception):
+                    logger.error('log_rows_written receiver %r failed: %s', receiver, result)
+        return written
+
+    def _bulk_create_rows(self, model, rows):
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+            return len(rows)
+        except IntegrityError:
+            pass
+        # One bad row (say, its user was deleted meanwhile) must not sink the
+        # batch: retry row by row and drop the ones that still fail.
+        written = 0
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([row])
+                written += 1
+            except IntegrityError as exc:
+                logger.warning('Dropping %s log row: %s', model.__name__, exc)
+                with self._lock:
+                    self._dropped += 1
+        return written
+
+    def spool(self, rows):
+        """Append ``rows`` to a new spool file for a later flush to replay."""
+        if self.spool_dir is None:
+            logger.error('No LOG_SPOOL_DIR configured; %s log rows lost', len(rows))
+            return
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        name = f'{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._write_spool_file(self.spool_dir / f'{name}{SPOOL_SUFFIX}', rows)
+        with self._lock:
+            self._spooled += len(rows)
+
+    @staticmethod
+    def _write_spool_file(path, rows):
+        # Write then rename, so a replay never reads a half-written file.
+        partial = path.with_suffix('.tmp')
+        with open(partial, 'w') as handle:
+            for row in rows:
+                handle.write(serializers.serialize('json', [row]) + '\n')
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(partial, path)
+
+    def replay(self):
+        """Insert rows from spool files, deleting each file once it is written."""
+        if not self.spool_dir.is_dir():
+            return 0
+        replayed = 0
+        for path in sorted(self.spool_dir.glob(f'*{SPOOL_SUFFIX}')):
+            claimed = path.with_suffix(f'.{os.getpid()}.replaying')
+            try:
+                # Renaming claims the file, so two processes never replay it twice.
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            try:
+                with open(claimed) as handle:
+                    rows = [
+                        obj.object
+                        for line in handle if line.strip()
+                        for obj in serializers.deserialize('json', line)
+                    ]
+            except DeserializationError:
+                logger.exception('Unreadable log spool file %s; set aside', path.name)
+                os.rename(claimed, path.with_suffix('.bad'))
+                continue
+            by_model = defaultdict(list)
+            for row in rows:
+                by_model[type(row)].append(row)
+            written_models = set()
+            try:
+                for model, batch in by_model.items():
+                    replayed += self._bulk_create(model, batch)
+                    written_models.add(model)
+            except DatabaseError:
+                logger.exception('Could not replay %s; will retry', path.name)
+                if written_models:
+                    # Put back only the models not yet written, so the retry
+                    # does not insert the others a second time.
+                    self._write_spool_file(path, [row for row in rows if type(row) not in written_models])
+                    claimed.unlink()
+                else:
+                    os.rename(claimed, path)
+                break
+            claimed.unlink()
+        with self._lock:
+            self._written += replayed
+            self._replayed += replayed
+        return replayed
+
+    def close(self):
+        """Stop the background thread and write out, or spool, whatever is queued."""
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 5)
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if rows:
+                self._insert(rows)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._rows),
+                'queued': self._queued,
+                'written': self._written,
+                'dropped': self._dropped,
+                'flushes': self._flushes,
+                'avg_flush_ms': round(self._flush_seconds_total / self._flushes * 1000, 2) if self._flushes else 0.0,
+                'spooled': self._spooled,
+                'replayed': self._replayed,
+            }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """The process-wide log writer; flushed (or spooled) at interpreter exit."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogWriter(
+                    max_rows=settings.LOG_BUFFER_MAX_ROWS,
+                    flush_seconds=settings.LOG_BUFFER_FLUSH_SECONDS,
+                    spool_dir=settings.LOG_SPOOL_DIR,
+                )
+                atexit.register(_writer.close)
+    return _writer
+
+
+def write_log(row):
+    """Queue ``row`` on the log writer, or save it now if buffering is off."""
+    if not settings.LOG_BUFFER_ENABLED:
+        row.save()
+        return
+    get_log_writer().add(row)
@@ -0,0 +1,90 @@
+"""
+Seed a throwaway database and check that hot queries use the intended indexes.
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.core.benchmarks.database import benchmark_database
+from apps.core.benchmarks.factories import (
+    create_conversations, create_playlists, create_users, create_voice_commands
+)
+from apps.core.models import AIConversation, Song, VoiceCommand
+
+
+class Command(BaseCommand):
+    help = 'Benchmark index usage for the hot per-user queries at large row counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000,
+                            help='Voice commands and AI conversations to seed.')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--songs', type=int, default=10_000,
+                            help='Songs in the benchmarked playlist.')
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='Executions per query when timing.')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Reuse an already seeded benchmark database.')
+        parser.add_argument('--json', action='store_true', help='Print a JSON report.')
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            if not VoiceCommand.objects.exists():
+                self.seed(options)
+            self.analyze()
+            report = self.run_checks(options['repeat'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            for row in report:
+                marker = 'ok' if row['uses_index'] else 'MISSING'
+                self.stdout.write(
+                    f"{row['name']:<32} {row['avg_ms']:>8.3f} ms  index {row['index']} [{marker}]"
+                )
+        failed = [row['name'] for row in report if not row['uses_index']]
+        if failed:
+            raise CommandError(f'Queries not using their index: {", ".join(failed)}')
+
+    def seed(self, options):
+        started = time.perf_counter()
+        users = create_users(options['users'])
+        create_playlists(users[0], 1, songs_per_playlist=options['songs'])
+        create_voice_commands(users, options['rows'])
+        create_conversations(users, options['rows'])
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+    def analyze(self):
+        # Refresh planner statistics so plans reflect the seeded distribution.
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def run_checks(self, repeat):
+        user_id = VoiceCommand.objects.values_list('user_id', flat=True).first()
+        playlist_id = Song.objects.values_list('playlist_id', flat=True).first()
+        checks = [
+            ('voice_commands.recent', 'core_vc_user_created_idx',
+             VoiceCommand.objects.filter(user_id=user_id).order_by('-created_at')[:10]),
+            ('conversations.recent', 'core_aiconv_user_created_idx',
+             AIConversation.objects.filter(user_id=user_id).order_by('-created_at')[:20]),
+            ('playlist.songs.page', 'core_song_playlist_pos_idx',
+             Song.objects.filter(playlist_id=playlist_id).order_by('position', 'id')[:100]),
+        ]
+        report = []
+        for name, index, queryset in checks:
+            plan = queryset.explain()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset._chain())
+            elapsed = (time.perf_counter() - started) / repeat
+            report.append({
+                'name': name,
+                'index': index,
+                'uses_index': index in plan,
+                'avg_ms': elapsed * 1000,
+                'plan': plan,
+            })
+        return report
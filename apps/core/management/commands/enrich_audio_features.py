@@ -0,0 +1,48 @@
+"""
+Fetch Spotify audio features for catalog tracks that have none.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.spotify.client import SpotifyNotConfigured
+from apps.core.spotify.enrichment import AudioFeatureEnricher, pending_tracks
+
+
+class Command(BaseCommand):
+    help = 'Enrich tracks with Spotify audio features in rate-limited concurrent batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Stop after this many tracks (default: all pending).')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Concurrent requests (default: SPOTIFY_ENRICH_WORKERS).')
+        parser.add_argument('--rate', type=float, default=None,
+                            help='Requests per second shared by all workers (default: SPOTIFY_ENRICH_RATE).')
+        parser.add_argument('--json', action='store_true', help='Print a JSON report.')
+
+    def handle(self, *args, **options):
+        pending = pending_tracks().count()
+        if not pending:
+            self.stdout.write('No tracks are missing audio features.')
+            return
+
+        def report(done, total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {done}/{total}')
+
+        enricher = AudioFeatureEnricher(workers=options['workers'], rate=options['rate'])
+        try:
+            result = enricher.run(limit=options['limit'], progress=report)
+        except SpotifyNotConfigured as exc:
+            raise CommandError(str(exc))
+
+        if options['json']:
+            self.stdout.write(json.dumps(result.as_dict(), indent=2))
+            return
+        self.stdout.write(
+            f'{result.tracks_enriched} enriched, {result.tracks_without_features} without features, '
+            f'{result.failed_batches} of {result.batches} batches failed '
+            f'({result.rate_limited} rate-limited responses, {result.throttled_seconds:.1f}s throttled)'
+        )
@@ -0,0 +1,37 @@
+"""
+Delete voice command and AI conversation logs older than the retention window.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.core.logbuffer import get_log_writer
+from apps.core.retention import prune_logs
+
+
+class Command(BaseCommand):
+    help = 'Delete VoiceCommand and AIConversation rows past LOG_RETENTION_DAYS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Keep this many days of logs (default: LOG_RETENTION_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows per DELETE (default: LOG_PRUNE_BATCH_SIZE).')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows to delete.')
+        parser.add_argument('--replay-spool', action='store_true',
+                            help='First insert log rows waiting in LOG_SPOOL_DIR.')
+
+    def handle(self, *args, **options):
+        if options['replay_spool']:
+            self.stdout.write(f'{get_log_writer().flush()} spooled rows replayed')
+
+        def report(model, total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {model._meta.label}: {total}')
+
+        deleted = prune_logs(
+            days=options['days'], batch_size=options['batch_size'],
+            dry_run=options['dry_run'], progress=report,
+        )
+        verb = 'would be deleted' if options['dry_run'] else 'deleted'
+        for label, count in deleted.items():
+            self.stdout.write(f'{label}: {count} rows {verb}')
@@ -0,0 +1,137 @@
+"""
+In-process request metrics in the Prometheus text format.
+
+``PerformanceMiddleware`` records every request into the histograms below and
+``GET /metrics`` renders them. Each process keeps its own counts: scrape every
+worker process (or run one per container) and let Prometheus sum them.
+"""
+
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+
+class Histogram:
+    """Fixed-bucket histogram; bucket counts are made cumulative when rendered."""
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        # labels -> [count per bucket..., overflow count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), values[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _number(bound)
+                yield f'{self.name}_bucket{_labels(self.labelnames, labels, [("le", le)])} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(values[-1])}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}'
+
+
+REQUESTS = Counter(
+    'http_requests_total', 'Requests handled, by view, method and status.', ('view', 'method', 'status'),
+)
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Wall time spent handling the request.', DURATION_BUCKETS,
+    ('view', 'method'),
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries executed per request.', QUERY_COUNT_BUCKETS, ('view', 'method'),
+)
+DB_SECONDS = Histogram(
+    'http_request_db_duration_seconds', 'Time spent executing SQL per request.', DURATION_BUCKETS,
+    ('view', 'method'),
+)
+SERIALIZE_SECONDS = Histogram(
+    'http_request_serialize_duration_seconds', 'Time spent in serializers building the response data.',
+    DURATION_BUCKETS, ('view', 'method'),
+)
+RENDER_SECONDS = Histogram(
+    'http_request_render_duration_seconds', 'Time spent rendering the response body.', DURATION_BUCKETS,
+    ('view', 'method'),
+)
+METRICS = (REQUESTS, REQUEST_SECONDS, DB_QUERIES, DB_SECONDS, SERIALIZE_SECONDS, RENDER_SECONDS)
+
+
+def render_metrics():
+    return '\n'.join(line for metric in METRICS for line in metric.render()) + '\n'
+
+
+def _authorized(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return header.startswith('Bearer ') and constant_time_compare(header[len('Bearer '):], token)
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def metrics_view(request):
+    """``GET /metrics``: ``METRICS_TOKEN`` as a bearer token, or a staff session."""
+    if request.method != 'GET':
+        return HttpResponse(status=405, headers={'Allow': 'GET'})
+    if not _authorized(request):
+        return HttpResponse('Forbidden\n', status=403, content_type=CONTENT_TYPE)
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
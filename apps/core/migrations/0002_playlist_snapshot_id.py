@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='snapshot_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
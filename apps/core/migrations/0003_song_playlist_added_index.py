@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_playlist_snapshot_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['playlist', 'added_at', 'id'], name='core_song_playlist_added_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_song_playlist_added_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_song_position'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aiconversation',
+            index=models.Index(fields=['user', '-created_at'], name='core_aiconv_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voicecommand',
+            index=models.Index(fields=['user', '-created_at'], name='core_vc_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_created_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voicecommand',
+            name='parse_latency_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='voicecommand',
+            name='parse_source',
+            field=models.CharField(choices=[('client', 'Client'), ('rule', 'Rule Grammar'), ('llm', 'LLM')], default='client', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_voicecommand_parse_source'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='voicecommand',
+            name='parse_source',
+            field=models.CharField(choices=[('client', 'Client'), ('rule', 'Rule Grammar'), ('llm', 'LLM'), ('llm_cache', 'LLM (cached)')], default='client', max_length=20),
+        ),
+    ]
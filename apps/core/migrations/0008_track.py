@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_voicecommand_llm_cache_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Track',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('spotify_track_id', models.CharField(max_length=255, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('artist', models.CharField(max_length=255)),
+                ('album', models.CharField(blank=True, max_length=255, null=True)),
+                ('image_url', models.URLField(blank=True, null=True)),
+                ('duration_ms', models.IntegerField(default=0)),
+                ('popularity', models.IntegerField(default=0)),
+                ('energy', models.FloatField(blank=True, null=True)),
+                ('danceability', models.FloatField(blank=True, null=True)),
+                ('valence', models.FloatField(blank=True, null=True)),
+                ('tempo', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Track',
+                'verbose_name_plural': 'Tracks',
+            },
+        ),
+        # Dropped here rather than in 0010 so that, when migrating backwards,
+        # it is restored only after 0009 has copied the track ids back.
+        migrations.AlterUniqueTogether(
+            name='song',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='track',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='songs', to='core.track'),
+        ),
+    ]
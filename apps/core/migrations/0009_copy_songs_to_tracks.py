@@ -0,0 +1,87 @@
+"""
+Move per-playlist song metadata into the shared Track catalog.
+
+Songs are processed in keyset-ordered chunks so memory and transaction
+size stay bounded on large tables.
+"""
+
+from django.db import migrations
+
+CHUNK_SIZE = 5000
+FEATURES = ('energy', 'danceability', 'valence', 'tempo')
+TRACK_FIELDS = ('name', 'artist', 'album', 'image_url', 'duration_ms', 'popularity') + FEATURES
+
+
+def copy_songs_to_tracks(apps, schema_editor):
+    Song = apps.get_model('core', 'Song')
+    Track = apps.get_model('core', 'Track')
+    db = schema_editor.connection.alias
+    songs = Song.objects.using(db).filter(track__isnull=True).order_by('id')
+
+    last_id = 0
+    while True:
+        rows = list(songs.filter(id__gt=last_id).values('id', 'spotify_track_id', *TRACK_FIELDS)[:CHUNK_SIZE])
+        if not rows:
+            return
+        last_id = rows[-1]['id']
+
+        # Among copies of one track, prefer a row that has audio features.
+        by_track = {}
+        for row in rows:
+            current = by_track.get(row['spotify_track_id'])
+            if current is None or (current['energy'] is None and row['energy'] is not None):
+                by_track[row['spotify_track_id']] = row
+        Track.objects.using(db).bulk_create(
+            [Track(spotify_track_id=track_id, **{name: row[name] for name in TRACK_FIELDS})
+             for track_id, row in by_track.items()],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+        tracks = Track.objects.using(db).filter(spotify_track_id__in=by_track).in_bulk(field_name='spotify_track_id')
+        # A track created by an earlier chunk may have come from a copy without features.
+        enriched = []
+        for track_id, row in by_track.items():
+            track = tracks[track_id]
+            if track.energy is None and row['energy'] is not None:
+                for name in FEATURES:
+                    setattr(track, name, row[name])
+                enriched.append(track)
+        if enriched:
+            Track.objects.using(db).bulk_update(enriched, FEATURES, batch_size=1000)
+
+        Song.objects.using(db).bulk_update(
+            [Song(id=row['id'], track_id=tracks[row['spotify_track_id']].id) for row in rows],
+            ['track'],
+            batch_size=1000,
+        )
+
+
+def copy_tracks_to_songs(apps, schema_editor):
+    Song = apps.get_model('core', 'Song')
+    db = schema_editor.connection.alias
+    songs = Song.objects.using(db).filter(track__isnull=False).order_by('id')
+    columns = [f'track__{name}' for name in ('spotify_track_id',) + TRACK_FIELDS]
+
+    last_id = 0
+    while True:
+        rows = list(songs.filter(id__gt=last_id).values_list('id', *columns)[:CHUNK_SIZE])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        Song.objects.using(db).bulk_update(
+            [Song(id=row[0], **dict(zip(('spotify_track_id',) + TRACK_FIELDS, row[1:]))) for row in rows],
+            ('spotify_track_id',) + TRACK_FIELDS,
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_track'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_songs_to_tracks, copy_tracks_to_songs),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_copy_songs_to_tracks'),
+    ]
+
+    operations = [
+        # Defaults only matter when migrating backwards: they let the removed
+        # NOT NULL columns be re-added before 0009 copies the values back.
+        migrations.AlterField(
+            model_name='song',
+            name='spotify_track_id',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='song',
+            name='name',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='song',
+            name='artist',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='song',
+            name='track',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='songs', to='core.track'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='song',
+            unique_together={('playlist', 'track')},
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='album',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='artist',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='danceability',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='duration_ms',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='energy',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='image_url',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='popularity',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='spotify_track_id',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='tempo',
+        ),
+        migrations.RemoveField(
+            model_name='song',
+            name='valence',
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_song_track_membership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='audio_features_fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='track',
+            index=models.Index(fields=['audio_features_fetched_at', 'id'], name='core_track_features_idx'),
+        ),
+    ]
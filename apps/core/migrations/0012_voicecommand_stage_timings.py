@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_track_audio_features_fetched_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voicecommand',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
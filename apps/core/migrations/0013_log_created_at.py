@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_voicecommand_stage_timings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aiconversation',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='voicecommand',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='aiconversation',
+            index=models.Index(fields=['created_at'], name='core_aiconv_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voicecommand',
+            index=models.Index(fields=['created_at'], name='core_vc_created_idx'),
+        ),
+    ]
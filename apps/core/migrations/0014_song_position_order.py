@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+def number_positions(apps, schema_editor):
+    """
+    Renumber every playlist's songs 0..n-1 in their current order.
+
+    Songs stored before positions existed all have position 0, so they keep
+    their old ``(added_at, id)`` order; playlists already numbered are only
+    compacted.
+    """
+    Song = apps.get_model('core', 'Song')
+    db = schema_editor.connection.alias
+    playlist_ids = Song.objects.using(db).order_by().values_list('playlist_id', flat=True).distinct()
+    for playlist_id in playlist_ids.iterator():
+        rows = (
+            Song.objects.using(db).filter(playlist_id=playlist_id)
+            .order_by('position', 'added_at', 'id').values_list('id', 'position')
+        )
+        changed = [
+            Song(id=pk, position=index)
+            for index, (pk, position) in enumerate(rows)
+            if position != index
+        ]
+        Song.objects.using(db).bulk_update(changed, ['position'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_log_created_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(number_positions, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='song',
+            name='core_song_playlist_added_idx',
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['playlist', 'position', 'id'], name='core_song_playlist_pos_idx'),
+        ),
+    ]
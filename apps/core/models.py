@@ -41,6 +41,7 @@ class Playlist(models.Model):
     # Metadata
     is_public = models.BooleanField(default=False)
     total_tracks = models.IntegerField(default=0)
+    snapshot_id = models.CharField(max_length=255, blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -55,10 +56,9 @@ class Playlist(models.Model):
         unique_together = ('user', 'spotify_playlist_id')
 
 
-class Song(models.Model):
-    """Song in a playlist."""
-    playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE, related_name='songs')
-    spotify_track_id = models.CharField(max_length=255)
+class Track(models.Model):
+    """Spotify track, stored once and shared by every playlist that contains it."""
+    spotify_track_id = models.CharField(max_length=255, unique=True)
     name = models.CharField(max_length=255)
     artist = models.CharField(max_length=255)
     album = models.CharField(max_length=255, blank=True, null=True)
@@ -73,16 +73,45 @@ class Song(models.Model):
     danceability = models.FloatField(null=True, blank=True)
     valence = models.FloatField(null=True, blank=True)
     tempo = models.FloatField(null=True, blank=True)
+    # Set once Spotify was asked for audio features, even if it had none.
+    audio_features_fetched_at = models.DateTimeField(null=True, blank=True)
     
-    added_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.name} - {self.artist}"
     
+    class Meta:
+        verbose_name = "Track"
+        verbose_name_plural = "Tracks"
+        indexes = [
+            # Enrichment scans for tracks that were never looked up.
+            models.Index(fields=['audio_features_fetched_at', 'id'], name='core_track_features_idx'),
+        ]
+
+
+class Song(models.Model):
+    """Membership of a track in a playlist."""
+    playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE, related_name='songs')
+    track = models.ForeignKey(Track, on_delete=models.PROTECT, related_name='songs')
+    
+    # Zero-based order within the playlist
+    position = models.PositiveIntegerField(default=0)
+    
+    added_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return str(self.track)
+    
     class Meta:
         verbose_name = "Song"
         verbose_name_plural = "Songs"
-        unique_together = ('playlist', 'spotify_track_id')
+        unique_together = ('playlist', 'track')
+        indexes = [
+            # Playlist order, and keyset pagination of a playlist's songs.
+            models.Index(fields=['playlist', 'position', 'id'], name='core_song_playlist_pos_idx'),
+        ]
 
 
 class VoiceCommand(models.Model):
@@ -95,6 +124,12 @@ class VoiceCommand(models.Model):
         ('get_suggestions', 'Get Suggestions'),
         ('unknown', 'Unknown'),
     ]
+    PARSE_SOURCE_CHOICES = [
+        ('client', 'Client'),
+        ('rule', 'Rule Grammar'),
+        ('llm', 'LLM'),
+        ('llm_cache', 'LLM (cached)'),
+    ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='voice_commands')
     raw_command = models.TextField()
@@ -102,7 +137,14 @@ class VoiceCommand(models.Model):
     success = models.BooleanField(default=False)
     error_message = models.TextField(blank=True, null=True)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Which parser path resolved the command, and how long it took
+    parse_source = models.CharField(max_length=20, choices=PARSE_SOURCE_CHOICES, default='client')
+    parse_latency_ms = models.FloatField(null=True, blank=True)
+    # Milliseconds per stage for commands run by the execute endpoint
+    stage_timings = models.JSONField(default=dict, blank=True)
+    
+    # Set when the row is built, not inserted: rows are written in batches
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     def __str__(self):
         return f"{self.user.username} - {self.parsed_action}"
@@ -110,6 +152,10 @@ class VoiceCommand(models.Model):
     class Meta:
         verbose_name = "Voice Command"
         verbose_name_plural = "Voice Commands"
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='core_vc_user_created_idx'),
+            models.Index(fields=['created_at'], name='core_vc_created_idx'),
+        ]
 
 
 class AIConversation(models.Model):
@@ -120,7 +166,7 @@ class AIConversation(models.Model):
     user_message = models.TextField()
     ai_response = models.TextField()
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     def __str__(self):
         return f"{self.user.username} - {self.created_at}"
@@ -128,4 +174,8 @@ class AIConversation(models.Model):
     class Meta:
         verbose_name = "AI Conversation"
         verbose_name_plural = "AI Conversations"
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='core_aiconv_user_created_idx'),
+            models.Index(fields=['created_at'], name='core_aiconv_created_idx'),
+        ]
 
@@ -0,0 +1,122 @@
+"""
+Batched song mutations for a single playlist.
+
+``apply_song_operations`` applies an ordered list of add, remove and move
+operations inside one transaction, using one ``bulk_create``, one
+``DELETE ... IN`` and one ``bulk_update`` regardless of batch size.
+"""
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .catalog import upsert_tracks
+from .locking import lock_row
+from .models import Playlist, Song
+from .signals import playlist_songs_changed
+
+SONG_ATTRIBUTES = ('name', 'artist', 'album', 'image_url', 'duration_ms', 'popularity')
+
+
+def apply_song_operations(playlist, operations):
+    """
+    Apply validated operations to ``playlist`` and return per-item results.
+
+    Each operation is a dict with ``op`` (``add``, ``remove`` or ``move``) and
+    ``spotify_track_id``; ``add`` also carries track attributes and ``move`` a
+    zero-based target ``position``. Operations are applied in order, so a
+    later operation sees the effect of earlier ones.
+    """
+    needs_order = any(operation['op'] == 'move' for operation in operations)
+
+    with transaction.atomic():
+        lock_row(Playlist.objects.filter(pk=playlist.pk))
+
+        songs = playlist.songs.order_by('position', 'added_at', 'id')
+        if not needs_order:
+            track_ids = {operation['spotify_track_id'] for operation in operations}
+            songs = songs.filter(track__spotify_track_id__in=track_ids)
+        rows = list(songs.values_list('track__spotify_track_id', 'id', 'position'))
+
+        existing = {track_id: (pk, position) for track_id, pk, position in rows}
+        order = [track_id for track_id, pk, position in rows] if needs_order else None
+        pending = {}
+        removed = set()
+        results = []
+
+        for index, operation in enumerate(operations):
+            track_id = operation['spotify_track_id']
+            present = (track_id in existing and track_id not in removed) or track_id in pending
+            result = {'index': index, 'op': operation['op'], 'spotify_track_id': track_id}
+
+            if operation['op'] == 'add':
+                if present:
+                    result['status'] = 'exists'
+                else:
+                    # A removed song added back is deleted and inserted again,
+                    # so it ends up where this add puts it.
+                    pending[track_id] = {key: operation[key] for key in SONG_ATTRIBUTES if key in operation}
+                    if order is not None:
+                        order.append(track_id)
+                    result['status'] = 'added'
+            elif operation['op'] == 'remove':
+                if not present:
+                    result['status'] = 'not_found'
+                else:
+                    if pending.pop(track_id, None) is None:
+                        removed.add(track_id)
+                    if order is not None:
+                        order.remove(track_id)
+                    result['status'] = 'removed'
+            elif operation['op'] == 'move':
+                if not present:
+                    result['status'] = 'not_found'
+                else:
+                    order.remove(track_id)
+                    position = min(operation['position'], len(order))
+                    order.insert(position, track_id)
+                    result['status'] = 'moved'
+                    result['position'] = position
+            results.append(result)
+
+        if removed:
+            Song.objects.filter(id__in=[existing[track_id][0] for track_id in removed]).delete()
+
+        if order is not None:
+            positions = {track_id: position for position, track_id in enumerate(order)}
+        else:
+            start = 0
+            if pending:
+                last = playlist.songs.aggregate(last=Max('position'))['last']
+                start = 0 if last is None else last + 1
+            positions = {track_id: start + offset for offset, track_id in enumerate(pending)}
+
+        if pending:
+            # Attributes only seed tracks new to the catalog; known tracks keep theirs.
+            track_pks = upsert_tracks(pending)
+            Song.objects.bulk_create(
+                [Song(playlist=playlist, track_id=track_pks[track_id], position=positions[track_id])
+                 for track_id in pending],
+                ignore_conflicts=True,
+            )
+
+        if order is not None:
+            moved = [
+                Song(id=pk, position=positions[track_id])
+                for track_id, (pk, position) in existing.items()
+                if track_id in positions and track_id not in removed and positions[track_id] != position
+            ]
+            if moved:
+                Song.objects.bulk_update(moved, ['position'], batch_size=500)
+
+        if pending or removed or needs_order:
+            playlist.total_tracks = playlist.songs.count()
+            playlist.updated_at = timezone.now()
+            Playlist.objects.filter(pk=playlist.pk).update(
+                total_tracks=playlist.total_tracks, updated_at=playlist.updated_at
+            )
+            transaction.on_commit(
+                lambda: playlist_songs_changed.send(sender=Playlist, playlist=playlist)
+            )
+
+    return results
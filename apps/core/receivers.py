@@ -0,0 +1,26 @@
+"""
+Signal receivers for the core app.
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from apps.jobs.queue import enqueue
+from .instrumentation import install_query_timer
+from .signals import playlist_songs_changed
+from .spotify.enrichment import pending_tracks
+
+
+@receiver(playlist_songs_changed, dispatch_uid='core.enrich_new_tracks')
+def enrich_new_tracks(sender, playlist, **kwargs):
+    """Queue an audio-feature lookup when a playlist gained tracks without features."""
+    if not settings.SPOTIFY_CLIENT_ID or not settings.SPOTIFY_CLIENT_SECRET:
+        return
+    if pending_tracks().filter(songs__playlist=playlist).exists():
+        enqueue('spotify.enrich_audio_features', unique=True)
+
+
+# Always installed, as it costs nothing outside a request timed by
+# PerformanceMiddleware; benchmark_api enables the middleware per run.
+connection_created.connect(install_query_timer, dispatch_uid='core.install_query_timer')
@@ -0,0 +1,48 @@
+"""
+Retention for the append-only log tables.
+
+Rows older than ``LOG_RETENTION_DAYS`` are deleted in primary-key chunks of
+``LOG_PRUNE_BATCH_SIZE`` using the ``created_at`` indexes, so each DELETE
+holds its locks briefly and never builds one huge transaction.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import AIConversation, VoiceCommand
+
+LOG_MODELS = (VoiceCommand, AIConversation)
+
+
+def prune_logs(days=None, batch_size=None, dry_run=False, progress=None):
+    """
+    Delete log rows older than ``days`` and return ``{model label: rows}``.
+
+    ``days`` defaults to ``LOG_RETENTION_DAYS``; zero or less keeps everything.
+    With ``dry_run`` the counts are what would be deleted.
+    """
+    days = settings.LOG_RETENTION_DAYS if days is None else days
+    batch_size = batch_size or settings.LOG_PRUNE_BATCH_SIZE
+    if days <= 0:
+        return {model._meta.label: 0 for model in LOG_MODELS}
+
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = {}
+    for model in LOG_MODELS:
+        expired = model.objects.filter(created_at__lt=cutoff)
+        if dry_run:
+            deleted[model._meta.label] = expired.count()
+            continue
+        total = 0
+        while True:
+            pks = list(expired.order_by('created_at').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            # Nothing references these tables, so this is a single DELETE.
+            total += model.objects.filter(pk__in=pks).delete()[0]
+            if progress:
+                progress(model, total)
+        deleted[model._meta.label] = total
+    return deleted
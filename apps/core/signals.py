@@ -0,0 +1,21 @@
+"""
+Custom signals sent by the core app.
+"""
+
+from django.dispatch import Signal
+
+# Sent with ``playlist`` after songs were bulk-added, removed or reordered.
+# bulk_create/bulk_update/queryset deletes don't fire per-row model signals,
+# so caches derived from songs listen to this instead.
+playlist_songs_changed = Signal()
+
+# Sent with ``track_ids`` after catalog tracks gained audio features.
+track_features_changed = Signal()
+
+# Sent with ``track_ids`` after a refresh rewrote catalog tracks' metadata
+# (names, artists, ...) with bulk_update.
+track_metadata_changed = Signal()
+
+# Sent with the model as ``sender`` and ``count`` after the log writer
+# inserted a batch of log rows (they bypass post_save).
+log_rows_written = Signal()
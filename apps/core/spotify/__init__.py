@@ -0,0 +1,3 @@
+"""
+Spotify integration helpers: API clients and library sync.
+"""
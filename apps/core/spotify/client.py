@@ -0,0 +1,70 @@
+"""
+Spotify API client construction.
+"""
+
+import requests
+import spotipy
+from django.conf import settings
+from spotipy.cache_handler import MemoryCacheHandler
+from spotipy.oauth2 import SpotifyClientCredentials
+from urllib3.util.retry import Retry
+
+
+class SpotifyNotConnected(Exception):
+    """Raised when a user has not linked a Spotify account."""
+
+
+class SpotifyTokenRefreshFailed(SpotifyNotConnected):
+    """Raised when Spotify rejects a refresh token; the user has to reconnect."""
+
+
+class SpotifyNotConfigured(Exception):
+    """Raised when app-level Spotify credentials are missing."""
+
+
+def get_spotify_client(profile):
+    """
+    Spotipy client authenticated as the given user profile.
+
+    Comes from the shared client pool, so the HTTP session is reused and the
+    access token is refreshed before it expires.
+    """
+    from .pool import get_client_pool
+
+    return get_client_pool().client_for(profile)
+
+
+def get_app_client(retries=True):
+    """
+    Build a client authenticated as the app (client credentials flow).
+
+    Used for catalog endpoints that need no user, such as audio features.
+    With ``retries=False`` HTTP errors, including 429, surface immediately so
+    the caller can apply its own rate limiting.
+    """
+    if not settings.SPOTIFY_CLIENT_ID or not settings.SPOTIFY_CLIENT_SECRET:
+        raise SpotifyNotConfigured('SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET are required')
+
+    auth_manager = SpotifyClientCredentials(
+        client_id=settings.SPOTIFY_CLIENT_ID,
+        client_secret=settings.SPOTIFY_CLIENT_SECRET,
+        # The default handler writes the app token to ./.cache.
+        cache_handler=MemoryCacheHandler(),
+    )
+    auth_manager.OAUTH_TOKEN_URL = settings.SPOTIFY_TOKEN_URL
+    if retries:
+        from .pool import get_client_pool
+
+        session = get_client_pool().session
+    else:
+        # spotipy's own session retries 429s internally and drops the
+        # Retry-After header, so hand it one that returns every response.
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            max_retries=Retry(total=0, read=False, respect_retry_after_header=False)
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    client = spotipy.Spotify(auth_manager=auth_manager, requests_session=session)
+    client.prefix = settings.SPOTIFY_API_URL
+    return client
@@ -0,0 +1,169 @@
+"""
+Batched audio-feature enrichment for the track catalog.
+
+Tracks that were never looked up are read in keyset order and split into
+batches of 100 ids, the most Spotify's audio-features endpoint accepts per
+request. Batches are fetched concurrently; every request first takes a token
+from a shared bucket, and a 429 pauses the whole pool for the server's
+``Retry-After``. Results are written back with one ``bulk_update`` per batch.
+"""
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from functools import partial
+
+from django.conf import settings
+from django.utils import timezone
+from requests.exceptions import RequestException
+from spotipy.exceptions import SpotifyException
+
+from apps.core.models import Track
+from apps.core.signals import track_features_changed
+from .client import get_app_client
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+FEATURES = ('energy', 'danceability', 'valence', 'tempo')
+RETRYABLE_STATUSES = (429, 502, 503)
+
+
+@dataclass
+class EnrichmentResult:
+    """Counters reported by an enrichment run."""
+    batches: int = 0
+    tracks_enriched: int = 0
+    tracks_without_features: int = 0
+    failed_batches: int = 0
+    rate_limited: int = 0
+    throttled_seconds: float = 0.0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def pending_tracks():
+    """Tracks that have no audio features and were never looked up."""
+    return Track.objects.filter(audio_features_fetched_at__isnull=True, energy__isnull=True)
+
+
+def iter_batches(limit=None, batch_size=BATCH_SIZE):
+    """Yield lists of ``(pk, spotify_track_id)`` from ``pending_tracks`` in id order."""
+    queryset = pending_tracks().order_by('id').values_list('id', 'spotify_track_id')
+    last_id, seen = 0, 0
+    while limit is None or seen < limit:
+        size = batch_size if limit is None else min(batch_size, limit - seen)
+        batch = list(queryset.filter(id__gt=last_id)[:size])
+        if not batch:
+            return
+        last_id = batch[-1][0]
+        seen += len(batch)
+        yield batch
+
+
+def _retry_after(headers):
+    try:
+        return max(float((headers or {}).get('Retry-After', 1)), 0.0)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class AudioFeatureEnricher:
+    """Fetches audio features for pending tracks under a shared rate limit."""
+
+    def __init__(self, client_factory=None, workers=None, rate=None, max_retries=None):
+        self.client_factory = client_factory or partial(get_app_client, retries=False)
+        self.workers = workers or settings.SPOTIFY_ENRICH_WORKERS
+        self.bucket = TokenBucket(rate or settings.SPOTIFY_ENRICH_RATE)
+        self.max_retries = settings.SPOTIFY_ENRICH_MAX_RETRIES if max_retries is None else max_retries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._rate_limited = 0
+
+    def _client(self):
+        # One client (and HTTP session) per worker thread.
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        return client
+
+    def fetch_batch(self, track_ids):
+        """Return Spotify's audio-features list for up to 100 track ids."""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return self._client().audio_features(track_ids) or []
+            except SpotifyException as exc:
+                if exc.http_status not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self._rate_limited += 1
+                self.bucket.pause(_retry_after(exc.headers))
+
+    def run(self, limit=None, progress=None):
+        """
+        Enrich up to ``limit`` pending tracks. ``progress`` is called as
+        ``progress(done, total)`` after each batch is written.
+        """
+        result = EnrichmentResult()
+        total = pending_tracks().count() if progress is not None else 0
+        if limit is not None:
+            total = min(total, limit)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='enrich') as pool:
+            in_flight = {}
+            for batch in iter_batches(limit):
+                future = pool.submit(self.fetch_batch, [track_id for pk, track_id in batch])
+                in_flight[future] = batch
+                # Bound how far reading runs ahead of the API.
+                if len(in_flight) >= self.workers * 2:
+                    self._collect(in_flight, result, progress, total)
+            while in_flight:
+                self._collect(in_flight, result, progress, total)
+
+        result.rate_limited = self._rate_limited
+        result.throttled_seconds = round(self.bucket.waited, 3)
+        logger.info('Audio-feature enrichment finished: %s', result.as_dict())
+        return result
+
+    def _collect(self, in_flight, result, progress, total):
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            batch = in_flight.pop(future)
+            result.batches += 1
+            try:
+                features = future.result()
+            except (SpotifyException, RequestException) as exc:
+                # Left pending, so the next run retries the batch.
+                logger.warning('Audio-feature batch of %s tracks failed: %s', len(batch), exc)
+                result.failed_batches += 1
+                continue
+            self.apply(batch, features, result)
+            if progress is not None:
+                progress(result.tracks_enriched + result.tracks_without_features, total)
+
+    def apply(self, batch, features, result):
+        """Write one batch back; tracks Spotify has no features for are only marked as fetched."""
+        now = timezone.now()
+        by_id = {item['id']: item for item in features if item}
+        enriched, empty = [], []
+        for pk, track_id in batch:
+            item = by_id.get(track_id)
+            if item is None:
+                empty.append(Track(id=pk, audio_features_fetched_at=now))
+                continue
+            track = Track(id=pk, audio_features_fetched_at=now, updated_at=now)
+            for name in FEATURES:
+                setattr(track, name, item.get(name))
+            enriched.append(track)
+
+        if enriched:
+            Track.objects.bulk_update(enriched, FEATURES + ('audio_features_fetched_at', 'updated_at'))
+            track_features_changed.send(sender=Track, track_ids=[track.pk for track in enriched])
+        if empty:
+            Track.objects.bulk_update(empty, ['audio_features_fetched_at'])
+        result.tracks_enriched += len(enriched)
+        result.tracks_without_features += len(empty)
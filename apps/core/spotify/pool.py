@@ -0,0 +1,207 @@
+"""
+Process-wide pool of per-user Spotify clients.
+
+Every client shares one keep-alive ``requests.Session``, so calls reuse open
+TLS connections instead of handshaking per request. Access tokens are
+refreshed ahead of ``spotify_token_expires_at`` rather than after a 401; a
+per-user lock, plus a row lock on the profile, lets one caller refresh while
+concurrent callers wait and pick up the new token.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import requests
+import spotipy
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from spotipy.cache_handler import MemoryCacheHandler
+from spotipy.oauth2 import SpotifyOAuth, SpotifyOauthError
+from urllib3.util.retry import Retry
+
+from apps.core.models import UserProfile
+from .client import SpotifyNotConnected, SpotifyTokenRefreshFailed
+
+logger = logging.getLogger(__name__)
+
+TOKEN_FIELDS = ('spotify_access_token', 'spotify_refresh_token', 'spotify_token_expires_at')
+
+
+def build_session(pool_size=None):
+    """A ``requests.Session`` with spotipy's retry policy and a larger connection pool."""
+    pool_size = pool_size or settings.SPOTIFY_HTTP_POOL_SIZE
+    retry = Retry(
+        total=3,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+        status=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+    )
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class SpotifyClientPool:
+    """Hands out per-user clients over a shared session, refreshing tokens early."""
+
+    def __init__(self, session=None, max_users=None, refresh_margin=None, clock=time.monotonic):
+        self.session = session or build_session()
+        self.max_users = max_users or settings.SPOTIFY_CLIENT_POOL_MAX_USERS
+        self.refresh_margin = timedelta(
+            seconds=settings.SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS if refresh_margin is None else refresh_margin
+        )
+        self.clock = clock
+        # user_id -> (access_token, client), least recently used first.
+        self._clients = OrderedDict()
+        self._user_locks = {}
+        self._lock = threading.Lock()
+        self.clients_created = 0
+        self.clients_reused = 0
+        self.refreshes = 0
+        self.refreshes_coalesced = 0
+        self.refresh_failures = 0
+        self.refresh_seconds = 0.0
+
+    def needs_refresh(self, profile):
+        expires_at = profile.spotify_token_expires_at
+        if expires_at is None or not profile.spotify_refresh_token:
+            return False
+        return expires_at - self.refresh_margin <= timezone.now()
+
+    def client_for(self, profile):
+        """Client for ``profile``'s user with a token valid for at least the refresh margin."""
+        if not profile.spotify_access_token:
+            raise SpotifyNotConnected('Spotify account is not connected')
+        if self.needs_refresh(profile):
+            self.refresh(profile)
+
+        with self._lock:
+            cached = self._clients.get(profile.user_id)
+            if cached is not None and cached[0] == profile.spotify_access_token:
+                self._clients.move_to_end(profile.user_id)
+                self.clients_reused += 1
+                return cached[1]
+
+        client = spotipy.Spotify(auth=profile.spotify_access_token, requests_session=self.session)
+        # Allows pointing the client at a local fake server in development and tests.
+        client.prefix = settings.SPOTIFY_API_URL
+        with self._lock:
+            self._clients[profile.user_id] = (profile.spotify_access_token, client)
+            self._clients.move_to_end(profile.user_id)
+            while len(self._clients) > self.max_users:
+                self._clients.popitem(last=False)
+            self.clients_created += 1
+        return client
+
+    def refresh(self, profile, force=False):
+        """
+        Refresh ``profile``'s access token in place.
+
+        Only one caller per user talks to Spotify: others block on the user's
+        lock and then find the token already fresh. Without ``force`` nothing
+        is sent if the stored token is still outside the refresh margin.
+        """
+        with self._user_lock(profile.user_id):
+            with transaction.atomic():
+                # Row lock serializes refreshes across processes as well.
+                current = (
+                    UserProfile.objects.select_for_update()
+                    .only(*TOKEN_FIELDS)
+                    .get(pk=profile.pk)
+                )
+                rotated = current.spotify_access_token != profile.spotify_access_token
+                if rotated or (not force and not self.needs_refresh(current)):
+                    with self._lock:
+                        self.refreshes_coalesced += 1
+                    self._copy_tokens(current, profile)
+                    return profile
+                if not current.spotify_refresh_token:
+                    raise SpotifyNotConnected('Spotify account has no refresh token')
+
+                started = self.clock()
+                try:
+                    token_info = self._oauth().refresh_access_token(current.spotify_refresh_token)
+                except (SpotifyOauthError, requests.RequestException) as exc:
+                    with self._lock:
+                        self.refresh_failures += 1
+                    logger.warning('Spotify token refresh failed for user %s: %s', profile.user_id, exc)
+                    raise SpotifyTokenRefreshFailed('Spotify token refresh failed; reconnect the account') from exc
+
+                current.spotify_access_token = token_info['access_token']
+                current.spotify_refresh_token = token_info.get('refresh_token') or current.spotify_refresh_token
+                current.spotify_token_expires_at = datetime.fromtimestamp(token_info['expires_at'], tz=dt_timezone.utc)
+                current.save(update_fields=[*TOKEN_FIELDS, 'updated_at'])
+
+            with self._lock:
+                self.refreshes += 1
+                self.refresh_seconds += self.clock() - started
+            self._copy_tokens(current, profile)
+            return profile
+
+    def _oauth(self):
+        oauth = SpotifyOAuth(
+            client_id=settings.SPOTIFY_CLIENT_ID,
+            client_secret=settings.SPOTIFY_CLIENT_SECRET,
+            redirect_uri=settings.SPOTIFY_REDIRECT_URI,
+            requests_session=self.session,
+            cache_handler=MemoryCacheHandler(),
+            open_browser=False,
+        )
+        oauth.OAUTH_TOKEN_URL = settings.SPOTIFY_TOKEN_URL
+        return oauth
+
+    def _user_lock(self, user_id):
+        with self._lock:
+            lock = self._user_locks.get(user_id)
+            if lock is None:
+                lock = self._user_locks[user_id] = threading.Lock()
+            return lock
+
+    @staticmethod
+    def _copy_tokens(source, target):
+        for name in TOKEN_FIELDS:
+            setattr(target, name, getattr(source, name))
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.clients_created + self.clients_reused
+            return {
+                'clients': len(self._clients),
+                'clients_created': self.clients_created,
+                'clients_reused': self.clients_reused,
+                'reuse_rate': self.clients_reused / lookups if lookups else 0.0,
+                'refreshes': self.refreshes,
+                'refreshes_coalesced': self.refreshes_coalesced,
+                'refresh_failures': self.refresh_failures,
+                'avg_refresh_ms': 1000 * self.refresh_seconds / self.refreshes if self.refreshes else 0.0,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool():
+    """The process-wide ``SpotifyClientPool``."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SpotifyClientPool()
+    return _pool
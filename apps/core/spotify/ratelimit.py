@@ -0,0 +1,50 @@
+"""
+Client-side rate limiting for Spotify Web API calls.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by concurrent API workers.
+
+    ``acquire()`` blocks until a token is available. When Spotify answers 429,
+    ``pause(retry_after)`` holds every caller back until the server's
+    ``Retry-After`` has elapsed, not just the thread that saw the response.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+                self.waited += delay
+            self.sleep(delay)
+
+    def pause(self, seconds):
+        """Block all callers for ``seconds`` and drop any saved-up burst."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
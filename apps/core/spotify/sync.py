@@ -0,0 +1,274 @@
+"""
+Incremental Spotify library sync.
+
+Playlists are paged from the Spotify API and compared against their stored
+``snapshot_id``. Only playlists whose snapshot changed since the last sync
+have their tracks re-fetched, and only the added and removed ``Song`` rows
+are written. Track metadata goes to the shared ``Track`` catalog.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.aio import run_io
+from apps.core.catalog import upsert_tracks
+from apps.core.locking import lock_row
+from apps.core.models import Playlist, Song
+from apps.core.signals import playlist_songs_changed
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_PAGE_SIZE = 50
+TRACK_PAGE_SIZE = 100
+TRACK_FIELDS = (
+    'items(track(id,name,type,is_local,duration_ms,popularity,'
+    'artists(name),album(name,images(url)))),next'
+)
+
+
+@dataclass
+class SyncResult:
+    """Summary of a sync run."""
+    playlists_seen: int = 0
+    playlists_created: int = 0
+    playlists_synced: int = 0
+    playlists_skipped: int = 0
+    songs_added: int = 0
+    songs_removed: int = 0
+    errors: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            'playlists_seen': self.playlists_seen,
+            'playlists_created': self.playlists_created,
+            'playlists_synced': self.playlists_synced,
+            'playlists_skipped': self.playlists_skipped,
+            'songs_added': self.songs_added,
+            'songs_removed': self.songs_removed,
+            'errors': self.errors,
+        }
+
+
+def _first_image_url(images):
+    return images[0]['url'] if images else None
+
+
+def catalog_values(track):
+    """Map a Spotify track object onto Track column values."""
+    album = track.get('album') or {}
+    return {
+        'name': (track.get('name') or '')[:255],
+        'artist': ', '.join(a['name'] for a in track.get('artists') or [])[:255],
+        'album': (album.get('name') or '')[:255] or None,
+        'image_url': _first_image_url(album.get('images')),
+        'duration_ms': track.get('duration_ms') or 0,
+        'popularity': track.get('popularity') or 0,
+    }
+
+
+class SpotifySyncEngine:
+    """Pulls a user's playlists from Spotify and applies minimal diffs."""
+
+    def __init__(self, user, client):
+        self.user = user
+        self.client = client
+
+    def iter_remote_playlists(self):
+        """Yield ``(playlist, total)`` for every playlist in the user's library."""
+        offset = 0
+        while True:
+            page = self.client.current_user_playlists(limit=PLAYLIST_PAGE_SIZE, offset=offset)
+            items = page.get('items') or []
+            total = page.get('total') or 0
+            for item in items:
+                yield item, total
+            if not page.get('next') or not items:
+                break
+            offset += len(items)
+
+    def fetch_playlist_tracks(self, spotify_playlist_id):
+        """Return an ordered ``{track_id: track_fields}`` mapping for a playlist."""
+        tracks = {}
+        offset = 0
+        while True:
+            page = self.client.playlist_items(
+                spotify_playlist_id,
+                fields=TRACK_FIELDS,
+                limit=TRACK_PAGE_SIZE,
+                offset=offset,
+                additional_types=('track',),
+            )
+            items = page.get('items') or []
+            for item in items:
+                track = item.get('track')
+                # Local files and podcast episodes have no stable track id.
+                if not track or track.get('is_local') or not track.get('id'):
+                    continue
+                if track.get('type', 'track') != 'track':
+                    continue
+                tracks.setdefault(track['id'], catalog_values(track))
+            if not page.get('next') or not items:
+                break
+            offset += len(items)
+        return tracks
+
+    def run(self, force=False, progress=None):
+        """
+        Sync the whole library. ``force`` ignores stored snapshots and
+        ``progress`` is called as ``progress(done, total)`` after each playlist.
+        """
+        result = SyncResult()
+        local = {p.spotify_playlist_id: p for p in Playlist.objects.filter(user=self.user)}
+
+        for remote, total in self.iter_remote_playlists():
+            result.playlists_seen += 1
+            self._sync_playlist(remote, local.get(remote['id']), result, force)
+            if progress is not None:
+                progress(result.playlists_seen, max(total, result.playlists_seen))
+
+        logger.info('Spotify sync for user %s finished: %s', self.user.pk, result.as_dict())
+        return result
+
+    async def arun(self, force=False, concurrency=None):
+        """
+        ``run`` for async callers: Spotify pages are fetched concurrently.
+
+        Playlist pages after the first, and the tracks of every changed
+        playlist, are requested at once (at most ``concurrency`` in flight).
+        Database work runs on Django's sync thread, one playlist at a time.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.SPOTIFY_SYNC_CONCURRENCY)
+
+        async def call(func, *args, **kwargs):
+            async with semaphore:
+                return await run_io(func, *args, **kwargs)
+
+        result = SyncResult()
+        local = await sync_to_async(
+            lambda: {p.spotify_playlist_id: p for p in Playlist.objects.filter(user=self.user)}
+        )()
+
+        first = await call(self.client.current_user_playlists, limit=PLAYLIST_PAGE_SIZE, offset=0)
+        offsets = range(PLAYLIST_PAGE_SIZE, first.get('total') or 0, PLAYLIST_PAGE_SIZE)
+        pages = [first, *await asyncio.gather(*(
+            call(self.client.current_user_playlists, limit=PLAYLIST_PAGE_SIZE, offset=offset)
+            for offset in offsets
+        ))]
+        remotes = [item for page in pages for item in page.get('items') or []]
+
+        async def sync_one(remote):
+            playlist = await sync_to_async(self._prepare_playlist)(remote, local.get(remote['id']), result, force)
+            if playlist is not None:
+                tracks = await call(self.fetch_playlist_tracks, remote['id'])
+                await sync_to_async(self._store_tracks)(playlist, tracks, remote.get('snapshot_id'), result)
+
+        result.playlists_seen = len(remotes)
+        await asyncio.gather(*(sync_one(remote) for remote in remotes))
+        logger.info('Spotify sync for user %s finished: %s', self.user.pk, result.as_dict())
+        return result
+
+    def _sync_playlist(self, remote, playlist, result, force):
+        playlist = self._prepare_playlist(remote, playlist, result, force)
+        if playlist is not None:
+            tracks = self.fetch_playlist_tracks(remote['id'])
+            self._store_tracks(playlist, tracks, remote.get('snapshot_id'), result)
+
+    def _prepare_playlist(self, remote, playlist, result, force):
+        """Upsert playlist metadata; returns the playlist if its tracks need fetching."""
+        playlist, created = self._upsert_playlist(remote, playlist)
+        if playlist is None:
+            result.errors.append({
+                'spotify_playlist_id': remote['id'],
+                'error': 'Playlist is linked to another account',
+            })
+            return None
+        if created:
+            result.playlists_created += 1
+
+        snapshot_id = remote.get('snapshot_id')
+        unchanged = (
+            not created
+            and playlist.synced_at is not None
+            and snapshot_id
+            and playlist.snapshot_id == snapshot_id
+        )
+        if unchanged and not force:
+            result.playlists_skipped += 1
+            return None
+        return playlist
+
+    def _store_tracks(self, playlist, tracks, snapshot_id, result):
+        added, removed = self.apply_tracks(playlist, tracks, snapshot_id)
+        result.playlists_synced += 1
+        result.songs_added += added
+        result.songs_removed += removed
+
+    def _upsert_playlist(self, remote, playlist):
+        """Create or refresh playlist metadata; returns ``(playlist, created)``."""
+        values = {
+            'name': (remote.get('name') or '')[:255],
+            'description': remote.get('description') or None,
+            'image_url': _first_image_url(remote.get('images')),
+            'is_public': bool(remote.get('public')),
+        }
+        if playlist is None:
+            # spotify_playlist_id is globally unique, so a playlist followed by
+            # two users can only belong to the first one that synced it.
+            if Playlist.objects.filter(spotify_playlist_id=remote['id']).exists():
+                return None, False
+            playlist = Playlist.objects.create(
+                user=self.user, spotify_playlist_id=remote['id'], **values
+            )
+            return playlist, True
+
+        changed = [name for name, value in values.items() if getattr(playlist, name) != value]
+        if changed:
+            for name in changed:
+                setattr(playlist, name, values[name])
+            playlist.save(update_fields=changed + ['updated_at'])
+        return playlist, False
+
+    def apply_tracks(self, playlist, tracks, snapshot_id):
+        """Write only the difference between ``tracks`` and stored songs."""
+        positions = {track_id: position for position, track_id in enumerate(tracks)}
+        with transaction.atomic():
+            lock_row(Playlist.objects.filter(pk=playlist.pk))
+            playlist.snapshot_id = snapshot_id
+            playlist.total_tracks = len(tracks)
+            playlist.synced_at = timezone.now()
+            playlist.save(update_fields=['snapshot_id', 'total_tracks', 'synced_at', 'updated_at'])
+
+            rows = playlist.songs.values_list('track__spotify_track_id', 'id', 'position')
+            existing = {track_id: (pk, position) for track_id, pk, position in rows}
+            to_add = [track_id for track_id in tracks if track_id not in existing]
+            to_remove = [existing[track_id][0] for track_id in existing if track_id not in tracks]
+            moved = [
+                Song(id=pk, position=positions[track_id])
+                for track_id, (pk, position) in existing.items()
+                if track_id in positions and positions[track_id] != position
+            ]
+
+            # Spotify's metadata is authoritative, so refresh catalog rows that drifted.
+            track_pks = upsert_tracks(tracks, refresh=True)
+            if to_remove:
+                Song.objects.filter(id__in=to_remove).delete()
+            if to_add:
+                Song.objects.bulk_create(
+                    [Song(playlist=playlist, track_id=track_pks[track_id], position=positions[track_id])
+                     for track_id in to_add],
+                    batch_size=500,
+                    ignore_conflicts=True,
+                )
+            if moved:
+                Song.objects.bulk_update(moved, ['position'], batch_size=500)
+            if to_add or to_remove or moved:
+                transaction.on_commit(
+                    lambda: playlist_songs_changed.send(sender=Playlist, playlist=playlist)
+                )
+        return len(to_add), len(to_remove)
@@ -0,0 +1,45 @@
+"""
+Background tasks for the core app.
+"""
+
+from apps.jobs.queue import task
+from . import retention
+from .models import UserProfile
+from .spotify.client import SpotifyNotConfigured, get_spotify_client
+from .spotify.enrichment import AudioFeatureEnricher
+from .spotify.sync import SpotifySyncEngine
+
+
+@task('spotify.sync_library')
+def sync_spotify_library(job, force=False):
+    """Incrementally sync the job owner's Spotify playlists."""
+    profile, created = UserProfile.objects.get_or_create(user=job.user)
+    client = get_spotify_client(profile)
+
+    def report(done, total):
+        if total:
+            job.set_progress(done * 100 // total, f'Synced {done} of {total} playlists')
+
+    result = SpotifySyncEngine(job.user, client).run(force=force, progress=report)
+    return result.as_dict()
+
+
+@task('spotify.enrich_audio_features')
+def enrich_audio_features(job, limit=None):
+    """Fetch audio features for catalog tracks that have none yet."""
+    def report(done, total):
+        if total:
+            job.set_progress(done * 100 // total, f'Enriched {done} of {total} tracks')
+
+    try:
+        result = AudioFeatureEnricher().run(limit=limit, progress=report)
+    except SpotifyNotConfigured as exc:
+        # Scheduled runs would otherwise fail and retry on every interval.
+        return {'skipped': str(exc)}
+    return result.as_dict()
+
+
+@task('logs.prune')
+def prune_logs(job, days=None):
+    """Delete voice command and AI conversation logs past their retention."""
+    return retention.prune_logs(days=days)
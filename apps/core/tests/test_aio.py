@@ -0,0 +1,19 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from apps.core.aio import get_io_executor, run_io
+
+
+class RunIoTests(SimpleTestCase):
+    async def test_runs_on_the_io_pool(self):
+        name = await run_io(lambda: threading.current_thread().name)
+        self.assertTrue(name.startswith('async-io'))
+
+    async def test_passes_arguments_and_raises(self):
+        self.assertEqual(await run_io(pow, 2, exp=3), 8)
+        with self.assertRaises(ZeroDivisionError):
+            await run_io(divmod, 1, 0)
+
+    def test_executor_is_shared(self):
+        self.assertIs(get_io_executor(), get_io_executor())
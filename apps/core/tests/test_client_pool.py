@@ -0,0 +1,127 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.core.benchmarks.fake_spotify import FakeSpotify
+from apps.core.models import UserProfile
+from apps.core.spotify.client import SpotifyTokenRefreshFailed
+from apps.core.spotify.pool import SpotifyClientPool
+
+
+class SpotifyClientPoolTests(TransactionTestCase):
+    def setUp(self):
+        self.fake = FakeSpotify(latency=0)
+        self.fake.__enter__()
+        self.addCleanup(self.fake.__exit__, None, None, None)
+        settings = override_settings(
+            SPOTIFY_CLIENT_ID='client', SPOTIFY_CLIENT_SECRET='secret',
+            SPOTIFY_API_URL=self.fake.api_url, SPOTIFY_TOKEN_URL=self.fake.token_url,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.pool = SpotifyClientPool(max_users=2, refresh_margin=60)
+
+    def profile(self, name='listener', expires_in=3600, access_token='old-token'):
+        user = User.objects.create_user(name, f'{name}@example.com', 'password')
+        return UserProfile.objects.create(
+            user=user, spotify_access_token=access_token, spotify_refresh_token='refresh-token',
+            spotify_token_expires_at=timezone.now() + timedelta(seconds=expires_in),
+        )
+
+    def test_refreshes_inside_the_margin(self):
+        profile = self.profile(expires_in=30)
+
+        self.pool.client_for(profile)
+
+        self.assertEqual(self.fake.token_requests, 1)
+        self.assertEqual(profile.spotify_access_token, 'fake-token')
+        self.assertGreater(profile.spotify_token_expires_at, timezone.now() + timedelta(minutes=50))
+        stored = UserProfile.objects.get(pk=profile.pk)
+        self.assertEqual((stored.spotify_access_token, stored.spotify_refresh_token), ('fake-token', 'refresh-token'))
+        self.assertEqual(self.pool.stats()['refreshes'], 1)
+
+    def test_leaves_tokens_outside_the_margin_alone(self):
+        profile = self.profile(expires_in=600)
+
+        self.pool.client_for(profile)
+
+        self.assertEqual(self.fake.token_requests, 0)
+        self.assertEqual(profile.spotify_access_token, 'old-token')
+
+    def test_concurrent_callers_share_one_refresh(self):
+        self.fake.latency = 0.1
+        profile = self.profile(expires_in=30)
+        callers = 5
+        barrier = threading.Barrier(callers)
+        tokens, errors = [], []
+
+        def call():
+            try:
+                own = UserProfile.objects.get(pk=profile.pk)
+                barrier.wait()
+                self.pool.client_for(own)
+                tokens.append(own.spotify_access_token)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(tokens, ['fake-token'] * callers)
+        self.assertEqual(self.fake.token_requests, 1)
+        stats = self.pool.stats()
+        self.assertEqual((stats['refreshes'], stats['refreshes_coalesced']), (1, callers - 1))
+
+    def test_picks_up_token_rotated_elsewhere(self):
+        profile = self.profile(expires_in=30)
+        # Another process refreshed after this one loaded the profile.
+        UserProfile.objects.filter(pk=profile.pk).update(
+            spotify_access_token='rotated-token', spotify_token_expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+        self.pool.client_for(profile)
+
+        self.assertEqual(self.fake.token_requests, 0)
+        self.assertEqual(profile.spotify_access_token, 'rotated-token')
+        self.assertEqual(self.pool.stats()['refreshes_coalesced'], 1)
+
+    def test_failed_refresh_raises(self):
+        self.fake.reject_tokens()
+        profile = self.profile(expires_in=30)
+
+        with self.assertRaises(SpotifyTokenRefreshFailed), self.assertLogs('apps.core.spotify.pool', logging.WARNING):
+            self.pool.client_for(profile)
+
+        self.assertEqual(self.pool.stats()['refresh_failures'], 1)
+        self.assertEqual(UserProfile.objects.get(pk=profile.pk).spotify_access_token, 'old-token')
+
+    def test_evicts_least_recently_used_clients(self):
+        first, second, third = (self.profile(name) for name in ('first', 'second', 'third'))
+
+        client = self.pool.client_for(first)
+        self.assertIs(self.pool.client_for(first), client)
+        self.pool.client_for(second)
+        self.pool.client_for(third)
+        self.assertIsNot(self.pool.client_for(first), client)
+
+        self.assertEqual(self.pool.stats(), {
+            'clients': 2,
+            'clients_created': 4,
+            'clients_reused': 1,
+            'reuse_rate': 0.2,
+            'refreshes': 0,
+            'refreshes_coalesced': 0,
+            'refresh_failures': 0,
+            'avg_refresh_ms': 0.0,
+        })
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import tempfile
+import warnings
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.core.db_router import REPLICA_DB_ALIAS, ReadReplicaRouter, use_read_replica
+from apps.core.models import Playlist
+
+
+@contextmanager
+def sqlite_replica(path):
+    """Point the replica alias at the SQLite file ``path`` instead of mirroring the primary."""
+    replica = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    configured = connections.configure_settings({'default': dict(settings.DATABASES['default']), 'replica': replica})
+    previous_settings = connections.settings.get(REPLICA_DB_ALIAS)
+    previous_connection = getattr(connections._connections, REPLICA_DB_ALIAS, None)
+    connections.settings[REPLICA_DB_ALIAS] = configured[REPLICA_DB_ALIAS]
+    if previous_connection is not None:
+        delattr(connections._connections, REPLICA_DB_ALIAS)
+    with warnings.catch_warnings():
+        # Django warns that overriding DATABASES does not reconnect; the alias is set up above.
+        warnings.simplefilter('ignore')
+        overrides = override_settings(DATABASES={**settings.DATABASES, REPLICA_DB_ALIAS: replica})
+        overrides.enable()
+    try:
+        yield
+    finally:
+        overrides.disable()
+        connections[REPLICA_DB_ALIAS].close()
+        delattr(connections._connections, REPLICA_DB_ALIAS)
+        if previous_settings is None:
+            del connections.settings[REPLICA_DB_ALIAS]
+        else:
+            connections.settings[REPLICA_DB_ALIAS] = previous_settings
+        if previous_connection is not None:
+            setattr(connections._connections, REPLICA_DB_ALIAS, previous_connection)
+
+
+class ReadReplicaRoutingTests(TransactionTestCase):
+    """The router against two SQLite databases standing in for the primary and the replica."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.playlist = Playlist.objects.create(user=self.user, spotify_playlist_id='replicated', name='Primary name')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.replica_path = os.path.join(directory.name, 'replica.sqlite3')
+        self.replicate()
+        replica = sqlite_replica(self.replica_path)
+        replica.__enter__()
+        self.addCleanup(replica.__exit__, None, None, None)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def replicate(self):
+        """Copy the primary into the replica file, as replication would."""
+        primary = connections['default']
+        primary.ensure_connection()
+        target = sqlite3.connect(self.replica_path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+
+    def on_replica(self, sql, params=()):
+        with connections[REPLICA_DB_ALIAS].cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def test_router_uses_replica_only_inside_use_read_replica(self):
+        router = ReadReplicaRouter()
+        self.assertEqual(router.db_for_read(Playlist), 'default')
+        with use_read_replica():
+            self.assertEqual(router.db_for_read(Playlist), REPLICA_DB_ALIAS)
+            self.assertEqual(router.db_for_write(Playlist), 'default')
+
+    def test_read_actions_are_served_from_the_replica(self):
+        self.on_replica('UPDATE core_playlist SET name = %s', ['Replica name'])
+
+        listed = self.client.get('/api/playlists/')
+        detail = self.client.get(f'/api/playlists/{self.playlist.pk}/')
+
+        self.assertEqual([row['name'] for row in listed.json()['results']], ['Replica name'])
+        self.assertEqual(detail.json()['name'], 'Replica name')
+
+    def test_writes_go_to_the_primary(self):
+        response = self.client.patch(f'/api/playlists/{self.playlist.pk}/', {'name': 'Renamed'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Playlist.objects.using('default').get(pk=self.playlist.pk).name, 'Renamed')
+        self.assertEqual(Playlist.objects.using(REPLICA_DB_ALIAS).get(pk=self.playlist.pk).name, 'Primary name')
+
+    def test_reads_in_write_requests_use_the_primary(self):
+        # Written after the last replication, so only the primary has it.
+        fresh = Playlist.objects.create(user=self.user, spotify_playlist_id='not-replicated', name='Fresh')
+
+        renamed = self.client.patch(f'/api/playlists/{fresh.pk}/', {'name': 'Fresh renamed'}, format='json')
+        added = self.client.post(f'/api/playlists/{fresh.pk}/add_song/',
+                                 {'spotify_track_id': 'trk', 'name': 'Song', 'artist': 'Artist'}, format='json')
+
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(renamed.json()['name'], 'Fresh renamed')
+        self.assertEqual(added.status_code, 201)
+        # A read-only action sees the replica, which has not caught up yet.
+        self.assertEqual(self.client.get(f'/api/playlists/{fresh.pk}/').status_code, 404)
+
+    def test_users_not_yet_replicated_can_read(self):
+        # Registered and logged in after the last replication.
+        User.objects.create_user('newcomer', 'newcomer@example.com', 'password')
+        session_client = APIClient()
+        self.assertTrue(session_client.login(username='newcomer', password='password'))
+        tokens = self.client.post('/api/auth/token/', {'email': 'newcomer@example.com', 'password': 'password'},
+                                  format='json').json()
+        bearer_client = APIClient()
+        bearer_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        for client in (session_client, bearer_client):
+            response = client.get('/api/playlists/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'], [])
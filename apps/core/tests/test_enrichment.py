@@ -0,0 +1,68 @@
+import logging
+
+from django.test import TestCase, override_settings
+
+from apps.core.benchmarks.fake_spotify import FakeSpotify
+from apps.core.catalog import upsert_tracks
+from apps.core.models import Track
+from apps.core.spotify.enrichment import AudioFeatureEnricher, pending_tracks
+
+
+class AudioFeatureEnricherTests(TestCase):
+    def setUp(self):
+        self.fake = FakeSpotify(latency=0)
+        self.fake.__enter__()
+        self.addCleanup(self.fake.__exit__, None, None, None)
+        settings = override_settings(
+            SPOTIFY_CLIENT_ID='client', SPOTIFY_CLIENT_SECRET='secret',
+            SPOTIFY_API_URL=self.fake.api_url, SPOTIFY_TOKEN_URL=self.fake.token_url,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Rate-limited and failed batches are logged by spotipy and the enricher.
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.track_ids = [f'enrich{i:04d}' for i in range(249)] + ['nofeatures0001']
+        upsert_tracks({track_id: {'name': track_id, 'artist': 'Artist'} for track_id in self.track_ids})
+
+    def enricher(self):
+        return AudioFeatureEnricher(workers=2, rate=1000, max_retries=2)
+
+    def test_batches_of_100(self):
+        result = self.enricher().run()
+
+        self.assertEqual(sorted(len(batch) for batch in self.fake.audio_feature_batches), [50, 100, 100])
+        self.assertEqual(sorted(sum(self.fake.audio_feature_batches, [])), sorted(self.track_ids))
+        self.assertEqual((result.batches, result.failed_batches), (3, 0))
+
+    def test_writes_features_back(self):
+        result = self.enricher().run()
+
+        self.assertEqual((result.tracks_enriched, result.tracks_without_features), (249, 1))
+        self.assertFalse(pending_tracks().exists())
+        track = Track.objects.get(spotify_track_id='enrich0042')
+        expected = FakeSpotify.audio_features('enrich0042')
+        self.assertEqual(
+            (track.energy, track.danceability, track.valence, track.tempo),
+            (expected['energy'], expected['danceability'], expected['valence'], expected['tempo']),
+        )
+        empty = Track.objects.get(spotify_track_id='nofeatures0001')
+        self.assertIsNone(empty.energy)
+        self.assertIsNotNone(empty.audio_features_fetched_at)
+
+    def test_rate_limit_waits_for_retry_after(self):
+        self.fake.rate_limit(0.2)
+
+        result = self.enricher().run()
+
+        self.assertEqual(result.rate_limited, 1)
+        self.assertGreaterEqual(result.throttled_seconds, 0.2)
+        self.assertEqual((result.tracks_enriched, result.failed_batches), (249, 0))
+
+    def test_batch_left_pending_after_retries(self):
+        self.fake.rate_limit(0, times=3)
+
+        result = self.enricher().run(limit=100)
+
+        self.assertEqual(result.failed_batches, 1)
+        self.assertEqual(pending_tracks().count(), 250)
@@ -0,0 +1,35 @@
+from django.db import connection
+from django.test import TestCase
+
+from apps.core.models import AIConversation, Song, VoiceCommand
+
+
+class HotQueryIndexTests(TestCase):
+    def index(self, model, name):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+        self.assertIn(name, constraints)
+        return constraints[name]
+
+    def test_user_created_indexes_exist(self):
+        for model, name in [(VoiceCommand, 'core_vc_user_created_idx'),
+                            (AIConversation, 'core_aiconv_user_created_idx')]:
+            with self.subTest(name):
+                index = self.index(model, name)
+                self.assertTrue(index['index'])
+                self.assertEqual(index['columns'], ['user_id', 'created_at'])
+                self.assertEqual(index['orders'], ['ASC', 'DESC'])
+
+    def test_playlist_position_index_exists(self):
+        index = self.index(Song, 'core_song_playlist_pos_idx')
+        self.assertEqual(index['columns'], ['playlist_id', 'position', 'id'])
+
+    def test_recent_queries_use_their_index(self):
+        checks = [
+            ('core_vc_user_created_idx', VoiceCommand.objects.filter(user_id=1).order_by('-created_at')[:10]),
+            ('core_aiconv_user_created_idx', AIConversation.objects.filter(user_id=1).order_by('-created_at')[:20]),
+            ('core_song_playlist_pos_idx', Song.objects.filter(playlist_id=1).order_by('position', 'id')[:100]),
+        ]
+        for name, queryset in checks:
+            with self.subTest(name):
+                self.assertIn(name, queryset.explain())
@@ -0,0 +1,147 @@
+import re
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.core import metrics
+from apps.core.catalog import upsert_tracks
+from apps.core.instrumentation import RequestTimings, _current, timed_serialization
+from apps.core.models import Playlist, Song
+
+SERVER_TIMING = re.compile(
+    r'^db;dur=[\d.]+;desc="(\d+) queries", serialize;dur=([\d.]+), render;dur=([\d.]+), total;dur=([\d.]+)$'
+)
+
+
+class TimedSerializationTests(TestCase):
+    def setUp(self):
+        self.timings = RequestTimings()
+        token = _current.set(self.timings)
+        self.addCleanup(_current.reset, token)
+        clock = mock.patch('apps.core.instrumentation.time.perf_counter', side_effect=[1.0, 3.5, 4.0, 4.25])
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_adds_time_spent_in_block(self):
+        with timed_serialization():
+            pass
+        with timed_serialization():
+            pass
+
+        self.assertEqual(self.timings.serialize_seconds, 2.75)
+
+    def test_nested_blocks_count_once(self):
+        with timed_serialization():
+            with timed_serialization():
+                pass
+
+        self.assertEqual(self.timings.serialize_seconds, 2.5)
+
+    def test_outside_a_request(self):
+        _current.set(None)
+        with timed_serialization():
+            pass
+
+
+@override_settings(PERF_INSTRUMENTATION_ENABLED=True, PERF_SERVER_TIMING=True, PERF_SLOW_REQUEST_MS=10 ** 9)
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('timed', 'timed@example.com', 'password')
+        playlist = Playlist.objects.create(user=self.user, spotify_playlist_id='timed', name='Timed')
+        pks = upsert_tracks({f'track{i}': {'name': f'Track {i}', 'artist': 'Artist'} for i in range(3)})
+        Song.objects.bulk_create(Song(playlist=playlist, track_id=pk, position=i) for i, pk in enumerate(pks.values()))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        with self.assertNumQueries(3) as queries:
+            response = self.client.get('/api/playlists/')
+
+        match = SERVER_TIMING.match(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        self.assertEqual(int(match[1]), len(queries))
+        serialize, render, total = map(float, match.groups()[1:])
+        self.assertLessEqual(serialize + render, total)
+
+    def test_serializer_work_is_timed(self):
+        started = []
+
+        class RecordedTimings(RequestTimings):
+            def __init__(self):
+                super().__init__()
+                started.append(self)
+
+        with mock.patch('apps.core.instrumentation.RequestTimings', RecordedTimings):
+            self.client.get('/api/playlists/')
+
+        [timings] = started
+        self.assertGreater(timings.serialize_seconds, 0)
+        self.assertGreater(timings.render_seconds, 0)
+
+    @override_settings(PERF_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/playlists/'))
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0)
+    def test_logs_slow_requests(self):
+        with self.assertLogs('apps.core.instrumentation', 'WARNING') as logs:
+            self.client.get('/api/playlists/')
+
+        fields = logs.records[0].perf
+        self.assertEqual(
+            (fields['view'], fields['method'], fields['status'], fields['user_id'], fields['db_queries']),
+            ('playlist-list', 'GET', 200, self.user.pk, 3),
+        )
+        self.assertEqual({'serialize_ms', 'render_ms', 'db_ms', 'duration_ms'} - fields.keys(), set())
+
+    def test_records_metrics(self):
+        before = metrics.REQUESTS._values.get(('playlist-list', 'GET', '200'), 0)
+
+        self.client.get('/api/playlists/')
+
+        self.assertEqual(metrics.REQUESTS._values[('playlist-list', 'GET', '200')], before + 1)
+
+
+@override_settings(METRICS_TOKEN='scrape-token')
+class MetricsViewTests(TestCase):
+    def test_renders_prometheus_text(self):
+        metrics.REQUESTS.inc('metrics-test', 'GET', '200')
+        metrics.DB_QUERIES.observe(3, 'metrics-test', 'GET')
+
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        lines = response.content.decode().splitlines()
+        self.assertIn('# TYPE http_requests_total counter', lines)
+        self.assertIn('# TYPE http_request_serialize_duration_seconds histogram', lines)
+        self.assertIn('# TYPE http_request_render_duration_seconds histogram', lines)
+        self.assertIn('http_request_db_queries_bucket{view="metrics-test",method="GET",le="2"} 0', lines)
+        self.assertIn('http_request_db_queries_bucket{view="metrics-test",method="GET",le="5"} 1', lines)
+        self.assertIn('http_request_db_queries_bucket{view="metrics-test",method="GET",le="+Inf"} 1', lines)
+        self.assertIn('http_request_db_queries_sum{view="metrics-test",method="GET"} 3', lines)
+        self.assertFalse(any('view="metrics"' in line for line in lines))
+
+    def test_requires_token(self):
+        self.client.force_login(User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True))
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_staff_session_without_token(self):
+        user = User.objects.create_user('viewer', 'viewer@example.com', 'password')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_get_only(self):
+        response = self.client.post('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET')
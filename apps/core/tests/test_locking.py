@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.locking import lock_row
+from apps.core.models import Playlist
+
+
+class LockRowTests(TestCase):
+    def test_no_op_write_leaves_row_unchanged(self):
+        user = User.objects.create_user('locker', 'locker@example.com', 'password')
+        playlist = Playlist.objects.create(user=user, spotify_playlist_id='lock-test', name='Lock', total_tracks=3)
+
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            lock_row(Playlist.objects.filter(pk=playlist.pk))
+
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE'))
+        refreshed = Playlist.objects.get(pk=playlist.pk)
+        self.assertEqual((refreshed.total_tracks, refreshed.updated_at), (3, playlist.updated_at))
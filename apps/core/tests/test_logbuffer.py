@@ -0,0 +1,48 @@
+import logging
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.test import TestCase
+
+from apps.core.logbuffer import SPOOL_SUFFIX, LogWriter
+from apps.core.models import AIConversation, VoiceCommand
+
+
+class SpoolReplayTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.spool_dir = Path(tmp.name)
+        self.writer = LogWriter(spool_dir=self.spool_dir)
+        self.user = User.objects.create_user('logger', 'logger@example.com', 'password')
+        self.writer.spool([
+            VoiceCommand(user=self.user, raw_command='add hey jude to road trip'),
+            VoiceCommand(user=self.user, raw_command='create a playlist called gym'),
+            AIConversation(user=self.user, user_message='something upbeat', ai_response='Try these'),
+        ])
+
+    def test_replay_writes_and_deletes_file(self):
+        self.assertEqual(self.writer.replay(), 3)
+        self.assertEqual((VoiceCommand.objects.count(), AIConversation.objects.count()), (2, 1))
+        self.assertEqual(list(self.spool_dir.iterdir()), [])
+
+    def test_partial_replay_keeps_only_unwritten_rows(self):
+        bulk_create_rows = LogWriter._bulk_create_rows
+
+        def fail_conversations(writer, model, rows):
+            if model is AIConversation:
+                raise DatabaseError('database is locked')
+            return bulk_create_rows(writer, model, rows)
+
+        with mock.patch.object(LogWriter, '_bulk_create_rows', fail_conversations), \
+                self.assertLogs('apps.core.logbuffer', logging.ERROR):
+            self.assertEqual(self.writer.replay(), 2)
+
+        spooled, = self.spool_dir.glob(f'*{SPOOL_SUFFIX}')
+        self.assertEqual(len(spooled.read_text().splitlines()), 1)
+        self.assertEqual(self.writer.replay(), 1)
+        self.assertEqual((VoiceCommand.objects.count(), AIConversation.objects.count()), (2, 1))
+        self.assertEqual(list(self.spool_dir.iterdir()), [])
@@ -0,0 +1,66 @@
+import spotipy
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.core.benchmarks.fake_spotify import FakeSpotify
+from apps.core.models import Playlist, Song
+from apps.core.spotify.sync import SpotifySyncEngine
+
+
+class SpotifySyncEngineTests(TestCase):
+    def setUp(self):
+        self.fake = FakeSpotify(playlists=2, tracks_per_playlist=5, latency=0)
+        self.fake.__enter__()
+        self.addCleanup(self.fake.__exit__, None, None, None)
+        self.user = User.objects.create_user('syncer', 'syncer@example.com', 'password')
+        client = spotipy.Spotify(auth='user-token', retries=0)
+        client.prefix = self.fake.api_url
+        self.engine = SpotifySyncEngine(self.user, client)
+
+    def songs(self, number):
+        playlist = Playlist.objects.get(user=self.user, name=f'Fake playlist {number}')
+        return list(playlist.songs.order_by('position').values_list('track__spotify_track_id', flat=True))
+
+    def test_first_sync_creates_playlists_and_songs(self):
+        result = self.engine.run()
+
+        self.assertEqual(result.playlists_created, 2)
+        self.assertEqual(result.playlists_synced, 2)
+        self.assertEqual(result.songs_added, 10)
+        self.assertEqual(self.songs(0), [f'faketrk0000{j:05d}' for j in range(5)])
+
+    def test_unchanged_snapshot_skips_track_fetch(self):
+        self.engine.run()
+        requests_before = self.fake.requests
+
+        result = self.engine.run()
+
+        self.assertEqual(result.playlists_skipped, 2)
+        self.assertEqual(result.playlists_synced, 0)
+        # Only the playlist page; no playlist items.
+        self.assertEqual(self.fake.requests - requests_before, 1)
+
+    def test_force_refetches_unchanged_playlists(self):
+        self.engine.run()
+
+        result = self.engine.run(force=True)
+
+        self.assertEqual(result.playlists_synced, 2)
+        self.assertEqual((result.songs_added, result.songs_removed), (0, 0))
+
+    def test_changed_snapshot_applies_only_the_diff(self):
+        self.engine.run()
+        before = dict(Song.objects.values_list('track__spotify_track_id', 'id'))
+        kept = ['faketrk000000003', 'faketrk000000000', 'faketrk000000001']
+        self.fake.set_playlist(0, [*kept, 'newtrack1', 'newtrack2'], snapshot_id='snap-2')
+
+        result = self.engine.run()
+
+        self.assertEqual(result.playlists_synced, 1)
+        self.assertEqual(result.playlists_skipped, 1)
+        self.assertEqual((result.songs_added, result.songs_removed), (2, 2))
+        self.assertEqual(self.songs(0), [*kept, 'newtrack1', 'newtrack2'])
+        after = dict(Song.objects.values_list('track__spotify_track_id', 'id'))
+        # Kept songs are updated in place rather than recreated.
+        self.assertEqual([after[track_id] for track_id in kept], [before[track_id] for track_id in kept])
+        self.assertEqual(Playlist.objects.get(name='Fake playlist 0').snapshot_id, 'snap-2')
@@ -0,0 +1,81 @@
+from importlib import import_module
+from unittest import mock
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+copy_migration = import_module('apps.core.migrations.0009_copy_songs_to_tracks')
+
+BEFORE = [('core', '0008_track')]
+AFTER = [('core', '0010_song_track_membership')]
+
+
+class CopySongsToTracksMigrationTests(TransactionTestCase):
+    def setUp(self):
+        self.migrate(BEFORE)
+        self.addCleanup(self.migrate_to_latest)
+        apps = self.executor.loader.project_state(BEFORE).apps
+        User = apps.get_model('auth', 'User')
+        Playlist = apps.get_model('core', 'Playlist')
+        Song = apps.get_model('core', 'Song')
+
+        user = User.objects.create(username='migrator', email='migrator@example.com')
+        first = Playlist.objects.create(user=user, spotify_playlist_id='first', name='First')
+        second = Playlist.objects.create(user=user, spotify_playlist_id='second', name='Second')
+        self.song_ids = [
+            # Copies of one track: the first seen has no audio features.
+            Song.objects.create(playlist=first, spotify_track_id='shared', name='Old Name', artist='Artist',
+                                popularity=10).pk,
+            Song.objects.create(playlist=second, spotify_track_id='shared', name='New Name', artist='Artist',
+                                popularity=20, energy=0.8, danceability=0.7, valence=0.6, tempo=120.0).pk,
+            Song.objects.create(playlist=second, spotify_track_id='solo', name='Solo', artist='Other',
+                                album='Album', duration_ms=1000).pk,
+        ]
+
+    def migrate(self, targets):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(targets)
+
+    def migrate_to_latest(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_forward_deduplicates_tracks(self):
+        # One song per chunk, so the features arrive after the track was created.
+        with mock.patch.object(copy_migration, 'CHUNK_SIZE', 1):
+            self.migrate(AFTER)
+        apps = self.executor.loader.project_state(AFTER).apps
+        Track = apps.get_model('core', 'Track')
+        Song = apps.get_model('core', 'Song')
+
+        self.assertEqual(Track.objects.count(), 2)
+        shared = Track.objects.get(spotify_track_id='shared')
+        self.assertEqual((shared.name, shared.popularity), ('Old Name', 10))
+        self.assertEqual((shared.energy, shared.danceability, shared.valence, shared.tempo), (0.8, 0.7, 0.6, 120.0))
+        solo = Track.objects.get(spotify_track_id='solo')
+        self.assertEqual((solo.artist, solo.album, solo.duration_ms), ('Other', 'Album', 1000))
+        self.assertEqual(
+            list(Song.objects.order_by('id').values_list('track__spotify_track_id', flat=True)),
+            ['shared', 'shared', 'solo'],
+        )
+
+    def test_forward_prefers_copy_with_features_within_a_chunk(self):
+        self.migrate(AFTER)
+        Track = self.executor.loader.project_state(AFTER).apps.get_model('core', 'Track')
+
+        shared = Track.objects.get(spotify_track_id='shared')
+        self.assertEqual((shared.name, shared.popularity, shared.energy), ('New Name', 20, 0.8))
+
+    def test_backward_restores_song_columns(self):
+        self.migrate(AFTER)
+        self.migrate(BEFORE)
+        Song = self.executor.loader.project_state(BEFORE).apps.get_model('core', 'Song')
+
+        rows = list(Song.objects.order_by('id').values_list(
+            'id', 'spotify_track_id', 'name', 'artist', 'album', 'duration_ms', 'popularity', 'energy', 'tempo',
+        ))
+        self.assertEqual(rows, [
+            (self.song_ids[0], 'shared', 'New Name', 'Artist', None, 0, 20, 0.8, 120.0),
+            (self.song_ids[1], 'shared', 'New Name', 'Artist', None, 0, 20, 0.8, 120.0),
+            (self.song_ids[2], 'solo', 'Solo', 'Other', 'Album', 1000, 0, None, None),
+        ])
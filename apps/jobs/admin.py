@@ -0,0 +1,14 @@
+"""
+Django admin configuration for the job queue.
+"""
+
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'user', 'status', 'attempts', 'progress', 'created_at')
+    list_filter = ('status', 'task', 'created_at')
+    search_fields = ('task', 'user__username')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'heartbeat_at')
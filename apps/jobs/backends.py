@@ -0,0 +1,38 @@
+"""
+Pluggable queue backends, selected with the ``JOB_QUEUE_BACKEND`` setting.
+"""
+
+from django.utils import timezone
+
+
+class DatabaseBackend:
+    """Leaves jobs in the database for ``manage.py run_worker`` to pick up."""
+
+    def enqueue(self, job):
+        pass
+
+
+class ImmediateBackend:
+    """
+    Runs jobs inline in the calling process. Useful for local development.
+
+    There is no worker to come back for a job that failed with attempts left,
+    so retries run straight away, without the backoff delay.
+    """
+
+    name = 'immediate'
+
+    def enqueue(self, job):
+        from .worker import execute
+
+        while True:
+            now = timezone.now()
+            job.status = job.STATUS_RUNNING
+            job.attempts += 1
+            job.locked_by = self.name
+            job.started_at = now
+            job.heartbeat_at = now
+            job.save(update_fields=['status', 'attempts', 'locked_by', 'started_at', 'heartbeat_at'])
+            execute(job)
+            if job.status != job.STATUS_QUEUED:
+                return
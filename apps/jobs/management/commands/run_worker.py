@@ -0,0 +1,41 @@
+"""
+Run a background job worker.
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs until interrupted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--task', action='append', dest='tasks',
+                            help='Only run jobs for this task name (repeatable).')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain due jobs and exit instead of polling.')
+
+    def handle(self, *args, **options):
+        worker = Worker(tasks=options['tasks'])
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f'Worker {worker.name} started')
+        while not self._stopping:
+            job = worker.run_once()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        self.stdout.write(f'Worker {worker.name} stopped')
+
+    def _stop(self, signum, frame):
+        # Finish the current job before exiting.
+        self._stopping = True
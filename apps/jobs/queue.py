@@ -0,0 +1,72 @@
+"""
+Task registry and enqueue API for background jobs.
+
+Apps declare work in a ``tasks`` module::
+
+    @task('spotify.sync_library')
+    def sync_library(job, force=False):
+        job.set_progress(50, 'Halfway there')
+        return {'done': True}
+
+and schedule it with ``enqueue('spotify.sync_library', user=user, force=True)``.
+"""
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+_registry = {}
+
+
+class UnknownTask(Exception):
+    """Raised when a job references a task name that is not registered."""
+
+
+def task(name, max_attempts=None):
+    """Register a function as a background task under ``name``."""
+    def decorator(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(f'No task registered as {name!r}')
+
+
+def get_backend():
+    """Instantiate the configured queue backend."""
+    return import_string(settings.JOB_QUEUE_BACKEND)()
+
+
+def enqueue(name, user=None, unique=False, **payload):
+    """
+    Create a job for task ``name`` and hand it to the queue backend.
+
+    With ``unique=True`` an already queued or running job for the same task
+    and user is returned instead of creating a duplicate.
+    """
+    func = get_task(name)
+    if unique:
+        existing = (
+            Job.objects.filter(task=name, user=user, status__in=Job.ACTIVE_STATUSES)
+            .order_by('created_at')
+            .first()
+        )
+        if existing is not None:
+            return existing
+
+    job = Job.objects.create(
+        user=user,
+        task=name,
+        payload=payload,
+        max_attempts=func.max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    get_backend().enqueue(job)
+    return job
@@ -0,0 +1,148 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.jobs.queue import enqueue, task
+from apps.jobs.worker import Worker
+
+
+@task('tests.noop')
+def noop(job):
+    return {'ok': True}
+
+
+@task('tests.flaky', max_attempts=3)
+def flaky(job, failures):
+    if job.job.attempts <= failures:
+        raise RuntimeError(f'attempt {job.job.attempts} failed')
+    return {'attempts': job.job.attempts}
+
+
+@task('tests.quiet')
+def quiet(job, seconds):
+    # Runs without calling set_progress.
+    time.sleep(seconds)
+    return {'slept': seconds}
+
+
+class RequeueStaleTests(TestCase):
+    def setUp(self):
+        self.worker = Worker(name='test-worker', tasks=['tests.noop'])
+
+    def running_job(self, attempts, max_attempts=3, heartbeat_age=3600):
+        return Job.objects.create(
+            task='tests.noop', status=Job.STATUS_RUNNING, attempts=attempts, max_attempts=max_attempts,
+            locked_by='dead-worker', heartbeat_at=timezone.now() - timedelta(seconds=heartbeat_age),
+        )
+
+    def test_requeues_stale_job_with_attempts_left(self):
+        job = self.running_job(attempts=1)
+
+        self.assertEqual(self.worker.requeue_stale(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertEqual(job.locked_by, '')
+        self.assertEqual(job.attempts, 1)
+
+    def test_fails_stale_job_out_of_attempts(self):
+        job = self.running_job(attempts=3)
+
+        self.assertEqual(self.worker.requeue_stale(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_leaves_recent_heartbeats_alone(self):
+        job = self.running_job(attempts=1, heartbeat_age=1)
+
+        self.assertEqual(self.worker.requeue_stale(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_RUNNING)
+
+    def test_job_that_keeps_killing_its_worker_fails(self):
+        job = Job.objects.create(task='tests.noop', max_attempts=3)
+        for _ in range(3):
+            claimed = self.worker.claim()
+            self.assertEqual(claimed.pk, job.pk)
+            # The worker dies without finishing: backdate its heartbeat.
+            Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+            self.worker.requeue_stale()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertIsNone(self.worker.claim())
+
+
+@override_settings(JOB_MAX_CONCURRENT_PER_USER=2)
+class ClaimLimitTests(TestCase):
+    def setUp(self):
+        self.worker = Worker(name='test-worker', tasks=['tests.noop'])
+        self.user = User.objects.create_user('busy', 'busy@example.com', 'password')
+
+    def test_claim_rechecks_limit_for_jobs_listed_before_another_claim(self):
+        Job.objects.create(task='tests.noop', user=self.user, status=Job.STATUS_RUNNING, locked_by='other')
+        queued = [Job.objects.create(task='tests.noop', user=self.user) for _ in range(2)]
+        # Both were due when listed; another worker claims one in between.
+        stale_listing = Job.objects.filter(pk__in=[job.pk for job in queued]).order_by('id')
+
+        with mock.patch.object(Worker, 'due_jobs', return_value=stale_listing):
+            self.assertEqual(self.worker.claim().pk, queued[0].pk)
+            self.assertIsNone(self.worker.claim())
+
+        self.assertEqual(Job.objects.filter(user=self.user, status=Job.STATUS_RUNNING).count(), 2)
+        queued[1].refresh_from_db()
+        self.assertEqual(queued[1].status, Job.STATUS_QUEUED)
+
+    def test_jobs_without_user_are_not_limited(self):
+        for _ in range(3):
+            Job.objects.create(task='tests.noop')
+
+        self.assertEqual(len([self.worker.claim() for _ in range(3)]), 3)
+        self.assertEqual(Job.objects.filter(status=Job.STATUS_RUNNING).count(), 3)
+
+
+@override_settings(JOB_QUEUE_BACKEND='apps.jobs.backends.ImmediateBackend')
+class ImmediateBackendTests(TestCase):
+    def test_records_who_ran_the_job_and_when(self):
+        job = enqueue('tests.noop')
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.STATUS_SUCCEEDED, 1, 'immediate'))
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.heartbeat_at)
+
+    def test_retries_inline(self):
+        with self.assertLogs('apps.jobs.worker', 'ERROR'):
+            job = enqueue('tests.flaky', failures=2)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result), (Job.STATUS_SUCCEEDED, 3, {'attempts': 3}))
+
+    def test_fails_after_max_attempts(self):
+        with self.assertLogs('apps.jobs.worker', 'ERROR'):
+            job = enqueue('tests.flaky', failures=3)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_FAILED, 3))
+        self.assertIn('attempt 3 failed', job.error_message)
+
+
+class HeartbeatTests(TransactionTestCase):
+    @override_settings(JOB_HEARTBEAT_SECONDS=0.05)
+    def test_worker_refreshes_heartbeat_while_task_runs(self):
+        job = Job.objects.create(task='tests.quiet', payload={'seconds': 0.5})
+
+        Worker(name='test-worker', tasks=['tests.quiet']).run_once()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertGreater(job.heartbeat_at, job.started_at + timedelta(seconds=0.2))
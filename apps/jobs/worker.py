@@ -0,0 +1,241 @@
+"""
+Job execution: claiming, running, progress reporting and retries.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.core.locking import lock_row
+
+from .models import Job
+from .queue import UnknownTask, enqueue, get_task
+
+logger = logging.getLogger(__name__)
+
+# How often a polling worker looks at JOB_SCHEDULE.
+SCHEDULE_CHECK_SECONDS = 30
+
+
+class JobContext:
+    """Handle passed to task functions for progress reporting."""
+
+    def __init__(self, job):
+        self.job = job
+
+    @property
+    def id(self):
+        return self.job.pk
+
+    @property
+    def user(self):
+        return self.job.user
+
+    def set_progress(self, progress, message=''):
+        """Persist progress (0-100) and refresh the worker heartbeat."""
+        progress = max(0, min(100, int(progress)))
+        now = timezone.now()
+        Job.objects.filter(pk=self.job.pk).update(
+            progress=progress, progress_message=message[:255], heartbeat_at=now
+        )
+        self.job.progress = progress
+        self.job.progress_message = message[:255]
+        self.job.heartbeat_at = now
+
+
+class Heartbeat:
+    """
+    Refreshes a running job's ``heartbeat_at`` from a background thread every
+    ``JOB_HEARTBEAT_SECONDS``, so a task that reports no progress for longer
+    than ``JOB_STALE_AFTER_SECONDS`` is not mistaken for an abandoned one.
+    """
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = interval or settings.JOB_HEARTBEAT_SECONDS
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-{job.pk}-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    # Only while this worker still owns the job.
+                    Job.objects.filter(
+                        pk=self.job.pk, status=Job.STATUS_RUNNING, locked_by=self.job.locked_by
+                    ).update(heartbeat_at=timezone.now())
+                except DatabaseError:
+                    logger.warning('Heartbeat for job %s failed', self.job.pk, exc_info=True)
+        finally:
+            connection.close()
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given attempt number."""
+    base = settings.JOB_RETRY_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(base, settings.JOB_RETRY_BACKOFF_MAX_SECONDS) * random.uniform(0.8, 1.2))
+
+
+def execute(job):
+    """Run a claimed job and record its outcome."""
+    try:
+        func = get_task(job.task)
+        result = func(JobContext(job), **job.payload)
+    except UnknownTask as exc:
+        _fail(job, str(exc))
+        return job
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.task, job.attempts)
+        if job.attempts < job.max_attempts:
+            job.status = Job.STATUS_QUEUED
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+            job.error_message = f'{exc.__class__.__name__}: {exc}'
+            job.locked_by = ''
+            job.save(update_fields=['status', 'run_after', 'error_message', 'locked_by'])
+        else:
+            _fail(job, ''.join(traceback.format_exception_only(type(exc), exc)).strip())
+        return job
+
+    job.status = Job.STATUS_SUCCEEDED
+    job.progress = 100
+    job.result = result
+    job.error_message = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'result', 'error_message', 'finished_at'])
+    return job
+
+
+def _fail(job, message):
+    job.status = Job.STATUS_FAILED
+    job.error_message = message
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error_message', 'finished_at'])
+
+
+class Worker:
+    """Polls the database queue and executes due jobs."""
+
+    def __init__(self, name=None, tasks=None):
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.tasks = tasks
+        self._next_schedule_check = 0.0
+
+    def due_jobs(self):
+        """Queued jobs whose owner is still under the concurrency limit."""
+        limit = settings.JOB_MAX_CONCURRENT_PER_USER
+        busy_users = (
+            Job.objects.filter(status=Job.STATUS_RUNNING, user__isnull=False)
+            .values('user')
+            .annotate(running=Count('id'))
+            .filter(running__gte=limit)
+            .values('user')
+        )
+        qs = (
+            Job.objects.filter(status=Job.STATUS_QUEUED, run_after__lte=timezone.now())
+            .filter(Q(user__isnull=True) | ~Q(user__in=busy_users))
+            .order_by('run_after', 'id')
+        )
+        if self.tasks:
+            qs = qs.filter(task__in=self.tasks)
+        return qs
+
+    def claim(self):
+        """Atomically take ownership of the next due job, if any."""
+        for job in self.due_jobs()[:10]:
+            with transaction.atomic():
+                if job.user_id is not None:
+                    # due_jobs() checked the limit without a lock; re-check it
+                    # while holding the owner's row, so workers claiming jobs
+                    # for the same user take turns and see each other's claims.
+                    lock_row(User.objects.filter(pk=job.user_id))
+                    running = Job.objects.filter(user_id=job.user_id, status=Job.STATUS_RUNNING).count()
+                    if running >= settings.JOB_MAX_CONCURRENT_PER_USER:
+                        continue
+                now = timezone.now()
+                # Compare-and-set keeps two workers from running the same job on
+                # any backend, without needing SELECT ... FOR UPDATE SKIP LOCKED.
+                claimed = Job.objects.filter(pk=job.pk, status=Job.STATUS_QUEUED).update(
+                    status=Job.STATUS_RUNNING,
+                    attempts=job.attempts + 1,
+                    locked_by=self.name,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+
+    def requeue_stale(self):
+        """
+        Return jobs abandoned by crashed workers to the queue.
+
+        The abandoned run already counted as an attempt when it was claimed,
+        so a job that keeps killing its worker fails after ``max_attempts``
+        instead of being requeued forever. Returns the number requeued.
+        """
+        now = timezone.now()
+        stale = Job.objects.filter(
+            status=Job.STATUS_RUNNING,
+            heartbeat_at__lt=now - timedelta(seconds=settings.JOB_STALE_AFTER_SECONDS),
+        )
+        message = 'Worker stopped responding while running the job'
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.STATUS_FAILED, error_message=message, finished_at=now, locked_by=''
+        )
+        if failed:
+            logger.warning('Failed %s stale jobs that ran out of attempts', failed)
+        return stale.filter(attempts__lt=F('max_attempts')).update(
+            status=Job.STATUS_QUEUED, error_message=message, run_after=now, locked_by=''
+        )
+
+    def enqueue_scheduled(self):
+        """Queue periodic tasks from ``JOB_SCHEDULE`` whose interval has elapsed."""
+        now = timezone.now()
+        queued = []
+        for name, interval in settings.JOB_SCHEDULE.items():
+            if self.tasks and name not in self.tasks:
+                continue
+            last_run = (
+                Job.objects.filter(task=name, user__isnull=True)
+                .order_by('-created_at')
+                .values_list('created_at', flat=True)
+                .first()
+            )
+            if last_run is None or last_run <= now - timedelta(seconds=interval):
+                # unique=True keeps several workers from queueing it twice.
+                queued.append(enqueue(name, unique=True))
+        return queued
+
+    def run_once(self):
+        """Execute at most one job; returns it, or ``None`` if the queue was empty."""
+        close_old_connections()
+        self.requeue_stale()
+        if time.monotonic() >= self._next_schedule_check:
+            self._next_schedule_check = time.monotonic() + SCHEDULE_CHECK_SECONDS
+            self.enqueue_scheduled()
+        job = self.claim()
+        if job is not None:
+            logger.info('Worker %s running job %s (%s)', self.name, job.pk, job.task)
+            with Heartbeat(job):
+                execute(job)
+        return job
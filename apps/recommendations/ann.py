@@ -0,0 +1,383 @@
+"""
+Approximate nearest-neighbour index over every track in the catalog.
+
+An inverted-file (IVF) index: tracks are clustered with k-means on five
+features (energy, danceability, valence, normalized tempo and popularity),
+stored contiguously by cluster in memory-mapped ``.npy`` files, and a query
+only scans the ``nprobe`` clusters closest to it. Tracks added after a build
+are assigned to their nearest existing cluster and kept in a small delta
+segment until the next full rebuild; a base track whose features changed is
+masked out of the base by the ``superseded`` flags and re-added to the delta.
+
+Every build or update writes a complete new version directory under
+``ANN_INDEX_DIR`` and then atomically replaces the ``CURRENT`` pointer file
+naming it, so a reader always maps files from a single version.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.models import Track
+from .engine import normalize_tempo
+
+FEATURES = ('energy', 'danceability', 'valence', 'tempo', 'popularity')
+DIM = len(FEATURES)
+# Fixed-width bytes keep ids mappable; Spotify track ids are 22 characters.
+TRACK_ID_DTYPE = 'S64'
+CHUNK_SIZE = 50_000
+POINTER = 'CURRENT'
+# Versions kept on disk: the current one and the one before it, which
+# processes that have not yet noticed the swap may still be reading.
+KEEP_VERSIONS = 2
+
+
+class IndexNotBuilt(Exception):
+    """Raised when querying before ``build_ann_index`` has run."""
+
+
+def to_vectors(rows):
+    """Convert ``(energy, danceability, valence, tempo, popularity)`` rows to index space."""
+    vectors = np.asarray(rows, dtype=np.float32).reshape(-1, DIM)
+    vectors[:, 3] = normalize_tempo(vectors[:, 3])
+    vectors[:, 4] = vectors[:, 4] / 100.0
+    return vectors
+
+
+def iter_catalog(after_id=0, enriched_since=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield ``(max_track_pk, track_ids, vectors)`` chunks of tracks with full features.
+
+    Only tracks after ``after_id`` are read, plus, when ``enriched_since`` is
+    given, older tracks whose audio features were fetched after it.
+    """
+    new = Q(id__gt=after_id)
+    if enriched_since is not None:
+        new |= Q(audio_features_fetched_at__gt=enriched_since)
+        after_id = 0
+    queryset = (
+        Track.objects.filter(new)
+        .exclude(energy__isnull=True).exclude(danceability__isnull=True)
+        .exclude(valence__isnull=True).exclude(tempo__isnull=True)
+        .order_by('id')
+        .values_list('id', 'spotify_track_id', *FEATURES)
+    )
+    last_id = after_id
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        track_ids = np.array([row[1] for row in rows], dtype=TRACK_ID_DTYPE)
+        yield last_id, track_ids, to_vectors([row[2:] for row in rows])
+
+
+def kmeans(vectors, k, iterations=20, sample_size=50_000, seed=0):
+    """Plain Lloyd's k-means on a random sample; returns the centroids."""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = assign(vectors, centroids)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Re-seed empty clusters so every list stays useful.
+        empty = np.flatnonzero(~filled)
+        centroids[empty] = vectors[rng.integers(len(vectors), size=len(empty))]
+    return centroids
+
+
+def nearest_centroids(vectors, centroids, count=None):
+    """Index of the closest centroid per row, or of the ``count`` closest when given."""
+    distances = (
+        (vectors ** 2).sum(axis=1)[:, None]
+        - 2 * vectors @ centroids.T
+        + (centroids ** 2).sum(axis=1)[None, :]
+    )
+    if count is None:
+        return distances.argmin(axis=1)
+    return np.argsort(distances, axis=1)[:, :count]
+
+
+def assign(vectors, centroids, chunk_size=8192):
+    """Nearest centroid per row, chunked to bound the distance matrix size."""
+    if not len(vectors):
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate([
+        nearest_centroids(vectors[i:i + chunk_size], centroids)
+        for i in range(0, len(vectors), chunk_size)
+    ])
+
+
+class AnnIndex:
+    """Read side of the on-disk IVF index."""
+
+    FILES = ('centroids', 'offsets', 'vectors', 'track_ids', 'sorted_track_ids', 'sorted_rows',
+             'superseded', 'delta_vectors', 'delta_track_ids', 'delta_lists')
+
+    def __init__(self, root, version=None):
+        self.root = Path(root)
+        self.version = version or current_version(self.root)
+        if self.version is None:
+            raise IndexNotBuilt(f'No ANN index at {self.root}; run manage.py build_ann_index')
+        self.path = self.root / self.version
+        self.meta = json.loads((self.path / 'meta.json').read_text())
+        for name in self.FILES:
+            setattr(self, name, np.load(self.path / f'{name}.npy', mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.track_ids) - self.meta['superseded_count'] + len(self.delta_track_ids)
+
+    def vector_for(self, track_id):
+        key = np.array(track_id, dtype=TRACK_ID_DTYPE)
+        # The delta holds the newer vector of a superseded base row.
+        matches = np.flatnonzero(self.delta_track_ids == key)
+        if len(matches):
+            return np.asarray(self.delta_vectors[matches[0]])
+        position = np.searchsorted(self.sorted_track_ids, key)
+        if position < len(self.sorted_track_ids) and self.sorted_track_ids[position] == key:
+            return np.asarray(self.vectors[self.sorted_rows[position]])
+        return None
+
+    def search(self, vector, k=10, nprobe=None, exclude=None):
+        """Return ``[(track_id, distance), ...]`` for the ``k`` nearest tracks."""
+        nprobe = min(nprobe or settings.ANN_NPROBE, len(self.centroids))
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, DIM)
+        lists = nearest_centroids(vector, np.asarray(self.centroids), nprobe)[0]
+
+        candidate_ids, candidate_vectors = [], []
+        for cluster in lists:
+            start, end = int(self.offsets[cluster]), int(self.offsets[cluster + 1])
+            if self.meta['superseded_count']:
+                current = ~self.superseded[start:end]
+                candidate_ids.append(self.track_ids[start:end][current])
+                candidate_vectors.append(self.vectors[start:end][current])
+            else:
+                candidate_ids.append(self.track_ids[start:end])
+                candidate_vectors.append(self.vectors[start:end])
+        if len(self.delta_lists):
+            in_probed = np.isin(self.delta_lists, lists)
+            candidate_ids.append(self.delta_track_ids[in_probed])
+            candidate_vectors.append(self.delta_vectors[in_probed])
+
+        ids = np.concatenate(candidate_ids)
+        vectors = np.concatenate(candidate_vectors)
+        if exclude is not None:
+            keep = ids != np.array(exclude, dtype=TRACK_ID_DTYPE)
+            ids, vectors = ids[keep], vectors[keep]
+        if not len(ids):
+            return []
+
+        distances = np.sqrt(((vectors - vector) ** 2).sum(axis=1))
+        k = min(k, len(ids))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return [(ids[i].decode(), float(distances[i])) for i in top]
+
+    def similar(self, track_id, k=10, nprobe=None):
+        vector = self.vector_for(track_id)
+        if vector is None:
+            return None
+        return self.search(vector, k=k, nprobe=nprobe, exclude=track_id)
+
+
+def current_version(root):
+    """Name of the version directory ``CURRENT`` points at, or None."""
+    try:
+        return (Path(root) / POINTER).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _save(path, name, array):
+    np.save(path / f'{name}.npy', array)
+
+
+def _link(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _publish(root, staging, meta):
+    """Move the finished ``staging`` directory into place and point ``CURRENT`` at it."""
+    (staging / 'meta.json').write_text(json.dumps(meta, indent=2))
+    previous = current_version(root)
+    # Zero-padded so version directories sort by age.
+    version = f"v{meta['version']:015d}-{staging.name.rpartition('-')[2]}"
+    os.rename(staging, root / version)
+    tmp = root / f'{POINTER}.{version}.tmp'
+    tmp.write_text(version)
+    os.replace(tmp, root / POINTER)
+    _prune(root, keep=previous)
+
+
+def _prune(root, keep):
+    # Only versions older than the one just replaced; a newer directory may
+    # belong to a concurrent build that has not swapped the pointer yet.
+    if keep is None:
+        return
+    for old in sorted(root.glob('v*'))[:-KEEP_VERSIONS]:
+        if old.name < keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def _staging_dir(root):
+    root.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix='build-', dir=root))
+
+
+def build_index(path=None, n_lists=None):
+    """Full rebuild from every track with audio features. Returns the metadata."""
+    root = Path(path or settings.ANN_INDEX_DIR)
+    started = time.perf_counter()
+    watermark = timezone.now()
+
+    id_chunks, vector_chunks, max_track_pk = [], [], 0
+    for max_track_pk, track_ids, vectors in iter_catalog():
+        id_chunks.append(track_ids)
+        vector_chunks.append(vectors)
+
+    track_ids = np.concatenate(id_chunks) if id_chunks else np.empty(0, dtype=TRACK_ID_DTYPE)
+    vectors = np.concatenate(vector_chunks) if vector_chunks else np.empty((0, DIM), dtype=np.float32)
+    if not len(vectors):
+        raise IndexNotBuilt('No tracks with audio features to index')
+
+    n_lists = n_lists or int(np.clip(np.sqrt(len(vectors)), 1, 4096))
+    n_lists = min(n_lists, len(vectors))
+    centroids = kmeans(vectors, n_lists)
+    assignment = assign(vectors, centroids)
+    order = np.argsort(assignment, kind='stable')
+    track_ids, vectors = track_ids[order], vectors[order]
+    offsets = np.searchsorted(assignment[order], np.arange(n_lists + 1)).astype(np.int64)
+    sorted_rows = np.argsort(track_ids, kind='stable').astype(np.int64)
+
+    staging = _staging_dir(root)
+    try:
+        _save(staging, 'centroids', centroids.astype(np.float32))
+        _save(staging, 'offsets', offsets)
+        _save(staging, 'vectors', vectors)
+        _save(staging, 'track_ids', track_ids)
+        _save(staging, 'sorted_track_ids', track_ids[sorted_rows])
+        _save(staging, 'sorted_rows', sorted_rows)
+        _save(staging, 'superseded', np.zeros(len(track_ids), dtype=bool))
+        _save(staging, 'delta_vectors', np.empty((0, DIM), dtype=np.float32))
+        _save(staging, 'delta_track_ids', np.empty(0, dtype=TRACK_ID_DTYPE))
+        _save(staging, 'delta_lists', np.empty(0, dtype=np.int64))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    meta = {
+        'version': int(time.time() * 1000),
+        'n_lists': n_lists,
+        'base_count': int(len(track_ids)),
+        'superseded_count': 0,
+        'delta_count': 0,
+        'max_track_pk': int(max_track_pk),
+        'enriched_until': watermark.isoformat(),
+        'build_seconds': round(time.perf_counter() - started, 3),
+    }
+    _publish(root, staging, meta)
+    return meta
+
+
+def update_index(path=None):
+    """
+    Add tracks created or enriched since the last update to the delta segment.
+
+    A track already in the index is replaced rather than added twice: its
+    base row is flagged as superseded, or its earlier delta row dropped.
+    Falls back to a full rebuild when there is no index yet or when the delta
+    outgrows ``ANN_REBUILD_RATIO`` of the base, since stale centroids slowly
+    degrade recall.
+    """
+    root = Path(path or settings.ANN_INDEX_DIR)
+    try:
+        index = AnnIndex(root)
+    except IndexNotBuilt:
+        return build_index(root)
+    meta = dict(index.meta)
+
+    watermark = timezone.now()
+    id_chunks, vector_chunks, max_track_pk = [], [], meta['max_track_pk']
+    chunks = iter_catalog(after_id=meta['max_track_pk'], enriched_since=parse_datetime(meta['enriched_until']))
+    for chunk_max_pk, track_ids, vectors in chunks:
+        max_track_pk = max(max_track_pk, chunk_max_pk)
+        id_chunks.append(track_ids)
+        vector_chunks.append(vectors)
+
+    delta = {}
+    if id_chunks:
+        new_ids, new_vectors = np.concatenate(id_chunks), np.concatenate(vector_chunks)
+        kept = ~np.isin(index.delta_track_ids, new_ids)
+        delta_count = int(kept.sum()) + len(new_ids)
+        if delta_count > settings.ANN_REBUILD_RATIO * meta['base_count']:
+            return build_index(root, n_lists=meta['n_lists'])
+
+        positions = np.minimum(np.searchsorted(index.sorted_track_ids, new_ids), len(index.sorted_track_ids) - 1)
+        in_base = index.sorted_track_ids[positions] == new_ids
+        superseded = np.array(index.superseded)
+        superseded[index.sorted_rows[positions[in_base]]] = True
+        delta = {
+            'superseded': superseded,
+            'delta_vectors': np.concatenate([index.delta_vectors[kept], new_vectors]),
+            'delta_track_ids': np.concatenate([index.delta_track_ids[kept], new_ids]),
+            'delta_lists': np.concatenate([
+                index.delta_lists[kept], assign(new_vectors, np.asarray(index.centroids)).astype(np.int64)
+            ]),
+        }
+        meta['superseded_count'] = int(superseded.sum())
+        meta['delta_count'] = delta_count
+
+    staging = _staging_dir(root)
+    try:
+        for name in AnnIndex.FILES:
+            if name in delta:
+                _save(staging, name, delta[name])
+            else:
+                # The base segment is immutable between rebuilds, so the new
+                # version can share its files instead of copying them.
+                _link(index.path / f'{name}.npy', staging / f'{name}.npy')
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    meta.update(
+        version=int(time.time() * 1000),
+        max_track_pk=int(max_track_pk),
+        enriched_until=watermark.isoformat(),
+    )
+    _publish(root, staging, meta)
+    return meta
+
+
+_loaded = None
+_loaded_lock = threading.Lock()
+
+
+def get_index():
+    """Process-wide index, re-mapped when a rebuild or update published a new version."""
+    global _loaded
+    root = Path(settings.ANN_INDEX_DIR)
+    version = current_version(root)
+    if version is None:
+        raise IndexNotBuilt(f'No ANN index at {root}; run manage.py build_ann_index')
+    with _loaded_lock:
+        if _loaded is None or _loaded[0] != (root, version):
+            _loaded = ((root, version), AnnIndex(root, version))
+        return _loaded[1]
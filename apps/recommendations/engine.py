@@ -0,0 +1,168 @@
+"""
+Audio-feature recommendation engine.
+
+A user's songs are loaded once into a NumPy feature matrix (energy,
+danceability, valence and normalized tempo) and cached in-process for up to
+``RECOMMENDATION_CACHE_SECONDS``. Ranking a
+playlist's candidates against its centroid or a mood target is then a single
+vectorized pass with no database or LLM round trip.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.models import Song
+
+FEATURES = ('energy', 'danceability', 'valence', 'tempo')
+TEMPO_RANGE = (50.0, 200.0)
+DEFAULT_WEIGHTS = np.array([1.0, 1.0, 1.0, 0.5], dtype=np.float32)
+
+# Targets as (energy, danceability, valence, tempo in BPM).
+MOODS = {
+    'happy': (0.75, 0.70, 0.90, 120.0),
+    'upbeat': (0.85, 0.75, 0.80, 125.0),
+    'energetic': (0.90, 0.75, 0.60, 140.0),
+    'party': (0.85, 0.90, 0.75, 124.0),
+    'workout': (0.90, 0.70, 0.55, 150.0),
+    'chill': (0.30, 0.50, 0.50, 90.0),
+    'relaxing': (0.20, 0.35, 0.45, 80.0),
+    'focus': (0.40, 0.35, 0.40, 100.0),
+    'sad': (0.25, 0.30, 0.15, 75.0),
+    'romantic': (0.40, 0.50, 0.60, 95.0),
+}
+
+METRICS = ('cosine', 'weighted')
+
+
+class UnknownMood(ValueError):
+    pass
+
+
+def normalize_tempo(tempo):
+    low, high = TEMPO_RANGE
+    return np.clip((tempo - low) / (high - low), 0.0, 1.0)
+
+
+def mood_vector(mood):
+    try:
+        energy, danceability, valence, tempo = MOODS[mood]
+    except KeyError:
+        raise UnknownMood(f'Unknown mood {mood!r}; choose from {", ".join(sorted(MOODS))}')
+    return np.array([energy, danceability, valence, normalize_tempo(tempo)], dtype=np.float32)
+
+
+@dataclass
+class FeatureMatrix:
+    """All of one user's songs that have audio features."""
+    song_ids: np.ndarray
+    playlist_ids: np.ndarray
+    track_ids: np.ndarray
+    vectors: np.ndarray
+
+    @classmethod
+    def load(cls, user_id):
+        rows = list(
+            Song.objects.filter(playlist__user_id=user_id)
+            .exclude(track__energy__isnull=True).exclude(track__danceability__isnull=True)
+            .exclude(track__valence__isnull=True).exclude(track__tempo__isnull=True)
+            .values_list('id', 'playlist_id', 'track_id', *(f'track__{name}' for name in FEATURES))
+        )
+        if not rows:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(empty, empty, empty, np.empty((0, len(FEATURES)), dtype=np.float32))
+        ids, playlists, tracks, *features = zip(*rows)
+        vectors = np.column_stack(features).astype(np.float32)
+        vectors[:, 3] = normalize_tempo(vectors[:, 3])
+        return cls(
+            np.array(ids, dtype=np.int64),
+            np.array(playlists, dtype=np.int64),
+            np.array(tracks, dtype=np.int64),
+            vectors,
+        )
+
+
+def score(vectors, target, metric='cosine', weights=DEFAULT_WEIGHTS):
+    """Similarity of every row in ``vectors`` to ``target``; higher is better."""
+    if metric == 'cosine':
+        weighted = vectors * weights
+        goal = target * weights
+        norms = np.linalg.norm(weighted, axis=1) * np.linalg.norm(goal)
+        return (weighted @ goal) / np.maximum(norms, 1e-9)
+    if metric == 'weighted':
+        return -np.sqrt((((vectors - target) ** 2) * weights).sum(axis=1))
+    raise ValueError(f'Unknown metric {metric!r}; choose from {", ".join(METRICS)}')
+
+
+def suggest(matrix, playlist_id, mood=None, limit=10, metric='cosine'):
+    """
+    Rank tracks from the user's other playlists for ``playlist_id``.
+
+    The target is the mood vector when ``mood`` is given, otherwise the
+    playlist's centroid. Returns ``[(song_id, score), ...]`` best first, with
+    one row per track and nothing already in the playlist.
+    """
+    in_playlist = matrix.playlist_ids == playlist_id
+    if mood:
+        target = mood_vector(mood)
+    elif in_playlist.any():
+        target = matrix.vectors[in_playlist].mean(axis=0)
+    else:
+        return []
+
+    candidates = ~np.isin(matrix.track_ids, matrix.track_ids[in_playlist])
+    if not candidates.any():
+        return []
+    indexes = np.flatnonzero(candidates)
+    # The same track can sit in several playlists; keep its first row.
+    _, first = np.unique(matrix.track_ids[indexes], return_index=True)
+    indexes = indexes[first]
+
+    scores = score(matrix.vectors[indexes], target, metric)
+    limit = min(limit, len(indexes))
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top])]
+    return [(int(matrix.song_ids[indexes[i]]), float(scores[i])) for i in top]
+
+
+def _version_key(user_id):
+    return f'rec-features-version:{user_id}'
+
+
+_matrices = {}
+_matrices_lock = threading.Lock()
+
+
+def get_feature_matrix(user_id):
+    """Cached ``FeatureMatrix`` for ``user_id``, rebuilt after invalidation or expiry."""
+    version = cache.get(_version_key(user_id), 0)
+    now = time.monotonic()
+    cached = _matrices.get(user_id)
+    if cached is not None and cached[0] == version and cached[1] > now:
+        return cached[2]
+    matrix = FeatureMatrix.load(user_id)
+    with _matrices_lock:
+        _matrices.pop(user_id, None)
+        if len(_matrices) >= settings.RECOMMENDATION_CACHE_MAX_USERS:
+            _matrices.pop(next(iter(_matrices)))
+        _matrices[user_id] = (version, now + settings.RECOMMENDATION_CACHE_SECONDS, matrix)
+    return matrix
+
+
+def invalidate_feature_matrix(user_id):
+    """
+    Mark ``user_id``'s matrix stale in every process sharing the cache.
+
+    With a process-local cache (the default locmem ``CACHE_URL``) that is only
+    this process; the others rebuild when their entry expires.
+    """
+    key = _version_key(user_id)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
@@ -0,0 +1,129 @@
+"""
+Measure recall and latency of the ANN index against exact brute force.
+"""
+
+import json
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from apps.core.benchmarks.database import benchmark_database
+from apps.core.benchmarks.factories import create_playlists, create_users
+from apps.core.models import Playlist, Track
+from apps.recommendations.ann import AnnIndex, build_index, update_index
+
+USER_PREFIX = 'annbench'
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway catalog and report ANN recall@k vs latency per nprobe.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--songs', type=int, default=1_000_000,
+                            help='Tracks to seed in the benchmark catalog.')
+        parser.add_argument('--delta', type=int, default=10_000,
+                            help='Tracks added after the build, served from the delta segment.')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('-k', type=int, default=10)
+        parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Reuse an already seeded benchmark database.')
+        parser.add_argument('--json', action='store_true', help='Print a JSON report.')
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']), tempfile.TemporaryDirectory() as path:
+            if not Track.objects.exists():
+                self.seed(options['songs'])
+            report = self.run(path, options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"Tracks: {report['tracks']} ({report['delta_tracks']} in delta), "
+            f"{report['lists']} lists, built in {report['build_seconds']:.1f}s"
+        )
+        self.stdout.write(f"Brute force:  mean {report['brute_force_ms']['mean']:.3f} ms, "
+                          f"p99 {report['brute_force_ms']['p99']:.3f} ms")
+        for row in report['ann']:
+            self.stdout.write(
+                f"nprobe {row['nprobe']:>3}:   recall@{options['k']} {row['recall']:.3f}, "
+                f"mean {row['mean_ms']:.3f} ms, p99 {row['p99_ms']:.3f} ms"
+            )
+
+    def seed(self, songs):
+        started = time.perf_counter()
+        user, = create_users(1, prefix=USER_PREFIX)
+        create_playlists(user, max(1, songs // 1000), songs_per_playlist=min(songs, 1000))
+        self.stdout.write(f'Seeded {Track.objects.count()} tracks in {time.perf_counter() - started:.1f}s')
+
+    def run(self, path, options):
+        meta = build_index(path)
+        delta_user, created = User.objects.get_or_create(username=f'{USER_PREFIX}-delta')
+        if options['delta']:
+            # Songs added after the build go through the incremental path, as in production.
+            create_playlists(delta_user, 1, songs_per_playlist=options['delta'])
+            meta = update_index(path)
+        try:
+            return self.measure(AnnIndex(path), meta, options)
+        finally:
+            # Keep --keepdb runs comparable by dropping the delta again.
+            delta_tracks = list(
+                Track.objects.filter(songs__playlist__user=delta_user).values_list('id', flat=True)
+            )
+            Playlist.objects.filter(user=delta_user).delete()
+            Track.objects.filter(id__in=delta_tracks).delete()
+
+    def measure(self, index, meta, options):
+        current = ~np.asarray(index.superseded)
+        ids = np.concatenate([np.asarray(index.track_ids)[current], np.asarray(index.delta_track_ids)])
+        vectors = np.concatenate([np.asarray(index.vectors)[current], np.asarray(index.delta_vectors)])
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(ids), min(options['queries'], len(ids)), replace=False)
+        k = options['k']
+
+        exact, brute_timings = [], []
+        for row in sample:
+            started = time.perf_counter()
+            distances = np.sqrt(((vectors - vectors[row]) ** 2).sum(axis=1))
+            distances[row] = np.inf
+            top = np.argpartition(distances, k)[:k]
+            brute_timings.append((time.perf_counter() - started) * 1000)
+            exact.append({ids[i] for i in top})
+
+        results = []
+        for nprobe in options['nprobe']:
+            timings, hits = [], 0
+            for row, truth in zip(sample, exact):
+                track_id = ids[row].decode()
+                started = time.perf_counter()
+                found = index.similar(track_id, k=k, nprobe=nprobe)
+                timings.append((time.perf_counter() - started) * 1000)
+                hits += len(truth & {found_id.encode() for found_id, distance in found})
+            results.append({
+                'nprobe': nprobe,
+                'recall': hits / (k * len(sample)),
+                'mean_ms': statistics.fmean(timings),
+                'p99_ms': percentile(timings, 99),
+            })
+
+        return {
+            'tracks': len(index),
+            'delta_tracks': meta['delta_count'],
+            'lists': meta['n_lists'],
+            'build_seconds': meta.get('build_seconds', 0.0),
+            'brute_force_ms': {
+                'mean': statistics.fmean(brute_timings),
+                'p99': percentile(brute_timings, 99),
+            },
+            'ann': results,
+        }
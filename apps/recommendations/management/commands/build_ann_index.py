@@ -0,0 +1,33 @@
+"""
+Build or incrementally update the catalog-wide ANN index.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recommendations.ann import IndexNotBuilt, build_index, update_index
+
+
+class Command(BaseCommand):
+    help = 'Build the "more like this" ANN index over every track with audio features.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Rebuild from scratch instead of appending new tracks.')
+        parser.add_argument('--lists', type=int, default=None,
+                            help='Number of IVF clusters (default: sqrt of the track count).')
+        parser.add_argument('--path', default=None,
+                            help=f'Index directory (default: ANN_INDEX_DIR, {settings.ANN_INDEX_DIR}).')
+
+    def handle(self, *args, **options):
+        try:
+            if options['full'] or options['lists']:
+                meta = build_index(options['path'], n_lists=options['lists'])
+            else:
+                meta = update_index(options['path'])
+        except IndexNotBuilt as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            f"ANN index: {meta['base_count']} tracks in {meta['n_lists']} lists, "
+            f"{meta['delta_count']} in the delta segment (last track pk {meta['max_track_pk']})"
+        )
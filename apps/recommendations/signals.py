@@ -0,0 +1,35 @@
+"""
+Keep recommendation data in step with users' songs.
+"""
+
+from django.conf import settings
+from django.dispatch import receiver
+
+from apps.core.models import Playlist
+from apps.core.signals import playlist_songs_changed, track_features_changed
+from apps.jobs.queue import enqueue
+from .engine import invalidate_feature_matrix
+
+
+def _queue_index_update():
+    if settings.ANN_AUTO_UPDATE:
+        # unique=True coalesces bursts of edits into one pending update.
+        enqueue('recommendations.update_ann_index', unique=True)
+
+
+@receiver(playlist_songs_changed, dispatch_uid='recommendations.songs_changed')
+def songs_changed(sender, playlist, **kwargs):
+    invalidate_feature_matrix(playlist.user_id)
+    _queue_index_update()
+
+
+@receiver(track_features_changed, dispatch_uid='recommendations.track_features_changed')
+def track_features_updated(sender, track_ids, **kwargs):
+    user_ids = (
+        Playlist.objects.filter(songs__track_id__in=track_ids)
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+    for user_id in user_ids:
+        invalidate_feature_matrix(user_id)
+    _queue_index_update()
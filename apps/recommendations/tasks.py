@@ -0,0 +1,16 @@
+"""
+Background tasks for recommendations.
+"""
+
+from apps.jobs.queue import task
+from .ann import IndexNotBuilt, build_index, update_index
+
+
+@task('recommendations.update_ann_index')
+def update_ann_index(job, full=False):
+    """Fold newly added tracks into the catalog ANN index."""
+    try:
+        return build_index() if full else update_index()
+    except IndexNotBuilt:
+        # No track has audio features yet; a later change will retry.
+        return {'base_count': 0, 'delta_count': 0}
@@ -0,0 +1,86 @@
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.core.catalog import upsert_tracks
+from apps.core.models import Track
+from apps.recommendations import ann
+
+
+def add_tracks(start, count):
+    upsert_tracks({
+        f'track{i}': {
+            'name': f'Track {i}', 'artist': 'Artist', 'energy': (i % 10) / 10, 'danceability': 0.5,
+            'valence': ((i * 3) % 10) / 10, 'tempo': 80.0 + i, 'popularity': i % 100,
+        }
+        for i in range(start, start + count)
+    })
+
+
+class AnnIndexVersionTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        settings = override_settings(ANN_INDEX_DIR=tmp.name, ANN_REBUILD_RATIO=0.5)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        add_tracks(0, 40)
+
+    def versions(self):
+        return sorted(path.name for path in self.root.glob('v*'))
+
+    def test_update_publishes_new_version(self):
+        ann.build_index(n_lists=4)
+        before = ann.get_index()
+        add_tracks(40, 5)
+
+        meta = ann.update_index()
+
+        self.assertEqual(meta['delta_count'], 5)
+        self.assertNotEqual(ann.current_version(self.root), before.version)
+        # Readers of the old version keep a consistent, unchanged snapshot.
+        self.assertEqual(len(before), 40)
+        self.assertEqual(len(ann.AnnIndex(self.root, before.version)), 40)
+        after = ann.get_index()
+        self.assertIsNot(after, before)
+        self.assertEqual(len(after), 45)
+        self.assertIsNotNone(after.vector_for('track42'))
+
+    def test_reenriched_tracks_replace_their_earlier_vector(self):
+        ann.build_index(n_lists=4)
+        old_vector = ann.get_index().vector_for('track3')
+
+        for energy in (0.95, 0.05):
+            with self.subTest(energy=energy):
+                Track.objects.filter(spotify_track_id='track3').update(
+                    energy=energy, audio_features_fetched_at=timezone.now()
+                )
+                meta = ann.update_index()
+                index = ann.get_index()
+
+                self.assertEqual((meta['superseded_count'], meta['delta_count']), (1, 1))
+                self.assertEqual(len(index), 40)
+                vector = index.vector_for('track3')
+                self.assertAlmostEqual(float(vector[0]), energy, places=5)
+                self.assertNotEqual(float(vector[0]), float(old_vector[0]))
+                found = [track_id for track_id, distance in index.search(vector, k=40, nprobe=4)]
+                self.assertEqual(len(found), 40)
+                self.assertEqual(found.count('track3'), 1)
+                self.assertEqual(found[0], 'track3')
+
+    def test_old_versions_are_pruned(self):
+        ann.build_index(n_lists=4)
+        for start in (40, 41, 42):
+            add_tracks(start, 1)
+            ann.update_index()
+
+        self.assertEqual(len(self.versions()), ann.KEEP_VERSIONS)
+        self.assertEqual(self.versions()[-1], ann.current_version(self.root))
+        self.assertEqual(list(self.root.glob('build-*')), [])
+
+    def test_missing_pointer_means_not_built(self):
+        with self.assertRaises(ann.IndexNotBuilt):
+            ann.get_index()
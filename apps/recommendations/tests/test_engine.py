@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.core.catalog import upsert_tracks
+from apps.core.models import Playlist, Song
+from apps.recommendations import engine
+
+FEATURES = {'energy': 0.5, 'danceability': 0.5, 'valence': 0.5, 'tempo': 120.0}
+
+
+@override_settings(RECOMMENDATION_CACHE_SECONDS=60)
+class FeatureMatrixCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        engine._matrices.clear()
+        self.addCleanup(engine._matrices.clear)
+        self.user = User.objects.create_user('recs', 'recs@example.com', 'password')
+        self.playlist = Playlist.objects.create(user=self.user, spotify_playlist_id='recs', name='Recs')
+        self.add_song('first')
+        clock = mock.patch('apps.recommendations.engine.time.monotonic', return_value=1000.0)
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+
+    def add_song(self, track_id):
+        pk = upsert_tracks({track_id: {'name': track_id, 'artist': 'Artist', **FEATURES}})[track_id]
+        # bulk_create sends no signals, like a write made by another process.
+        Song.objects.bulk_create([Song(playlist=self.playlist, track_id=pk)])
+
+    def song_count(self):
+        return len(engine.get_feature_matrix(self.user.pk).song_ids)
+
+    def test_cached_until_expiry(self):
+        self.assertEqual(self.song_count(), 1)
+        self.add_song('second')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.song_count(), 1)
+
+        self.clock.return_value += 61
+        self.assertEqual(self.song_count(), 2)
+
+    def test_invalidation_rebuilds_before_expiry(self):
+        self.assertEqual(self.song_count(), 1)
+        self.add_song('second')
+        engine.invalidate_feature_matrix(self.user.pk)
+        self.assertEqual(self.song_count(), 2)
@@ -0,0 +1,256 @@
+"""
+Candidate generation for library search.
+
+A backend proposes the documents most likely to match a query; ranking is
+shared (``apps.search.engine``). ``SQLiteFTSBackend`` and
+``PostgresTrigramBackend`` ask the database's own trigram index -- an FTS5
+table kept in step with the catalog by triggers, or pg_trgm GIN indexes --
+and ``MemoryBackend`` uses the per-user in-process ``LibraryIndex``, which
+works on any database.
+
+The database indexes are created by ``install_search_index`` after every
+``migrate`` (SQLite drops triggers when Django rebuilds a table), and
+``SEARCH_BACKEND = 'auto'`` falls back to memory wherever they are missing.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router
+
+from apps.core.models import Playlist, Song, Track
+from .index import PLAYLIST, TRACK, Document, get_library_index
+
+logger = logging.getLogger(__name__)
+
+TRACK_FTS = 'search_track_fts'
+PLAYLIST_FTS = 'search_playlist_fts'
+SQLITE_TRIGGERS = [
+    f'{fts}_{event}' for fts in (TRACK_FTS, PLAYLIST_FTS) for event in ('insert', 'delete', 'update')
+]
+TRIGRAM_INDEXES = {
+    'search_track_name_trgm': (Track, 'name'),
+    'search_track_artist_trgm': (Track, 'artist'),
+    'search_playlist_name_trgm': (Playlist, 'name'),
+}
+
+
+def _sqlite_statements():
+    track, playlist = Track._meta.db_table, Playlist._meta.db_table
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TRACK_FTS} USING fts5("
+        f"name, artist, content='{track}', content_rowid='id', tokenize='trigram')",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {PLAYLIST_FTS} USING fts5("
+        f"name, content='{playlist}', content_rowid='id', tokenize='trigram')",
+    ]
+    for fts, table, columns in ((TRACK_FTS, track, ('name', 'artist')), (PLAYLIST_FTS, playlist, ('name',))):
+        names = ', '.join(columns)
+        new = ', '.join(f'new.{column}' for column in columns)
+        old = ', '.join(f'old.{column}' for column in columns)
+        insert = f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});'
+        delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+        statements += [
+            f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END',
+            f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END',
+            f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {table} '
+            f'BEGIN {delete} {insert} END',
+        ]
+    return statements
+
+
+def _sqlite_triggers_installed(cursor):
+    cursor.execute(
+        f"SELECT count(*) FROM sqlite_master WHERE type = 'trigger' "
+        f"AND name IN ({', '.join(['%s'] * len(SQLITE_TRIGGERS))})",
+        SQLITE_TRIGGERS,
+    )
+    return cursor.fetchone()[0] == len(SQLITE_TRIGGERS)
+
+
+def install_search_index(using='default', rebuild=False):
+    """
+    Create the database's trigram index if it supports one; returns the backend name or ``None``.
+
+    Safe to run repeatedly. On SQLite the FTS tables are (re)filled from the
+    catalog whenever a trigger was missing or ``rebuild`` is set.
+    """
+    connection = connections[using]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                missing = not _sqlite_triggers_installed(cursor)
+                for statement in _sqlite_statements():
+                    cursor.execute(statement)
+                if missing or rebuild:
+                    for fts in (TRACK_FTS, PLAYLIST_FTS):
+                        cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                backend = 'sqlite_fts'
+            elif connection.vendor == 'postgresql':
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                for name, (model, column) in TRIGRAM_INDEXES.items():
+                    cursor.execute(
+                        f'CREATE INDEX IF NOT EXISTS {name} ON {model._meta.db_table} '
+                        f'USING gin ({column} gin_trgm_ops)'
+                    )
+                backend = 'postgres_trgm'
+            else:
+                return None
+    except DatabaseError as exc:
+        # No FTS5 trigram tokenizer (SQLite < 3.34), or no right to add pg_trgm.
+        logger.warning('Search index not installed on %r, using the in-process index: %s', using, exc)
+        return None
+    _available.pop(using, None)
+    return backend
+
+
+def drop_search_index(using='default'):
+    """Remove what ``install_search_index`` created."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for fts in (TRACK_FTS, PLAYLIST_FTS):
+                cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+            for trigger in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        elif connection.vendor == 'postgresql':
+            for name in TRIGRAM_INDEXES:
+                cursor.execute(f'DROP INDEX IF EXISTS {name}')
+    _available.pop(using, None)
+
+
+class MemoryBackend:
+    """Candidates from the cached per-user ``LibraryIndex``."""
+    name = 'memory'
+
+    def candidates(self, user_id, kind, text, limit, playlist_id=None):
+        index = get_library_index(user_id)
+        if kind == PLAYLIST:
+            return index.playlists.candidates(text, limit)
+        accept = None
+        if playlist_id is not None:
+            accept = lambda document: playlist_id in document.playlist_ids  # noqa: E731
+        return index.tracks.candidates(text, limit, accept=accept)
+
+
+def _words(text):
+    return [word for word in text.split() if len(word) >= 3]
+
+
+class SQLiteFTSBackend:
+    """Candidates from FTS5 trigram tables, best BM25 rank first."""
+    name = 'sqlite_fts'
+
+    def __init__(self, using):
+        self.using = using
+
+    def _match(self, text):
+        # Any trigram of any word; BM25 favours documents sharing rare ones.
+        grams = {word[i:i + 3] for word in _words(text) for i in range(len(word) - 2)}
+        return ' OR '.join(f'"{gram}"' for gram in sorted(grams))
+
+    def candidates(self, user_id, kind, text, limit, playlist_id=None):
+        match = self._match(text)
+        if not match:
+            return None
+        song, playlist = Song._meta.db_table, Playlist._meta.db_table
+        with connections[self.using].cursor() as cursor:
+            if kind == PLAYLIST:
+                cursor.execute(
+                    f'SELECT p.id, p.name FROM {PLAYLIST_FTS} f JOIN {playlist} p ON p.id = f.rowid '
+                    f'WHERE f.{PLAYLIST_FTS} MATCH %s AND p.user_id = %s ORDER BY f.rank LIMIT %s',
+                    [match, user_id, limit],
+                )
+                return [Document(PLAYLIST, pk, name) for pk, name in cursor.fetchall()]
+            scope, params = 'p.user_id = %s', [user_id]
+            if playlist_id is not None:
+                scope, params = 'p.user_id = %s AND s.playlist_id = %s', [user_id, playlist_id]
+            cursor.execute(
+                f'SELECT t.id, t.spotify_track_id, t.name, t.artist '
+                f'FROM {TRACK_FTS} f JOIN {Track._meta.db_table} t ON t.id = f.rowid '
+                f'WHERE f.{TRACK_FTS} MATCH %s AND EXISTS ('
+                f'SELECT 1 FROM {song} s JOIN {playlist} p ON p.id = s.playlist_id '
+                f'WHERE s.track_id = t.id AND {scope}) '
+                f'ORDER BY f.rank LIMIT %s',
+                [match, *params, limit],
+            )
+            return [Document(TRACK, pk, name, artist, spotify_track_id)
+                    for pk, spotify_track_id, name, artist in cursor.fetchall()]
+
+
+class PostgresTrigramBackend:
+    """Candidates from pg_trgm GIN indexes via the word-similarity operator."""
+    name = 'postgres_trgm'
+    # Looser than pg_trgm's default of 0.6: spoken titles are often misheard.
+    threshold = 0.3
+
+    def __init__(self, using):
+        self.using = using
+
+    def candidates(self, user_id, kind, text, limit, playlist_id=None):
+        if not _words(text):
+            return None
+        song, playlist = Song._meta.db_table, Playlist._meta.db_table
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)", [str(self.threshold)]
+            )
+            if kind == PLAYLIST:
+                cursor.execute(
+                    f'SELECT p.id, p.name FROM {playlist} p WHERE %s <%% p.name AND p.user_id = %s '
+                    f'ORDER BY word_similarity(%s, p.name) DESC LIMIT %s',
+                    [text, user_id, text, limit],
+                )
+                return [Document(PLAYLIST, pk, name) for pk, name in cursor.fetchall()]
+            scope, params = 'p.user_id = %s', [user_id]
+            if playlist_id is not None:
+                scope, params = 'p.user_id = %s AND s.playlist_id = %s', [user_id, playlist_id]
+            cursor.execute(
+                f'SELECT t.id, t.spotify_track_id, t.name, t.artist FROM {Track._meta.db_table} t '
+                f'WHERE (%s <%% t.name OR %s <%% t.artist) AND EXISTS ('
+                f'SELECT 1 FROM {song} s JOIN {playlist} p ON p.id = s.playlist_id '
+                f'WHERE s.track_id = t.id AND {scope}) '
+                f'ORDER BY greatest(word_similarity(%s, t.name), word_similarity(%s, t.artist)) DESC '
+                f'LIMIT %s',
+                [text, text, *params, text, text, limit],
+            )
+            return [Document(TRACK, pk, name, artist, spotify_track_id)
+                    for pk, spotify_track_id, name, artist in cursor.fetchall()]
+
+
+_available = {}
+_available_lock = threading.Lock()
+
+
+def _database_index_installed(using):
+    if using not in _available:
+        connection = connections[using]
+        with _available_lock, connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                installed = _sqlite_triggers_installed(cursor)
+            elif connection.vendor == 'postgresql':
+                cursor.execute('SELECT count(*) FROM pg_indexes WHERE indexname = ANY(%s)', [list(TRIGRAM_INDEXES)])
+                installed = cursor.fetchone()[0] == len(TRIGRAM_INDEXES)
+            else:
+                installed = False
+            _available[using] = installed
+    return _available[using]
+
+
+def get_backend(name=None):
+    """The backend for ``name`` (default ``SEARCH_BACKEND``) on the read database."""
+    name = name or settings.SEARCH_BACKEND
+    using = router.db_for_read(Track)
+    if name == 'auto':
+        vendor = connections[using].vendor
+        if vendor in ('sqlite', 'postgresql') and _database_index_installed(using):
+            name = 'sqlite_fts' if vendor == 'sqlite' else 'postgres_trgm'
+        else:
+            name = 'memory'
+    if name == 'memory':
+        return MemoryBackend()
+    if name == 'sqlite_fts':
+        return SQLiteFTSBackend(using)
+    if name == 'postgres_trgm':
+        return PostgresTrigramBackend(using)
+    raise ValueError(f'Unknown SEARCH_BACKEND {name!r}')
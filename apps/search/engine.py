@@ -0,0 +1,93 @@
+"""
+Fuzzy search over a user's songs and playlists.
+
+The configured backend proposes candidates from a trigram index; every
+candidate is then scored with ``apps.search.text.similarity`` so results rank
+the same whichever index produced them.
+"""
+
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from apps.core.models import Song
+from .backends import MemoryBackend, get_backend
+from .index import PLAYLIST, TRACK
+from .text import normalize, similarity
+
+KINDS = (TRACK, PLAYLIST)
+# Candidates fetched per kind before ranking, at least.
+MIN_CANDIDATES = 20
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    pk: int
+    name: str
+    score: float
+    artist: str = ''
+    spotify_track_id: str = None
+    playlist_ids: tuple = ()
+
+    def as_dict(self):
+        data = {'type': self.kind, 'id': self.pk, 'name': self.name, 'score': round(self.score, 4)}
+        if self.kind == TRACK:
+            data.update(artist=self.artist, spotify_track_id=self.spotify_track_id,
+                        playlist_ids=list(self.playlist_ids))
+        return data
+
+
+def score_document(document, text, artist_text=''):
+    """Similarity of a ``Document`` to a normalized query, from 0 to 1."""
+    if document.kind == PLAYLIST:
+        return similarity(text, document.title)
+    title = similarity(text, document.title)
+    if artist_text:
+        return 0.75 * title + 0.25 * similarity(artist_text, document.artist_text)
+    if title >= 0.9:
+        return title
+    # "hey jude beatles", or just "beatles", should still find the song.
+    return max(title, similarity(text, f'{document.title} {document.artist_text}'))
+
+
+def search_library(user_id, query, kinds=KINDS, limit=10, artist=None, playlist_id=None, backend=None):
+    """
+    The user's songs and playlists best matching ``query``, best first.
+
+    ``artist`` narrows track matches, ``playlist_id`` limits tracks to one
+    playlist. Hits scoring below ``SEARCH_MIN_SCORE`` are dropped.
+    """
+    text, artist_text = normalize(query), normalize(artist)
+    if not text:
+        return []
+    backend = backend or get_backend()
+    hits = []
+    for kind in kinds:
+        candidates = backend.candidates(
+            user_id, kind, text, max(MIN_CANDIDATES, limit * 2), playlist_id=playlist_id
+        )
+        if candidates is None:
+            # Too short for the database's trigrams (say "up"); the in-process index copes.
+            candidates = MemoryBackend().candidates(
+                user_id, kind, text, max(MIN_CANDIDATES, limit * 2), playlist_id=playlist_id
+            )
+        for document in candidates:
+            score = score_document(document, text, artist_text)
+            if score >= settings.SEARCH_MIN_SCORE:
+                hits.append(SearchHit(document.kind, document.pk, document.name, score, document.artist,
+                                      document.spotify_track_id, document.playlist_ids))
+    hits.sort(key=lambda hit: -hit.score)
+    hits = hits[:limit]
+
+    missing = [hit for hit in hits if hit.kind == TRACK and hit.playlist_ids is None]
+    if missing:
+        playlists = {}
+        rows = Song.objects.filter(
+            playlist__user_id=user_id, track_id__in=[hit.pk for hit in missing]
+        ).values_list('track_id', 'playlist_id')
+        for track_id, playlist_id in rows:
+            playlists.setdefault(track_id, []).append(playlist_id)
+        for hit in missing:
+            hit.playlist_ids = tuple(playlists.get(hit.pk, ()))
+    return hits
@@ -0,0 +1,158 @@
+"""
+In-process n-gram index over one user's library.
+
+Each user's tracks and playlists are loaded once into inverted indexes from
+trigram (and phonetic key) to document, and cached per process like the
+recommendation feature matrices: until invalidated through the shared cache
+or ``SEARCH_CACHE_SECONDS`` old. A query only walks the postings of its own
+grams, skipping grams so common they would touch most of the library, so its
+cost follows how many documents share its grams rather than library size.
+"""
+
+import heapq
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.models import Playlist, Song
+from .text import normalize, phonetic_key, title_core, trigrams
+
+TRACK = 'track'
+PLAYLIST = 'playlist'
+
+# Grams found in more than this share of documents are skipped at query
+# time, unless nothing rarer is left.
+COMMON_GRAM_RATIO = 0.2
+
+
+@dataclass
+class Document:
+    """A searchable track or playlist with its normalized text."""
+    kind: str
+    pk: int
+    name: str
+    artist: str = ''
+    spotify_track_id: str = None
+    playlist_ids: tuple = None
+    title: str = field(init=False)
+    artist_text: str = field(init=False)
+
+    def __post_init__(self):
+        self.title = title_core(self.name) if self.kind == TRACK else normalize(self.name)
+        self.artist_text = normalize(self.artist)
+
+
+def query_keys(text):
+    """Index keys for ``text``: its trigrams plus a phonetic key per word."""
+    keys = trigrams(text)
+    keys.update(f'#{phonetic_key(word)}' for word in text.split() if len(word) > 2)
+    return keys
+
+
+class NgramIndex:
+    """Inverted index from trigrams and phonetic keys to documents."""
+
+    def __init__(self, documents=()):
+        self.documents = []
+        self.postings = defaultdict(list)
+        for document in documents:
+            self.add(document)
+
+    def add(self, document):
+        position = len(self.documents)
+        self.documents.append(document)
+        for key in query_keys(f'{document.title} {document.artist_text}'):
+            self.postings[key].append(position)
+
+    def candidates(self, text, limit, accept=None):
+        """
+        Up to ``limit`` documents sharing the most keys with normalized ``text``.
+
+        ``accept``, if given, filters documents before the top ``limit`` are taken.
+        """
+        keys = [key for key in query_keys(text) if key in self.postings]
+        if not keys:
+            return []
+        cutoff = max(COMMON_GRAM_RATIO * len(self.documents), 1)
+        selective = [key for key in keys if len(self.postings[key]) <= cutoff]
+        if not selective:
+            # Every gram is common: settle for the rarest few.
+            selective = sorted(keys, key=lambda key: len(self.postings[key]))[:3]
+
+        hits = defaultdict(int)
+        for key in selective:
+            for position in self.postings[key]:
+                hits[position] += 1
+        if accept is not None:
+            hits = {position: count for position, count in hits.items() if accept(self.documents[position])}
+        best = heapq.nlargest(limit, hits.items(), key=lambda item: item[1])
+        return [self.documents[position] for position, count in best]
+
+
+class LibraryIndex:
+    """A user's tracks and playlists, each in its own ``NgramIndex``."""
+
+    def __init__(self, tracks, playlists):
+        self.tracks = NgramIndex(tracks)
+        self.playlists = NgramIndex(playlists)
+
+    @classmethod
+    def load(cls, user_id):
+        rows = (
+            Song.objects.filter(playlist__user_id=user_id)
+            .values_list('track_id', 'track__spotify_track_id', 'track__name', 'track__artist', 'playlist_id')
+            .order_by('track_id')
+        )
+        tracks = {}
+        playlist_ids = defaultdict(list)
+        for track_id, spotify_track_id, name, artist, playlist_id in rows.iterator(chunk_size=5000):
+            if track_id not in tracks:
+                tracks[track_id] = (spotify_track_id, name, artist)
+            playlist_ids[track_id].append(playlist_id)
+        return cls(
+            [Document(TRACK, track_id, name, artist, spotify_track_id, tuple(playlist_ids[track_id]))
+             for track_id, (spotify_track_id, name, artist) in tracks.items()],
+            [Document(PLAYLIST, pk, name)
+             for pk, name in Playlist.objects.filter(user_id=user_id).values_list('pk', 'name')],
+        )
+
+    def __len__(self):
+        return len(self.tracks.documents) + len(self.playlists.documents)
+
+
+def _version_key(user_id):
+    return f'search-library-version:{user_id}'
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_library_index(user_id):
+    """Cached ``LibraryIndex`` for ``user_id``, rebuilt after invalidation or expiry."""
+    version = cache.get(_version_key(user_id), 0)
+    now = time.monotonic()
+    cached = _indexes.get(user_id)
+    if cached is not None and cached[0] == version and cached[1] > now:
+        return cached[2]
+    index = LibraryIndex.load(user_id)
+    with _indexes_lock:
+        _indexes.pop(user_id, None)
+        if len(_indexes) >= settings.SEARCH_CACHE_MAX_USERS:
+            _indexes.pop(next(iter(_indexes)))
+        _indexes[user_id] = (version, now + settings.SEARCH_CACHE_SECONDS, index)
+    return index
+
+
+def invalidate_library_index(user_id):
+    """Mark ``user_id``'s index stale in every process sharing the cache."""
+    key = _version_key(user_id)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
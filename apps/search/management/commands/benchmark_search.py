@@ -0,0 +1,155 @@
+"""
+Measure search latency and top-1 accuracy as a library grows.
+
+Each size gets its own benchmark user whose library holds that many tracks
+with generated multi-word titles. Queries are existing titles with one typo
+per word, as a speech recognizer might produce, and a query counts as correct
+when the intended track ranks first. A linear scan that scores every track
+is the no-index baseline; it only runs the first ``LINEAR_QUERIES`` queries,
+as it takes seconds per query on the larger libraries.
+"""
+
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarks.database import benchmark_database
+from apps.core.benchmarks.factories import bulk_insert, create_users
+from apps.core.catalog import upsert_tracks
+from apps.core.models import Playlist, Song
+from apps.search.backends import get_backend, install_search_index
+from apps.search.engine import score_document, search_library
+from apps.search.index import TRACK, LibraryIndex, get_library_index
+from apps.search.text import normalize
+
+USER_PREFIX = 'searchbench'
+SYLLABLES = ('ka', 'lo', 'mi', 'ra', 'ne', 'to', 'vi', 'su', 'da', 'pe', 'ly', 'gor', 'tan', 'bel', 'rin',
+             'mor', 'sha', 'qui', 'zen', 'fa', 'ho', 'dre', 'ul', 'es', 'ban')
+LINEAR_QUERIES = 20
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))))
+    return sorted(words)
+
+
+def misspell(word, rng):
+    """``word`` with one character dropped, doubled, swapped or replaced."""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(('drop', 'double', 'swap', 'replace'))
+    if edit == 'drop':
+        return word[:i] + word[i + 1:]
+    if edit == 'double':
+        return word[:i] + word[i] + word[i:]
+    if edit == 'swap':
+        return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+    return word[:i] + rng.choice('aeiou') + word[i + 1:]
+
+
+class Command(BaseCommand):
+    help = 'Report search latency and accuracy per backend for growing library sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                            help='Tracks per benchmark library.')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--backends', nargs='+', default=['linear', 'memory', 'sqlite_fts'],
+                            choices=['linear', 'memory', 'sqlite_fts', 'postgres_trgm'])
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help='Print a JSON report.')
+
+    def handle(self, *args, **options):
+        if min(options['sizes']) < 1 or options['queries'] < 1:
+            raise CommandError('--sizes and --queries must be positive')
+        rng = random.Random(options['seed'])
+        words = vocabulary(3000, rng)
+        report = {'queries': options['queries'], 'sizes': []}
+        with benchmark_database():
+            if any(name not in ('linear', 'memory') for name in options['backends']):
+                if install_search_index() is None:
+                    raise CommandError('This database has no trigram index; use --backends linear memory')
+            users = create_users(len(options['sizes']), prefix=USER_PREFIX)
+            for user, size in zip(users, options['sizes']):
+                titles = self.seed(user, size, words, rng)
+                report['sizes'].append(self.run(user, size, titles, rng, options))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"{options['queries']} misspelled title queries per library size")
+        for row in report['sizes']:
+            self.stdout.write(f"{row['tracks']} tracks (in-process index built in {row['build_ms']:.0f} ms):")
+            for name, stats in row['backends'].items():
+                self.stdout.write(
+                    f"  {name:<14} p50 {stats['p50_ms']:>8.2f} ms, p95 {stats['p95_ms']:>8.2f} ms, "
+                    f"top-1 accuracy {stats['accuracy']:.3f}"
+                )
+
+    def seed(self, user, size, words, rng):
+        """One playlist of ``size`` tracks; returns ``{track pk: title}``."""
+        playlist = Playlist.objects.create(user=user, spotify_playlist_id=f'{USER_PREFIX}-{user.pk}',
+                                           name=f'Benchmark {size}')
+        tracks = {}
+        for i in range(size):
+            title = ' '.join(rng.sample(words, rng.randint(2, 4)))
+            tracks[f'{USER_PREFIX}{user.pk}x{i}'] = {
+                'name': title.title(), 'artist': ' '.join(rng.sample(words, 2)).title(),
+            }
+        track_pks = upsert_tracks(tracks)
+        bulk_insert(Song, (
+            Song(playlist=playlist, track_id=track_pks[track_id], position=i)
+            for i, track_id in enumerate(tracks)
+        ))
+        return {track_pks[track_id]: fields['name'] for track_id, fields in tracks.items()}
+
+    def run(self, user, size, titles, rng, options):
+        started = time.perf_counter()
+        LibraryIndex.load(user.pk)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        targets = rng.sample(sorted(titles), min(options['queries'], len(titles)))
+        queries = [
+            (pk, ' '.join(misspell(word, rng) for word in normalize(titles[pk]).split()))
+            for pk in targets
+        ]
+        row = {'tracks': size, 'build_ms': round(build_ms, 1), 'backends': {}}
+        for name in options['backends']:
+            if name == 'linear':
+                documents = get_library_index(user.pk).tracks.documents
+                search = lambda query: self.linear_search(documents, query)  # noqa: E731
+            else:
+                backend = get_backend(name)
+                get_library_index(user.pk)  # keep the one-off build out of the timings
+                search = lambda query, backend=backend: [  # noqa: E731
+                    hit.pk for hit in search_library(user.pk, query, kinds=(TRACK,), limit=1, backend=backend)
+                ]
+            timings, correct = [], 0
+            sample = queries[:LINEAR_QUERIES] if name == 'linear' else queries
+            for pk, query in sample:
+                started = time.perf_counter()
+                found = search(query)
+                timings.append((time.perf_counter() - started) * 1000)
+                correct += bool(found) and found[0] == pk
+            row['backends'][name] = {
+                'p50_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'accuracy': round(correct / len(sample), 3),
+            }
+        return row
+
+    def linear_search(self, documents, query):
+        text = normalize(query)
+        best = max(documents, key=lambda document: score_document(document, text))
+        return [best.pk]
@@ -0,0 +1,6 @@
+"""
+The search app has no models of its own.
+
+Its database indexes are created by ``backends.install_search_index`` after
+``migrate``; this module only lets Django send the app ``post_migrate``.
+"""
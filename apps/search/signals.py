@@ -0,0 +1,38 @@
+"""
+Keep search indexes in step with users' libraries.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.models import Playlist
+from apps.core.signals import playlist_songs_changed, track_metadata_changed
+from .backends import install_search_index
+from .index import invalidate_library_index
+
+
+@receiver(playlist_songs_changed, dispatch_uid='search.songs_changed')
+def songs_changed(sender, playlist, **kwargs):
+    invalidate_library_index(playlist.user_id)
+
+
+@receiver(post_save, sender=Playlist, dispatch_uid='search.playlist_saved')
+@receiver(post_delete, sender=Playlist, dispatch_uid='search.playlist_deleted')
+def playlist_changed(sender, instance, **kwargs):
+    invalidate_library_index(instance.user_id)
+
+
+@receiver(track_metadata_changed, dispatch_uid='search.track_metadata_changed')
+def track_metadata_updated(sender, track_ids, **kwargs):
+    user_ids = (
+        Playlist.objects.filter(songs__track_id__in=track_ids)
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+    for user_id in user_ids:
+        invalidate_library_index(user_id)
+
+
+def install_index(sender, using, **kwargs):
+    """``post_migrate``: (re)create the database's trigram index and triggers."""
+    install_search_index(using)
@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.core.catalog import upsert_tracks
+from apps.core.models import Playlist, Song
+from apps.core.signals import playlist_songs_changed
+from apps.search import index
+
+TRACKS = {
+    'rhapsody': {'name': 'Bohemian Rhapsody', 'artist': 'Queen'},
+    'jude': {'name': 'Hey Jude', 'artist': 'The Beatles'},
+    'up': {'name': 'Up', 'artist': 'Shania Twain'},
+}
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        index._indexes.clear()
+        self.addCleanup(index._indexes.clear)
+        self.user = User.objects.create_user('searcher', 'searcher@example.com', 'password')
+        self.playlist = Playlist.objects.create(user=self.user, spotify_playlist_id='search', name='Road Trip')
+        self.add_songs(TRACKS)
+
+    def add_songs(self, tracks):
+        pks = upsert_tracks(tracks)
+        # bulk_create sends no signals, like a write made by another process.
+        Song.objects.bulk_create(Song(playlist=self.playlist, track_id=pks[track_id]) for track_id in tracks)
+
+    def track_names(self):
+        return sorted(document.name for document in index.get_library_index(self.user.pk).tracks.documents)
+
+
+@override_settings(SEARCH_CACHE_SECONDS=60)
+class LibraryIndexCacheTests(SearchTestCase):
+    def setUp(self):
+        super().setUp()
+        clock = mock.patch('apps.search.index.time.monotonic', return_value=1000.0)
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_cached_until_expiry(self):
+        self.assertEqual(len(self.track_names()), 3)
+        self.add_songs({'new': {'name': 'New Song', 'artist': 'Artist'}})
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.track_names()), 3)
+
+        self.clock.return_value += 61
+        self.assertEqual(len(self.track_names()), 4)
+
+    def test_songs_changed_rebuilds_before_expiry(self):
+        self.track_names()
+        self.add_songs({'new': {'name': 'New Song', 'artist': 'Artist'}})
+        playlist_songs_changed.send(sender=Playlist, playlist=self.playlist)
+
+        self.assertIn('New Song', self.track_names())
+
+    def test_metadata_refresh_rebuilds_before_expiry(self):
+        self.track_names()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_tracks({'jude': {'name': 'Hey Jude (Remastered)', 'artist': 'The Beatles'}}, refresh=True)
+
+        self.assertIn('Hey Jude (Remastered)', self.track_names())
+
+    def test_unchanged_refresh_keeps_index(self):
+        cached = index.get_library_index(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            upsert_tracks(TRACKS, refresh=True)
+
+        self.assertEqual(callbacks, [])
+        self.assertIs(index.get_library_index(self.user.pk), cached)
+
+
+class SearchEndpointTests(SearchTestCase):
+    def setUp(self):
+        super().setUp()
+        Playlist.objects.create(user=self.user, spotify_playlist_id='gym', name='Gym Mix')
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        Playlist.objects.create(user=other, spotify_playlist_id='other', name='Road Trip Classics')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_finds_misspelled_track_with_every_backend(self):
+        for backend in ('memory', 'sqlite_fts', 'auto'):
+            with self.subTest(backend=backend), override_settings(SEARCH_BACKEND=backend):
+                best = self.search(q='bohemian rapsody', type='track')[0]
+                self.assertEqual((best['type'], best['spotify_track_id']), ('track', 'rhapsody'))
+                self.assertEqual(best['playlist_ids'], [self.playlist.pk])
+
+    def test_playlists_are_scoped_to_the_user(self):
+        results = self.search(q='rode trip', type='playlist')
+
+        self.assertEqual([(hit['type'], hit['name']) for hit in results], [('playlist', 'Road Trip')])
+
+    @override_settings(SEARCH_BACKEND='sqlite_fts')
+    def test_short_query_falls_back_to_memory_index(self):
+        results = self.search(q='up', type='track')
+
+        self.assertEqual(results[0]['spotify_track_id'], 'up')
+
+    @override_settings(SEARCH_BACKEND='sqlite_fts')
+    def test_fallback_sees_refreshed_metadata(self):
+        self.search(q='up', type='track')
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_tracks({'up': {'name': 'Go', 'artist': 'Shania Twain'}}, refresh=True)
+
+        self.assertEqual(self.search(q='go', type='track')[0]['name'], 'Go')
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'jude', 'type': 'album'}).status_code, 400)
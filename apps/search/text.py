@@ -0,0 +1,129 @@
+"""
+Text normalization and fuzzy scoring for search.
+
+Spoken titles arrive lowercased, without punctuation and often misheard
+("bohemian rapsody", "hey dude"), so a candidate is scored on three signals:
+shared character trigrams, per-word edit distance and per-word phonetic keys.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+_BRACKETS = re.compile(r'[\(\[][^\)\]]*[\)\]]')
+# "Song - Remastered 2011", "Song - Live at Wembley"
+_VERSION_SUFFIX = re.compile(r'\s+-\s+.*$')
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+# Soundex-style consonant classes; vowels, h, w and y carry no code.
+_PHONETIC_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+
+def normalize(text):
+    """Lowercase ASCII words separated by single spaces."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode()
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def title_core(text):
+    """``normalize`` without bracketed or dash-separated version suffixes."""
+    text = _VERSION_SUFFIX.sub('', _BRACKETS.sub(' ', text or ''))
+    return normalize(text)
+
+
+def trigrams(text):
+    """Character trigrams of each word, padded like PostgreSQL's pg_trgm."""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def phonetic_key(word):
+    """Soundex-like key without the length cap: first letter, then consonant classes."""
+    if not word:
+        return ''
+    key = [word[0]]
+    previous = _PHONETIC_CODES.get(word[0], '')
+    for char in word[1:]:
+        code = _PHONETIC_CODES.get(char, '')
+        if code and code != previous:
+            key.append(code)
+        if char not in 'hw':
+            previous = code
+    return ''.join(key)
+
+
+def edit_distance(a, b, limit=None):
+    """
+    Optimal-string-alignment distance between ``a`` and ``b``.
+
+    Counts insertions, deletions, substitutions and adjacent transpositions.
+    With ``limit``, returns ``limit + 1`` as soon as the distance must exceed it.
+    """
+    if a == b:
+        return 0
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            cost = char_a != char_b
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+@lru_cache(maxsize=100_000)
+def word_similarity(word, candidate):
+    """Edit-distance similarity of two words, at least 0.8 if they sound alike."""
+    if word == candidate:
+        return 1.0
+    longest = max(len(word), len(candidate))
+    limit = longest // 2
+    distance = edit_distance(word, candidate, limit)
+    score = 1 - distance / longest if distance <= limit else 0.0
+    if score < 0.8 and len(word) > 2 and phonetic_key(word) == phonetic_key(candidate):
+        # Sounds the same: "rapsody" / "rhapsody", "jood" / "jude".
+        score = 0.8
+    return score
+
+
+def _best_word_similarity(word, candidates):
+    return max((word_similarity(word, candidate) for candidate in candidates), default=0.0)
+
+
+def similarity(query, text):
+    """
+    How well normalized ``query`` matches normalized ``text``, from 0 to 1.
+
+    A query contained in the text scores at least 0.9; otherwise the score
+    averages trigram overlap (Dice coefficient) with the mean best per-word
+    match, where words match on edit distance or phonetic key.
+    """
+    if not query or not text:
+        return 0.0
+    if query == text:
+        return 1.0
+    if f' {query} ' in f' {text} ':
+        return 0.9 + 0.1 * len(query) / len(text)
+
+    query_grams, text_grams = trigrams(query), trigrams(text)
+    dice = 2 * len(query_grams & text_grams) / (len(query_grams) + len(text_grams))
+    text_words = text.split()
+    words = sum(_best_word_similarity(word, text_words) for word in query.split()) / len(query.split())
+    return min(0.89, (dice + words) / 2)
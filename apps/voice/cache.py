@@ -0,0 +1,210 @@
+"""
+In-process response cache for LLM calls keyed on normalized utterances.
+
+Lookups try an exact hash of the normalized text first, then a near-duplicate
+match on character trigram similarity, so "Play something upbeat!" and
+"please play something upbeat" share one paid model call. A near-duplicate
+is only reused when every entity the cached command carries (track, artist,
+playlist, name) also appears in the new utterance, so "add hey jude to road
+trip" never answers "add hey joe to road trip". Entries expire after a TTL
+and the least recently used entry is evicted when full.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+
+from django.conf import settings
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_FILLER_WORDS = frozenset({
+    'please', 'hey', 'hi', 'ok', 'okay', 'um', 'uh', 'just', 'can', 'could', 'would',
+    'now', 'thanks', 'a', 'an', 'the',
+})
+
+
+def normalize_utterance(text):
+    """Lowercase, drop punctuation and filler words, collapse whitespace."""
+    words = _PUNCTUATION.sub(' ', text.lower()).split()
+    kept = [word for word in words if word not in _FILLER_WORDS]
+    return ' '.join(kept or words)
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def numbers(text):
+    # Utterances that differ only in a number ("track 1" vs "track 2") must
+    # never be treated as near-duplicates.
+    return frozenset(re.findall(r'\d+', text))
+
+
+def mentions_entities(value, normalized):
+    """Whether every param of the cached command ``value`` appears in ``normalized``."""
+    params = getattr(value, 'params', None) or {}
+    padded = f' {normalized} '
+    return all(f' {normalize_utterance(str(param))} ' in padded for param in params.values())
+
+
+class _Entry:
+    __slots__ = ('value', 'grams', 'numbers', 'expires_at')
+
+    def __init__(self, value, grams, numbers, expires_at):
+        self.value = value
+        self.grams = grams
+        self.numbers = numbers
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache with near-duplicate lookup."""
+
+    def __init__(self, max_entries=1000, ttl=3600, min_similarity=0.9, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self.clock = clock
+        self._entries = OrderedDict()
+        # trigram -> keys containing it; narrows near-duplicate candidates.
+        self._postings = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(normalized):
+        return hashlib.sha1(normalized.encode()).hexdigest()
+
+    def get(self, text):
+        normalized = normalize_utterance(text)
+        key = self.key_for(normalized)
+        now = self.clock()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.value
+
+            key = self._nearest_key(normalized, now)
+            if key is not None:
+                self._entries.move_to_end(key)
+                self.near_hits += 1
+                return self._entries[key].value
+
+            self.misses += 1
+            return None
+
+    def set(self, text, value):
+        normalized = normalize_utterance(text)
+        key = self.key_for(normalized)
+        grams = trigrams(normalized)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, grams, numbers(normalized), self.clock() + self.ttl)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.near_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'exact_hits': self.exact_hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.exact_hits + self.near_hits) / lookups if lookups else 0.0,
+            }
+
+    def _live_entry(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._remove(key)
+            return None
+        return entry
+
+    def _nearest_key(self, normalized, now):
+        grams, digits = trigrams(normalized), numbers(normalized)
+        counts = {}
+        for gram in grams:
+            for key in self._postings.get(gram, ()):
+                counts[key] = counts.get(key, 0) + 1
+
+        best_key, best_score = None, self.min_similarity
+        for key, shared in counts.items():
+            entry = self._entries[key]
+            if entry.numbers != digits:
+                continue
+            # Postings give the trigram intersection size directly, so the
+            # Dice coefficient needs no set operations.
+            score = 2 * shared / (len(grams) + len(entry.grams))
+            if score >= best_score and mentions_entities(entry.value, normalized):
+                best_key, best_score = key, score
+
+        if best_key is not None and self._live_entry(best_key, now) is None:
+            return None
+        return best_key
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for gram in entry.grams:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+
+class CachedModelClient:
+    """Wraps an LLM model client so repeated utterances skip the model call."""
+
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+
+    def available(self):
+        return self.client.available()
+
+    def parse(self, text):
+        cached = self.cache.get(text)
+        if cached is not None:
+            return replace(cached, source=f'{cached.source}_cache')
+        result = self.client.parse(text)
+        if result is not None:
+            self.cache.set(text, result)
+        return result
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache configured from settings."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = ResponseCache(
+                    max_entries=settings.VOICE_LLM_CACHE_MAX_ENTRIES,
+                    ttl=settings.VOICE_LLM_CACHE_TTL_SECONDS,
+                    min_similarity=settings.VOICE_LLM_CACHE_MIN_SIMILARITY,
+                )
+    return _shared_cache
@@ -0,0 +1,215 @@
+"""
+Execute voice commands against the user's library in one pass.
+
+``aexecute`` parses the utterance, resolves the playlist and track, applies
+the change with ``apply_song_operations`` and queues the ``VoiceCommand`` log
+row, timing each stage. For "add X to Y" the playlist is a database lookup
+and the track a Spotify search; neither depends on the other, so they run
+concurrently.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from requests.exceptions import RequestException
+from spotipy.exceptions import SpotifyException
+
+from apps.core.aio import run_io
+from apps.core.models import Playlist, UserProfile
+from apps.core.playlist_ops import apply_song_operations
+from apps.core.spotify.client import (
+    SpotifyNotConfigured, SpotifyNotConnected, get_app_client, get_spotify_client
+)
+from apps.core.spotify.sync import catalog_values
+from apps.search.engine import search_library
+from apps.search.index import PLAYLIST, TRACK
+from .history import arecord_command
+from .parser import UNKNOWN, CommandParser
+
+REQUIRED_PARAMS = {
+    'add_track': ('playlist', 'track'),
+    'remove_track': ('playlist', 'track'),
+}
+
+
+class CommandFailed(Exception):
+    """A parsed command that cannot be carried out; the message is shown to the user."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of one executed voice command, with per-stage timings in ms."""
+    text: str
+    action: str = UNKNOWN
+    params: dict = field(default_factory=dict)
+    source: str = ''
+    parse_latency_ms: float = None
+    success: bool = False
+    error: str = ''
+    status: int = 200
+    result: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+
+    def as_dict(self):
+        data = {
+            'action': self.action,
+            'params': self.params,
+            'source': self.source,
+            'success': self.success,
+            'timings': self.timings,
+        }
+        if self.success:
+            data['result'] = self.result
+        else:
+            data['error'] = self.error
+        return data
+
+
+async def _timed(timings, name, awaitable):
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def resolve_playlist(user, name):
+    """
+    The user's playlist called ``name``.
+
+    Prefers an exact (case-insensitive) match, then a substring, then the best
+    fuzzy match for misheard names.
+    """
+    playlists = Playlist.objects.filter(user=user).order_by('-updated_at')
+    playlist = playlists.filter(name__iexact=name).first() or playlists.filter(name__icontains=name).first()
+    if playlist is None:
+        hits = search_library(user.pk, name, kinds=(PLAYLIST,), limit=1)
+        playlist = playlists.filter(pk=hits[0].pk).first() if hits else None
+    if playlist is None:
+        raise CommandFailed(f'No playlist named "{name}"', status=404)
+    return playlist
+
+
+def search_track(client, track, artist=None):
+    """Best Spotify match for ``track`` as ``(spotify_track_id, track_fields)``."""
+    query = f'track:{track} artist:{artist}' if artist else track
+    try:
+        page = client.search(q=query, type='track', limit=1)
+    except (SpotifyException, RequestException):
+        raise CommandFailed('Spotify search is unavailable, try again shortly', status=502)
+    items = (page.get('tracks') or {}).get('items') or []
+    if not items:
+        raise CommandFailed(f'No track found for "{track}"', status=404)
+    return items[0]['id'], catalog_values(items[0])
+
+
+def find_song(playlist, track, artist=None):
+    """
+    Spotify id of the song in ``playlist`` whose name contains, or else closely matches, ``track``.
+
+    A fuzzy match below ``VOICE_REMOVE_MIN_SCORE`` is not used: "remove hey
+    joe" must not delete "Hey Jude". The error names it so the user can retry.
+    """
+    songs = playlist.songs.filter(track__name__icontains=track)
+    if artist:
+        songs = songs.filter(track__artist__icontains=artist)
+    track_id = songs.order_by('position').values_list('track__spotify_track_id', flat=True).first()
+    if track_id is not None:
+        return track_id
+    hits = search_library(playlist.user_id, track, kinds=(TRACK,), limit=1,
+                          artist=artist, playlist_id=playlist.pk)
+    if not hits:
+        raise CommandFailed(f'"{track}" is not in {playlist.name}', status=404)
+    if hits[0].score < settings.VOICE_REMOVE_MIN_SCORE:
+        raise CommandFailed(f'"{track}" is not in {playlist.name}; did you mean "{hits[0].name}"?', status=404)
+    return hits[0].spotify_track_id
+
+
+def spotify_client_for(user):
+    """The user's own Spotify client, or the app client if they have not connected."""
+    profile = UserProfile.objects.filter(user=user).first()
+    if profile is not None and profile.spotify_access_token:
+        return get_spotify_client(profile)
+    try:
+        return get_app_client()
+    except SpotifyNotConfigured:
+        raise SpotifyNotConnected('Connect a Spotify account to search for tracks')
+
+
+class VoiceCommandExecutor:
+    """Parses an utterance, applies it to the user's playlists and logs it."""
+
+    def __init__(self, user, parser=None, log=True):
+        self.user = user
+        self.parser = parser or CommandParser.from_settings()
+        self.log = log
+
+    def execute(self, text):
+        """``aexecute`` for sync callers."""
+        return async_to_sync(self.aexecute)(text)
+
+    async def aexecute(self, text):
+        execution = ExecutionResult(text=text)
+        started = time.perf_counter()
+        try:
+            # The LLM fallback blocks on the network, so parse off the event loop.
+            parsed = await _timed(execution.timings, 'parse_ms', run_io(self.parser.parse, text))
+            execution.action = parsed.action
+            execution.params = parsed.params
+            execution.source = parsed.source
+            execution.parse_latency_ms = parsed.latency_ms
+            execution.result = await self._arun(parsed, execution.timings)
+            execution.success = True
+        except CommandFailed as exc:
+            execution.error = str(exc)
+            execution.status = exc.status
+        execution.timings['total_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        if self.log:
+            await arecord_command(self.user.pk, execution)
+        return execution
+
+    async def _arun(self, parsed, timings):
+        handler = getattr(self, f'_a{parsed.action}', None)
+        if handler is None:
+            if parsed.is_unknown:
+                raise CommandFailed('Sorry, I did not understand that command')
+            raise CommandFailed(f'"{parsed.action}" commands cannot be executed yet')
+        for name in REQUIRED_PARAMS.get(parsed.action, ()):
+            if not parsed.params.get(name):
+                raise CommandFailed(f'Missing {name} in command')
+        return await handler(parsed.params, timings)
+
+    async def _asearch(self, track, artist):
+        try:
+            client = await sync_to_async(spotify_client_for)(self.user)
+        except SpotifyNotConnected as exc:
+            raise CommandFailed(str(exc))
+        return await run_io(search_track, client, track, artist)
+
+    async def _aadd_track(self, params, timings):
+        playlist, (track_id, fields) = await _timed(timings, 'resolve_ms', asyncio.gather(
+            _timed(timings, 'playlist_lookup_ms', sync_to_async(resolve_playlist)(self.user, params['playlist'])),
+            _timed(timings, 'track_search_ms', self._asearch(params['track'], params.get('artist'))),
+        ))
+        operation = {'op': 'add', 'spotify_track_id': track_id, **fields}
+        outcome, = await _timed(timings, 'mutate_ms', sync_to_async(apply_song_operations)(playlist, [operation]))
+        return {'playlist_id': playlist.pk, 'spotify_track_id': track_id,
+                'name': fields['name'], 'artist': fields['artist'], 'status': outcome['status']}
+
+    async def _aremove_track(self, params, timings):
+        def resolve():
+            playlist = resolve_playlist(self.user, params['playlist'])
+            return playlist, find_song(playlist, params['track'], params.get('artist'))
+
+        playlist, track_id = await _timed(timings, 'resolve_ms', sync_to_async(resolve)())
+        operation = {'op': 'remove', 'spotify_track_id': track_id}
+        outcome, = await _timed(timings, 'mutate_ms', sync_to_async(apply_song_operations)(playlist, [operation]))
+        return {'playlist_id': playlist.pk, 'spotify_track_id': track_id, 'status': outcome['status']}
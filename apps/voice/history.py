@@ -0,0 +1,41 @@
+"""
+Logging of executed voice commands.
+
+The ``VoiceCommand`` row is not needed to answer the user, so the execute
+endpoint queues it on the batched log writer instead of inserting it before
+the response goes out.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from apps.core.logbuffer import write_log
+from apps.core.models import VoiceCommand
+
+
+def command_row(user_id, execution):
+    """Unsaved ``VoiceCommand`` describing an ``ExecutionResult``."""
+    return VoiceCommand(
+        user_id=user_id,
+        raw_command=execution.text,
+        parsed_action=execution.action,
+        success=execution.success,
+        error_message=execution.error or None,
+        parse_source=execution.source,
+        parse_latency_ms=execution.parse_latency_ms,
+        stage_timings=execution.timings,
+    )
+
+
+def record_command(user_id, execution):
+    """Queue the log row for ``execution``; returns without waiting for the INSERT."""
+    write_log(command_row(user_id, execution))
+
+
+async def arecord_command(user_id, execution):
+    """``record_command`` for async callers."""
+    if settings.LOG_BUFFER_ENABLED:
+        # Only appends to an in-memory queue, so it is safe on the event loop.
+        record_command(user_id, execution)
+    else:
+        await sync_to_async(record_command)(user_id, execution)
@@ -0,0 +1,74 @@
+"""
+LLM model clients used as the voice parser's fallback path.
+
+A model client exposes ``available()`` and ``parse(text)``, returning a
+``ParsedCommand`` or ``None``. Swap implementations with the
+``VOICE_LLM_MODEL_CLIENT`` setting.
+"""
+
+import json
+import logging
+
+from django.conf import settings
+
+from .parser import SOURCE_LLM, UNKNOWN, ParsedCommand
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ('create_playlist', 'add_track', 'remove_track', 'delete_playlist', 'get_suggestions', UNKNOWN)
+
+SYSTEM_PROMPT = (
+    'You convert voice commands for a Spotify playlist manager into JSON. '
+    f'Reply with only an object {{"action": one of {list(ACTIONS)}, '
+    '"params": {"track", "artist", "playlist", "name", "mood" as applicable}, '
+    '"confidence": number between 0 and 1}.'
+)
+
+
+def parse_model_reply(content):
+    """Turn the model's JSON reply into a ``ParsedCommand``; ``None`` if unusable."""
+    try:
+        data = json.loads(content)
+        action = data.get('action', UNKNOWN)
+        params = data.get('params') or {}
+        confidence = float(data.get('confidence', 0.5))
+    except (TypeError, ValueError, AttributeError):
+        return None
+    if action not in ACTIONS or not isinstance(params, dict):
+        return None
+    params = {key: str(value) for key, value in params.items() if value}
+    return ParsedCommand(action, params, max(0.0, min(confidence, 1.0)), SOURCE_LLM)
+
+
+class OpenAIModelClient:
+    """Chat-completion client for the OpenAI API."""
+
+    def __init__(self, api_key=None, model=None, timeout=None):
+        self.api_key = settings.OPENAI_API_KEY if api_key is None else api_key
+        self.model = model or settings.OPENAI_MODEL
+        self.timeout = timeout or settings.OPENAI_TIMEOUT_SECONDS
+
+    def available(self):
+        return bool(self.api_key)
+
+    def complete(self, text):
+        import openai
+
+        response = openai.ChatCompletion.create(
+            api_key=self.api_key,
+            model=self.model,
+            temperature=0,
+            request_timeout=self.timeout,
+            messages=[
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': text},
+            ],
+        )
+        return response['choices'][0]['message']['content']
+
+    def parse(self, text):
+        try:
+            return parse_model_reply(self.complete(text))
+        except Exception:
+            logger.exception('LLM parse failed for voice command')
+            return None
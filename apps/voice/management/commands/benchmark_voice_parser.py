@@ -0,0 +1,101 @@
+"""
+Benchmark the voice command parser against the bundled corpus.
+"""
+
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.voice.parser import CommandParser, parse_with_rules
+
+CORPUS_PATH = Path(__file__).resolve().parents[2] / 'benchmarks' / 'corpus.json'
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Measure rule fast-path coverage, accuracy and latency on the voice corpus.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(CORPUS_PATH))
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Timed passes over the corpus for the rule path.')
+        parser.add_argument('--with-llm', action='store_true',
+                            help='Also run low-confidence utterances through the configured LLM client.')
+        parser.add_argument('--json', action='store_true', help='Print a JSON report.')
+
+    def handle(self, *args, **options):
+        corpus = json.loads(Path(options['corpus']).read_text())
+        parser = CommandParser.from_settings() if options['with_llm'] else CommandParser()
+
+        fast, correct, mismatches = 0, 0, []
+        for case in corpus:
+            result = parse_with_rules(case['text'])
+            if result.confidence < parser.threshold:
+                continue
+            fast += 1
+            if result.action == case['action'] and result.params == case['params']:
+                correct += 1
+            else:
+                mismatches.append({'text': case['text'], 'got': [result.action, result.params]})
+
+        timings = []
+        for _ in range(options['iterations']):
+            for case in corpus:
+                started = time.perf_counter()
+                parse_with_rules(case['text'])
+                timings.append((time.perf_counter() - started) * 1000)
+
+        report = {
+            'utterances': len(corpus),
+            'fast_path_coverage': fast / len(corpus),
+            'fast_path_accuracy': correct / fast if fast else 0.0,
+            'rule_latency_ms': {
+                'mean': statistics.fmean(timings),
+                'p50': percentile(timings, 50),
+                'p99': percentile(timings, 99),
+            },
+            'mismatches': mismatches,
+        }
+
+        if options['with_llm']:
+            if parser.model_client is None:
+                raise CommandError('No LLM model client is configured (check OPENAI_API_KEY)')
+            llm_timings, llm_correct, llm_cases = [], 0, 0
+            for case in corpus:
+                if case.get('fast_path'):
+                    continue
+                llm_cases += 1
+                result = parser.parse(case['text'])
+                llm_timings.append(result.latency_ms)
+                llm_correct += result.action == case['action']
+            report['llm'] = {
+                'utterances': llm_cases,
+                'action_accuracy': llm_correct / llm_cases if llm_cases else 0.0,
+                'mean_latency_ms': statistics.fmean(llm_timings) if llm_timings else 0.0,
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        latency = report['rule_latency_ms']
+        self.stdout.write(f"Utterances:          {report['utterances']}")
+        self.stdout.write(f"Fast-path coverage:  {report['fast_path_coverage']:.1%}")
+        self.stdout.write(f"Fast-path accuracy:  {report['fast_path_accuracy']:.1%}")
+        self.stdout.write(
+            f"Rule latency:        mean {latency['mean']:.4f} ms, p50 {latency['p50']:.4f} ms, "
+            f"p99 {latency['p99']:.4f} ms"
+        )
+        for mismatch in mismatches:
+            self.stdout.write(f"  mismatch: {mismatch['text']!r} -> {mismatch['got']}")
+        if 'llm' in report:
+            self.stdout.write(
+                f"LLM fallback:        {report['llm']['action_accuracy']:.1%} accurate, "
+                f"mean {report['llm']['mean_latency_ms']:.1f} ms"
+            )
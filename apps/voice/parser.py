@@ -0,0 +1,188 @@
+"""
+Voice command parsing.
+
+Utterances first go through a compiled rule grammar that resolves common
+phrasings locally in microseconds. Only when no rule matches with enough
+confidence is the utterance sent to the LLM model client, if one is
+configured.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+SOURCE_RULE = 'rule'
+SOURCE_LLM = 'llm'
+
+UNKNOWN = 'unknown'
+
+_FILLER = r"(?:(?:please|hey|ok(?:ay)?|can you|could you|would you|i want to|i'd like to|let's)\s+)*"
+_PLAYLIST = r"(?:(?:my|the)\s+)?(?P<playlist>.+?)(?:\s+playlist)?"
+_TRACK = r"(?:(?:the\s+)?(?:song|track)\s+)?(?P<track>.+?)(?:\s+by\s+(?P<artist>.+?))?"
+
+# Track captures the grammar cannot resolve on its own. Their rule results
+# score below the LLM threshold, and carry the safest reading for when no
+# model client is configured.
+AMBIGUOUS_CONFIDENCE = 0.6
+# "add this to ...": the track is whatever is playing, which the rules cannot know.
+_DEICTIC_TRACK = re.compile(
+    r"^(?:(?:this|that|it)(?:\s+(?:song|track|one))?|(?:the\s+)?current\s+(?:song|track)|what(?:'s|\s+is)\s+playing)$",
+    re.IGNORECASE,
+)
+# "Stand by Me", "Stand by Your Man": "by" followed by these is part of the title.
+_TITLE_BY = re.compile(r'^(?:me|you|us|him|her|them|it|my|your|our|his|their)\b', re.IGNORECASE)
+# "take on me off ...": a capture starting with a particle took the verb away from the title.
+_PARTICLE_START = re.compile(r'^(?:on|off|out|up|down|in|over|back|away|it|me)\b', re.IGNORECASE)
+
+
+@dataclass
+class ParsedCommand:
+    """Structured result of parsing one utterance."""
+    action: str
+    params: dict = field(default_factory=dict)
+    confidence: float = 0.0
+    source: str = SOURCE_RULE
+    latency_ms: float = 0.0
+
+    @property
+    def is_unknown(self):
+        return self.action == UNKNOWN
+
+
+@dataclass(frozen=True)
+class Rule:
+    action: str
+    pattern: re.Pattern
+    confidence: float
+
+
+def _rule(action, pattern, confidence=0.95):
+    return Rule(action, re.compile(rf'^{_FILLER}{pattern}[.!?]*$', re.IGNORECASE), confidence)
+
+
+# Order matters: the first matching rule wins, so the more specific
+# "remove X from Y" phrasings come before "delete playlist X".
+RULES = (
+    _rule('create_playlist',
+          r'(?:create|make|start|build)\s+(?:a\s+|me\s+a\s+)?(?:new\s+)?playlist'
+          r'(?:\s+(?:called|named|titled))?\s+(?P<name>.+?)'),
+    _rule('create_playlist', r'new\s+playlist(?:\s+(?:called|named))?\s+(?P<name>.+?)'),
+    _rule('add_track', rf'(?P<verb>add|put|save|throw)\s+{_TRACK}\s+(?:to|in|into|on(?:to)?)\s+{_PLAYLIST}'),
+    _rule('remove_track',
+          rf'(?P<verb>remove|delete|take(?:\s+out)?|drop)\s+{_TRACK}(?:\s+out)?\s+(?:from|of|off)\s+{_PLAYLIST}'),
+    _rule('delete_playlist',
+          r'(?:delete|remove|get rid of)\s+(?:(?:my|the)\s+)?(?:playlist\s+(?P<playlist>.+?)'
+          r'|(?P<playlist_alt>.+?)\s+playlist)'),
+    _rule('get_suggestions',
+          rf'(?:suggest|recommend)\s+(?:some\s+)?(?:songs?|tracks?|music)?\s*(?:for|to\s+add\s+to)\s+{_PLAYLIST}'),
+    _rule('get_suggestions',
+          r'(?:suggest|recommend)\s+(?:me\s+)?(?:some(?:thing)?\s+)?(?P<mood>[\w\s-]*?)\s*'
+          r'(?:songs?|tracks?|music)?'),
+    _rule('get_suggestions',
+          r'(?:play|find|give\s+me|show\s+me)\s+(?:me\s+)?(?:some(?:thing)?|more)\s+(?P<mood>[\w\s-]+?)'
+          r'(?:\s+(?:songs?|tracks?|music))?', confidence=0.85),
+    _rule('get_suggestions', r'(?:give\s+me\s+|any\s+)?(?:suggestions|recommendations)', confidence=0.9),
+)
+
+# Words that show intent even when no full rule matches; used to score
+# partial matches below the LLM threshold. Matched as whole words, so
+# "address" is not "add".
+KEYWORDS = {
+    action: re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\b')
+    for action, words in {
+        'create_playlist': ('create', 'make', 'new playlist'),
+        'add_track': ('add', 'put', 'save'),
+        'remove_track': ('remove', 'take out', 'drop'),
+        'delete_playlist': ('delete', 'get rid of'),
+        'get_suggestions': ('suggest', 'recommend', 'something', 'similar'),
+    }.items()
+}
+
+
+def _clean(value):
+    return value.strip(' "\'') if value else value
+
+
+def _resolve_track(params, confidence):
+    """Rewrite ambiguous track captures in ``params``; returns the rule's confidence."""
+    verb = params.pop('verb', None)
+    track = params.get('track')
+    if track is None:
+        return confidence
+    if _DEICTIC_TRACK.match(track):
+        # Searching Spotify for "this" would add an arbitrary song.
+        del params['track']
+        return AMBIGUOUS_CONFIDENCE
+    artist = params.get('artist')
+    if artist is not None:
+        # The lazy capture splits at the first "by": "Stand by Me by Ben E. King".
+        head, by, tail = artist.rpartition(' by ')
+        if by:
+            track, artist = f'{track} by {head}', tail
+            params.update(track=track, artist=artist)
+        if _TITLE_BY.match(artist):
+            params['track'] = f'{track} by {artist}'
+            del params['artist']
+            return AMBIGUOUS_CONFIDENCE
+    if verb and _PARTICLE_START.match(track):
+        params['track'] = f'{verb.lower()} {track}'
+        return AMBIGUOUS_CONFIDENCE
+    return confidence
+
+
+def parse_with_rules(text):
+    """Parse ``text`` with the local grammar only."""
+    utterance = ' '.join(text.split())
+    for rule in RULES:
+        match = rule.pattern.match(utterance)
+        if match:
+            params = {key: _clean(value) for key, value in match.groupdict().items() if value}
+            if 'playlist_alt' in params:
+                params['playlist'] = params.pop('playlist_alt')
+            confidence = _resolve_track(params, rule.confidence)
+            return ParsedCommand(rule.action, params, confidence, SOURCE_RULE)
+
+    lowered = utterance.lower()
+    for action, pattern in KEYWORDS.items():
+        if pattern.search(lowered):
+            return ParsedCommand(action, {}, 0.4, SOURCE_RULE)
+    return ParsedCommand(UNKNOWN, {}, 0.0, SOURCE_RULE)
+
+
+def get_model_client():
+    """Return the configured LLM model client, or ``None`` when disabled."""
+    path = settings.VOICE_LLM_MODEL_CLIENT
+    if not path:
+        return None
+    client = import_string(path)()
+    return client if client.available() else None
+
+
+class CommandParser:
+    """Rule-first parser with an optional LLM fallback for low-confidence input."""
+
+    def __init__(self, model_client=None, threshold=None):
+        self.model_client = model_client
+        self.threshold = settings.VOICE_RULE_CONFIDENCE_THRESHOLD if threshold is None else threshold
+
+    @classmethod
+    def from_settings(cls):
+        from .cache import CachedModelClient, get_response_cache
+
+        model_client = get_model_client()
+        if model_client is not None and settings.VOICE_LLM_CACHE_ENABLED:
+            model_client = CachedModelClient(model_client, get_response_cache())
+        return cls(model_client=model_client)
+
+    def parse(self, text):
+        started = time.perf_counter()
+        result = parse_with_rules(text)
+        if result.confidence < self.threshold and self.model_client is not None:
+            fallback = self.model_client.parse(text)
+            if fallback is not None and fallback.confidence >= result.confidence:
+                result = fallback
+        result.latency_ms = (time.perf_counter() - started) * 1000
+        return result
@@ -0,0 +1,94 @@
+from django.test import SimpleTestCase
+
+from apps.voice.cache import CachedModelClient, ResponseCache
+from apps.voice.parser import ParsedCommand
+
+
+class StubModelClient:
+    """Answers from a fixed table and counts the calls that reach it."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def available(self):
+        return True
+
+    def parse(self, text):
+        self.calls.append(text)
+        action, params = self.answers[text]
+        return ParsedCommand(action, params, 0.9, 'llm')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CachedModelClientTests(SimpleTestCase):
+    def setUp(self):
+        self.model = StubModelClient({
+            'Suggest something upbeat!': ('get_suggestions', {}),
+            'suggest something upbeat for me': ('get_suggestions', {}),
+            'add hey jude to road trip': ('add_track', {'track': 'hey jude', 'playlist': 'road trip'}),
+            'add hey joe to road trip': ('add_track', {'track': 'hey joe', 'playlist': 'road trip'}),
+            'add hey jude to my road trip': ('add_track', {'track': 'hey jude', 'playlist': 'road trip'}),
+            'create a playlist called gym': ('create_playlist', {'name': 'gym'}),
+        })
+        self.clock = Clock()
+        self.cache = ResponseCache(max_entries=3, ttl=60, min_similarity=0.8, clock=self.clock)
+        self.client = CachedModelClient(self.model, self.cache)
+
+    def test_exact_hit_skips_model(self):
+        self.client.parse('Suggest something upbeat!')
+        result = self.client.parse('please suggest something upbeat')
+        self.assertEqual((result.action, result.source), ('get_suggestions', 'llm_cache'))
+        self.assertEqual(len(self.model.calls), 1)
+        self.assertEqual(self.cache.stats()['exact_hits'], 1)
+
+    def test_near_hit_without_entities(self):
+        self.client.parse('Suggest something upbeat!')
+        self.assertEqual(self.client.parse('suggest something upbeat for me').source, 'llm_cache')
+        self.assertEqual(self.cache.stats()['near_hits'], 1)
+
+    def test_near_hit_reuses_entities_found_in_new_text(self):
+        self.client.parse('add hey jude to road trip')
+        result = self.client.parse('add hey jude to my road trip')
+        self.assertEqual(result.source, 'llm_cache')
+        self.assertEqual(result.params, {'track': 'hey jude', 'playlist': 'road trip'})
+
+    def test_near_hit_with_other_entities_calls_model(self):
+        self.client.parse('add hey jude to road trip')
+        result = self.client.parse('add hey joe to road trip')
+        self.assertEqual((result.source, result.params['track']), ('llm', 'hey joe'))
+        self.assertEqual(len(self.model.calls), 2)
+        self.assertEqual(self.cache.stats()['near_hits'], 0)
+
+    def test_entries_expire(self):
+        self.client.parse('create a playlist called gym')
+        self.clock.now = 61
+        self.assertEqual(self.client.parse('create a playlist called gym').source, 'llm')
+        self.assertEqual(len(self.model.calls), 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.client.parse('Suggest something upbeat!')
+        self.client.parse('add hey jude to road trip')
+        self.client.parse('create a playlist called gym')
+        self.client.parse('Suggest something upbeat!')
+        self.client.parse('add hey joe to road trip')
+
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.assertIsNone(self.cache.get('add hey jude to road trip'))
+        self.assertIsNotNone(self.cache.get('Suggest something upbeat!'))
+
+    def test_stats(self):
+        self.client.parse('Suggest something upbeat!')
+        self.client.parse('Suggest something upbeat!')
+        self.client.parse('suggest something upbeat for me')
+        self.client.parse('create a playlist called gym')
+        self.assertEqual(self.cache.stats(), {
+            'entries': 2, 'exact_hits': 1, 'near_hits': 1, 'misses': 2, 'evictions': 0, 'hit_rate': 0.5,
+        })
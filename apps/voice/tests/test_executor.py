@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.core.catalog import upsert_tracks
+from apps.core.models import Playlist, Song
+from apps.core.signals import playlist_songs_changed
+from apps.voice.executor import CommandFailed, find_song
+
+
+class FindSongTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('remover', 'remover@example.com', 'password')
+        self.playlist = Playlist.objects.create(user=user, spotify_playlist_id='remove-test', name='Road Trip')
+        tracks = {
+            'jude': {'name': 'Hey Jude', 'artist': 'The Beatles'},
+            'rhapsody': {'name': 'Bohemian Rhapsody', 'artist': 'Queen'},
+        }
+        pks = upsert_tracks(tracks)
+        Song.objects.bulk_create(
+            Song(playlist=self.playlist, track_id=pk, position=i) for i, pk in enumerate(pks.values())
+        )
+        playlist_songs_changed.send(sender=Playlist, playlist=self.playlist)
+
+    def test_name_contains(self):
+        self.assertEqual(find_song(self.playlist, 'hey jude'), 'jude')
+
+    def test_close_fuzzy_match(self):
+        self.assertEqual(find_song(self.playlist, 'bohemian rapsody'), 'rhapsody')
+
+    def test_weak_fuzzy_match_is_only_suggested(self):
+        with self.assertRaisesMessage(CommandFailed, '"hey joe" is not in Road Trip; did you mean "Hey Jude"?'):
+            find_song(self.playlist, 'hey joe')
+
+    def test_no_match(self):
+        with self.assertRaisesMessage(CommandFailed, '"purple haze" is not in Road Trip'):
+            find_song(self.playlist, 'purple haze')
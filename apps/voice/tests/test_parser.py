@@ -0,0 +1,40 @@
+from django.test import SimpleTestCase
+
+from apps.voice.parser import AMBIGUOUS_CONFIDENCE, UNKNOWN, CommandParser, parse_with_rules
+
+
+class RuleParserTests(SimpleTestCase):
+    def assertParsed(self, text, action, params, confident=True):
+        result = parse_with_rules(text)
+        self.assertEqual((result.action, result.params), (action, params))
+        self.assertEqual(result.confidence >= CommandParser().threshold, confident, result.confidence)
+
+    def test_track_and_artist(self):
+        self.assertParsed('add Hey Jude by The Beatles to my road trip playlist', 'add_track',
+                          {'track': 'Hey Jude', 'artist': 'The Beatles', 'playlist': 'road trip'})
+
+    def test_title_containing_by_with_artist(self):
+        self.assertParsed('add Stand by Me by Ben E. King to oldies', 'add_track',
+                          {'track': 'Stand by Me', 'artist': 'Ben E. King', 'playlist': 'oldies'})
+
+    def test_pronoun_track_defers(self):
+        self.assertParsed('add this to my workout playlist', 'add_track', {'playlist': 'workout'}, confident=False)
+        self.assertParsed('put it on my gym playlist', 'add_track', {'playlist': 'gym'}, confident=False)
+
+    def test_ambiguous_by_stays_in_title(self):
+        self.assertParsed('add Stand by Me to my road trip playlist', 'add_track',
+                          {'track': 'Stand by Me', 'playlist': 'road trip'}, confident=False)
+
+    def test_particle_keeps_verb_in_title(self):
+        self.assertParsed('take on me off my 80s playlist', 'remove_track',
+                          {'track': 'take on me', 'playlist': '80s'}, confident=False)
+        self.assertParsed('take out hey jude from road trip', 'remove_track',
+                          {'track': 'hey jude', 'playlist': 'road trip'})
+
+    def test_keywords_match_whole_words(self):
+        self.assertEqual(parse_with_rules('open my address book').action, UNKNOWN)
+        result = parse_with_rules('can you add something upbeat')
+        self.assertEqual((result.action, result.confidence), ('add_track', 0.4))
+
+    def test_ambiguous_confidence_below_threshold(self):
+        self.assertLess(AMBIGUOUS_CONFIDENCE, CommandParser().threshold)
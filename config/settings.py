@@ -5,6 +5,7 @@ Django settings for Spotify Voice Manager SaaS project.
 import os
 from pathlib import Path
 from decouple import config
+import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,9 +35,15 @@ INSTALLED_APPS = [
     'apps.core',
     'apps.api',
     'apps.auth_app',
+    'apps.jobs',
+    'apps.voice',
+    'apps.recommendations',
+    'apps.analytics',
+    'apps.search',
 ]
 
 MIDDLEWARE = [
+    'apps.core.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -68,13 +75,57 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
+# DATABASE_URL selects the primary (SQLite by default); DATABASE_REPLICA_URL
+# optionally adds a read replica used for read-only API actions.
+DATABASE_CONN_MAX_AGE = config('DATABASE_CONN_MAX_AGE', default=60, cast=int)
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': dj_database_url.parse(
+        config('DATABASE_URL', default=f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+        conn_max_age=DATABASE_CONN_MAX_AGE,
+        conn_health_checks=True,
+    ),
 }
 
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=DATABASE_CONN_MAX_AGE,
+        conn_health_checks=True,
+    )
+    # Tests run against a single database: the replica alias mirrors it, and
+    # the router reads a mirror through 'default'. apps/core/tests/test_db_router.py
+    # points the alias at a second SQLite file instead.
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['apps.core.db_router.ReadReplicaRouter']
+
+# Cache
+# locmem by default; set CACHE_URL=redis://host:6379/0 to share the cache
+# between processes (requires the `redis` package).
+CACHE_URL = config('CACHE_URL', default='locmem://')
+
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'playlist-manager',
+        }
+    }
+
+# Cached {user, profile} payloads are dropped when either row changes, but
+# only in the cache that process uses: with the default locmem CACHE_URL,
+# other worker processes keep serving their copy for up to this many seconds.
+PROFILE_CACHE_TIMEOUT = config('PROFILE_CACHE_TIMEOUT', default=300, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -91,6 +142,42 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Authentication
+# Email logins take one indexed lookup; username logins (the admin) still work.
+AUTHENTICATION_BACKENDS = [
+    'apps.auth_app.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Password hashing
+# New hashes use PASSWORD_HASHER; hashes made with another algorithm or
+# PBKDF2 round count are re-encoded when their user next logs in. Fewer rounds
+# mean more logins per CPU core, and cheaper offline guessing if hashes leak.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2_sha256')
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=600000, cast=int)
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2_sha256': 'apps.auth_app.hashers.ConfigurablePBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    # These two need the argon2-cffi and bcrypt packages.
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt_sha256': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2_sha1': 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+
+# Bearer tokens (POST /api/auth/token/)
+# Access tokens are signed with SECRET_KEY and checked without a session
+# lookup, so they cannot be revoked: keep them short-lived. Refresh tokens stop
+# working when their user's password changes or the user is deactivated.
+TOKEN_ACCESS_LIFETIME_SECONDS = config('TOKEN_ACCESS_LIFETIME_SECONDS', default=300, cast=int)
+TOKEN_REFRESH_LIFETIME_SECONDS = config('TOKEN_REFRESH_LIFETIME_SECONDS', default=14 * 24 * 3600, cast=int)
+# Token-authenticated users are cached per process for this long; changes made
+# in another process are seen once the entry expires.
+TOKEN_USER_CACHE_SECONDS = config('TOKEN_USER_CACHE_SECONDS', default=60, cast=int)
+TOKEN_USER_CACHE_MAX_USERS = config('TOKEN_USER_CACHE_MAX_USERS', default=10000, cast=int)
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -112,6 +199,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        # Requests with an Authorization: Bearer header never touch the session.
+        'apps.auth_app.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -145,9 +234,124 @@ CORS_ALLOW_HEADERS = [
 SPOTIFY_CLIENT_ID = config('SPOTIFY_CLIENT_ID', default='')
 SPOTIFY_CLIENT_SECRET = config('SPOTIFY_CLIENT_SECRET', default='')
 SPOTIFY_REDIRECT_URI = config('SPOTIFY_REDIRECT_URI', default='http://localhost:8000/api/auth/spotify/callback/')
+SPOTIFY_API_URL = config('SPOTIFY_API_URL', default='https://api.spotify.com/v1/')
+SPOTIFY_TOKEN_URL = config('SPOTIFY_TOKEN_URL', default='https://accounts.spotify.com/api/token')
+# Keep-alive connections shared by all Spotify clients in a process.
+SPOTIFY_HTTP_POOL_SIZE = config('SPOTIFY_HTTP_POOL_SIZE', default=20, cast=int)
+# Per-user clients kept per process.
+SPOTIFY_CLIENT_POOL_MAX_USERS = config('SPOTIFY_CLIENT_POOL_MAX_USERS', default=1000, cast=int)
+# Refresh user access tokens this long before they expire.
+SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS = config('SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS', default=300, cast=int)
+
+# Threads async views use for blocking Spotify and LLM calls.
+ASYNC_IO_THREADS = config('ASYNC_IO_THREADS', default=64, cast=int)
+# Spotify requests in flight per user during an async library sync.
+SPOTIFY_SYNC_CONCURRENCY = config('SPOTIFY_SYNC_CONCURRENCY', default=8, cast=int)
+
+# Audio-feature enrichment
+# Concurrent batch requests, and the request rate they share (per second).
+SPOTIFY_ENRICH_WORKERS = config('SPOTIFY_ENRICH_WORKERS', default=4, cast=int)
+SPOTIFY_ENRICH_RATE = config('SPOTIFY_ENRICH_RATE', default=5.0, cast=float)
+SPOTIFY_ENRICH_MAX_RETRIES = config('SPOTIFY_ENRICH_MAX_RETRIES', default=5, cast=int)
 
 # OpenAI Configuration
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
+OPENAI_MODEL = config('OPENAI_MODEL', default='gpt-3.5-turbo')
+OPENAI_TIMEOUT_SECONDS = config('OPENAI_TIMEOUT_SECONDS', default=10, cast=int)
+
+# Voice command parsing
+# Rule matches below this confidence fall back to the LLM model client.
+VOICE_RULE_CONFIDENCE_THRESHOLD = config('VOICE_RULE_CONFIDENCE_THRESHOLD', default=0.75, cast=float)
+VOICE_LLM_MODEL_CLIENT = config('VOICE_LLM_MODEL_CLIENT', default='apps.voice.llm.OpenAIModelClient')
+VOICE_LLM_CACHE_ENABLED = config('VOICE_LLM_CACHE_ENABLED', default=True, cast=bool)
+VOICE_LLM_CACHE_MAX_ENTRIES = config('VOICE_LLM_CACHE_MAX_ENTRIES', default=5000, cast=int)
+VOICE_LLM_CACHE_TTL_SECONDS = config('VOICE_LLM_CACHE_TTL_SECONDS', default=86400, cast=int)
+VOICE_LLM_CACHE_MIN_SIMILARITY = config('VOICE_LLM_CACHE_MIN_SIMILARITY', default=0.9, cast=float)
+# "remove <track>" only falls back to a fuzzy match scoring at least this
+# (0-1); weaker matches are offered back as "did you mean" instead of removed.
+VOICE_REMOVE_MIN_SCORE = config('VOICE_REMOVE_MIN_SCORE', default=0.8, cast=float)
+
+# Voice command and AI conversation logs
+# Rows are queued in-process and inserted in batches of up to
+# LOG_BUFFER_MAX_ROWS, at least every LOG_BUFFER_FLUSH_SECONDS.
+LOG_BUFFER_ENABLED = config('LOG_BUFFER_ENABLED', default=True, cast=bool)
+LOG_BUFFER_MAX_ROWS = config('LOG_BUFFER_MAX_ROWS', default=200, cast=int)
+LOG_BUFFER_FLUSH_SECONDS = config('LOG_BUFFER_FLUSH_SECONDS', default=2.0, cast=float)
+# Rows that could not be inserted wait here until a later flush replays them.
+LOG_SPOOL_DIR = config('LOG_SPOOL_DIR', default=str(BASE_DIR / 'var' / 'log_spool'))
+# Log rows older than this are deleted by the logs.prune job (0 keeps them).
+LOG_RETENTION_DAYS = config('LOG_RETENTION_DAYS', default=90, cast=int)
+LOG_PRUNE_BATCH_SIZE = config('LOG_PRUNE_BATCH_SIZE', default=5000, cast=int)
+
+# Request performance instrumentation
+# Time every request (wall, SQL, serialization, rendering) into the /metrics
+# histograms.
+PERF_INSTRUMENTATION_ENABLED = config('PERF_INSTRUMENTATION_ENABLED', default=True, cast=bool)
+# Add a Server-Timing header with the db, serialize, render and total durations.
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default=True, cast=bool)
+# Requests at least this slow are logged as warnings with their timings.
+PERF_SLOW_REQUEST_MS = config('PERF_SLOW_REQUEST_MS', default=500, cast=int)
+# Bearer token Prometheus sends to GET /metrics; when empty only staff
+# sessions may read it.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Search
+# 'auto' uses the database's trigram index (SQLite FTS5 or PostgreSQL pg_trgm)
+# where installed and a per-user in-process index otherwise; or force
+# 'sqlite_fts', 'postgres_trgm' or 'memory'.
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='auto')
+# Users whose in-process search index is kept per process.
+SEARCH_CACHE_MAX_USERS = config('SEARCH_CACHE_MAX_USERS', default=1000, cast=int)
+# In-process indexes are rebuilt at least this often, for the same reason as
+# RECOMMENDATION_CACHE_SECONDS: with the default locmem CACHE_URL other
+# processes never see an invalidation.
+SEARCH_CACHE_SECONDS = config('SEARCH_CACHE_SECONDS', default=300, cast=int)
+# Matches scoring below this (0-1) are not returned.
+SEARCH_MIN_SCORE = config('SEARCH_MIN_SCORE', default=0.45, cast=float)
+
+# Analytics
+# Queue a rollup after every log flush that wrote voice commands; the
+# scheduled run (ANALYTICS_ROLLUP_INTERVAL_SECONDS) catches anything missed.
+ANALYTICS_AUTO_ROLLUP = config('ANALYTICS_AUTO_ROLLUP', default=True, cast=bool)
+# Log rows folded in per transaction.
+ANALYTICS_ROLLUP_BATCH_SIZE = config('ANALYTICS_ROLLUP_BATCH_SIZE', default=10000, cast=int)
+
+# Background jobs
+# 'apps.jobs.backends.DatabaseBackend' requires `python manage.py run_worker`;
+# 'apps.jobs.backends.ImmediateBackend' runs jobs inline in the request.
+JOB_QUEUE_BACKEND = config('JOB_QUEUE_BACKEND', default='apps.jobs.backends.DatabaseBackend')
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=3, cast=int)
+JOB_MAX_CONCURRENT_PER_USER = config('JOB_MAX_CONCURRENT_PER_USER', default=2, cast=int)
+JOB_RETRY_BACKOFF_SECONDS = config('JOB_RETRY_BACKOFF_SECONDS', default=10, cast=int)
+JOB_RETRY_BACKOFF_MAX_SECONDS = config('JOB_RETRY_BACKOFF_MAX_SECONDS', default=600, cast=int)
+# A running job whose heartbeat is older than JOB_STALE_AFTER_SECONDS is taken
+# as abandoned by a crashed worker; workers refresh it every
+# JOB_HEARTBEAT_SECONDS while the task runs.
+JOB_STALE_AFTER_SECONDS = config('JOB_STALE_AFTER_SECONDS', default=900, cast=int)
+JOB_HEARTBEAT_SECONDS = config('JOB_HEARTBEAT_SECONDS', default=30, cast=int)
+# Periodic tasks queued by run_worker: task name -> interval in seconds.
+JOB_SCHEDULE = {
+    'spotify.enrich_audio_features': config('SPOTIFY_ENRICH_INTERVAL_SECONDS', default=3600, cast=int),
+    'logs.prune': config('LOG_PRUNE_INTERVAL_SECONDS', default=86400, cast=int),
+    'analytics.rollup_voice_commands': config('ANALYTICS_ROLLUP_INTERVAL_SECONDS', default=300, cast=int),
+}
+
+# Recommendations
+# Users whose feature matrices are kept in memory per process.
+RECOMMENDATION_CACHE_MAX_USERS = config('RECOMMENDATION_CACHE_MAX_USERS', default=1000, cast=int)
+# Matrices are rebuilt at least this often. Invalidation bumps a version in
+# the shared cache; with the default locmem CACHE_URL only the process that
+# made the change sees it, so web workers miss audio features the job worker
+# enriches for up to this many seconds.
+RECOMMENDATION_CACHE_SECONDS = config('RECOMMENDATION_CACHE_SECONDS', default=300, cast=int)
+# Catalog-wide "more like this" index (memory-mapped .npy files).
+ANN_INDEX_DIR = config('ANN_INDEX_DIR', default=str(BASE_DIR / 'var' / 'ann'))
+# Clusters scanned per query; higher trades latency for recall.
+ANN_NPROBE = config('ANN_NPROBE', default=8, cast=int)
+# Rebuild from scratch once the delta segment exceeds this fraction of the base.
+ANN_REBUILD_RATIO = config('ANN_REBUILD_RATIO', default=0.2, cast=float)
+# Queue an incremental index update whenever songs are added.
+ANN_AUTO_UPDATE = config('ANN_AUTO_UPDATE', default=True, cast=bool)
 
 # Logging
 LOGGING = {